@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from fastapi import HTTPException
+from config import BOOK_CACHE_MAX_SIZE, BOOK_CACHE_TTL, BOOK_CACHE_NEGATIVE_TTL, BOOK_CACHE_WRITE_FENCE
+from domain.book import Book
+from utils.futures import fail_future
+
+logger = logging.getLogger(__name__)
+
+
+class BookCache:
+    """Cache LRU com TTL, em memória do processo, para a busca de livro por id.
+
+    - Guarda também o "não encontrado" (404) por ``negative_ttl`` segundos
+    - Buscas concorrentes do mesmo id que não estão no cache viram uma única query
+    - ``invalidate`` descarta a entrada e qualquer busca em andamento para o id, então
+      nenhum leitor enxerga um dado mais velho que ``ttl`` segundos
+    - por ``write_fence`` segundos depois de ``invalidate`` (ou de ``clear``) o id não volta
+      ao cache: com réplicas, uma leitura nesse intervalo pode ter vindo de uma réplica que
+      ainda não recebeu a escrita
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float, write_fence: float = 0.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.write_fence = write_fence
+        self._entries: OrderedDict[int, tuple[Book | None, float]] = OrderedDict()
+        self._inflight: dict[int, asyncio.Future] = {}
+        # id -> instante (time.monotonic()) até quando o id não é guardado; _fenced_all vale para todos
+        self._fenced: OrderedDict[int, float] = OrderedDict()
+        self._fenced_all = 0.0
+
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    async def get_or_load(self, book_id: int, loader) -> Book:
+        if not self.enabled:
+            return await loader()
+
+        entry = self._entries.get(book_id)
+        if entry is not None:
+            book, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(book_id)
+                if book is None:
+                    self._negative_hits += 1
+                    raise HTTPException(status_code=404, detail=f"Book with ID {book_id} does not exist")
+                self._hits += 1
+                return book
+            del self._entries[book_id]
+            self._expirations += 1
+
+        inflight = self._inflight.get(book_id)
+        if inflight is not None:
+            self._coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # A requisição que fazia a busca foi cancelada: busca por conta própria
+                return await loader()
+
+        self._misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[book_id] = future
+        try:
+            book = await loader()
+        except HTTPException as e:
+            if e.status_code == 404:
+                self._store(book_id, future, None, self.negative_ttl)
+            fail_future(future, e)
+            raise
+        except BaseException as e:
+            fail_future(future, e)
+            raise
+        else:
+            self._store(book_id, future, book, self.ttl)
+        finally:
+            if self._inflight.get(book_id) is future:
+                del self._inflight[book_id]
+
+        future.set_result(book)
+        return book
+
+    def invalidate(self, book_id: int) -> None:
+        self._invalidations += 1
+        self._entries.pop(book_id, None)
+        # A busca em andamento pode ter lido o valor antigo: ela não grava mais no cache
+        self._inflight.pop(book_id, None)
+        if self.write_fence > 0:
+            now = time.monotonic()
+            # Mesma duração para todos: a ordem de inserção é a ordem de expiração
+            while self._fenced and next(iter(self._fenced.values())) <= now:
+                self._fenced.popitem(last=False)
+            self._fenced[book_id] = now + self.write_fence
+            self._fenced.move_to_end(book_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+        self._fenced.clear()
+        if self.write_fence > 0:
+            self._fenced_all = time.monotonic() + self.write_fence
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._negative_hits + self._misses + self._coalesced
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "write_fence_seconds": self.write_fence,
+            "negative_ttl_seconds": self.negative_ttl,
+            "hits": self._hits,
+            "negative_hits": self._negative_hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "invalidations": self._invalidations,
+            "hit_ratio": round((self._hits + self._negative_hits + self._coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _store(self, book_id: int, future: asyncio.Future, book: Book | None, ttl: float) -> None:
+        if ttl <= 0 or self._inflight.get(book_id) is not future:
+            return
+        now = time.monotonic()
+        if self._fenced_all > now or self._fenced.get(book_id, 0.0) > now:
+            return
+        self._entries[book_id] = (book, now + ttl)
+        self._entries.move_to_end(book_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+
+book_cache = BookCache(BOOK_CACHE_MAX_SIZE, BOOK_CACHE_TTL, BOOK_CACHE_NEGATIVE_TTL, BOOK_CACHE_WRITE_FENCE)
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from fastapi import HTTPException
+from config import BOOK_LOADER_WINDOW_MS, BOOK_LOADER_MAX_BATCH
+from domain.book import Book
+from utils.futures import fail_future
+
+logger = logging.getLogger(__name__)
+
+
+class BookLoader:
+    """Junta buscas por id concorrentes em uma única query, no estilo dataloader.
+
+    A primeira busca abre um lote e espera ``window`` segundos; as que chegam nesse
+    intervalo entram no mesmo lote, até ``max_batch`` ids. Quem abriu o lote faz uma
+    só consulta (``get_books_by_ids``) com a sua storage e entrega a cada id o livro
+    ou um 404. Se essa requisição for cancelada, as outras buscam por conta própria.
+    """
+
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max_batch
+        self._batch: dict[int, asyncio.Future] | None = None
+
+        self._loads = 0
+        self._batches = 0
+        self._coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch > 1
+
+    async def load(self, book_id: int, storage) -> Book:
+        if not self.enabled:
+            return await storage.get_book_by_id(book_id)
+
+        self._loads += 1
+        batch = self._batch
+        if batch is not None and (book_id in batch or len(batch) < self.max_batch):
+            future = batch.get(book_id)
+            if future is None:
+                future = batch[book_id] = asyncio.get_running_loop().create_future()
+            self._coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                return await storage.get_book_by_id(book_id)
+
+        return await self._run_batch(book_id, storage)
+
+    async def _run_batch(self, book_id: int, storage) -> Book:
+        future = asyncio.get_running_loop().create_future()
+        batch = self._batch = {book_id: future}
+        try:
+            await asyncio.sleep(self.window)
+            # Lote fechado: buscas que chegarem agora abrem outro
+            if self._batch is batch:
+                self._batch = None
+            books = await storage.get_books_by_ids(list(batch))
+        except BaseException as e:
+            if self._batch is batch:
+                self._batch = None
+            for pending in batch.values():
+                fail_future(pending, e)
+            raise
+
+        self._batches += 1
+        logger.debug("[CACHE] Loaded %s books in one batch", len(batch))
+        found = {book.id: book for book in books}
+        for loaded_id, pending in batch.items():
+            book = found.get(loaded_id)
+            if book is None:
+                fail_future(pending, HTTPException(status_code=404, detail=f"Book with ID {loaded_id} does not exist"))
+            else:
+                pending.set_result(book)
+        return future.result()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "loads": self._loads,
+            "batches": self._batches,
+            "coalesced": self._coalesced,
+        }
+
+
+book_loader = BookLoader(BOOK_LOADER_WINDOW_MS / 1000, BOOK_LOADER_MAX_BATCH)
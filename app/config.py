@@ -1,24 +1,220 @@
+import functools
 import logging
 import psycopg2
+from contextlib import contextmanager
 import os
 from dotenv import load_dotenv
+from database.connection_pool import ConnectionPool, PoolTimeout
+from database.replica_router import ReplicaRouter
+from database.statement_timeout import apply_statement_timeout, remaining_seconds
+from observability.metrics import db_pool_acquire_seconds, db_connection_open_seconds
+from observability.request_context import timings_var
+import time
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-def connection_db():
-    logger.info("Estabelecendo conexão com o banco de dados...")
-    conn = psycopg2.connect(
-        database=os.getenv('DB_NAME'),
-        user=os.getenv('DB_USER'),
-        password=os.getenv('DB_PASSWORD'),
-        host=os.getenv('DB_HOST'),
-        port=os.getenv('DB_PORT')
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'postgres')
+
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '5'))
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))
+
+# Réplicas de leitura: DSNs do libpq separados por vírgula (vazio = tudo no primário)
+DB_REPLICA_DSNS = [dsn.strip() for dsn in os.getenv('DB_REPLICA_DSNS', '').split(',') if dsn.strip()]
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5'))
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+
+DB_EXECUTION_MODE = os.getenv('DB_EXECUTION_MODE', 'threadpool')
+DB_EXECUTOR_MAX_WORKERS = int(os.getenv('DB_EXECUTOR_MAX_WORKERS', str(DB_POOL_MAX_SIZE)))
+
+# Controle de admissão: requisições simultâneas por classe de rota (0 = sem limite), fila de espera
+# limitada e prazo total da requisição, repassado ao Postgres como statement_timeout (0 = sem prazo)
+ADMISSION_READ_CONCURRENCY = int(os.getenv('ADMISSION_READ_CONCURRENCY', '64'))
+ADMISSION_WRITE_CONCURRENCY = int(os.getenv('ADMISSION_WRITE_CONCURRENCY', '16'))
+ADMISSION_QUEUE_SIZE = int(os.getenv('ADMISSION_QUEUE_SIZE', '128'))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '1'))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+REQUEST_TIMEOUT = float(os.getenv('REQUEST_TIMEOUT', '10'))
+
+BOOK_CACHE_MAX_SIZE = int(os.getenv('BOOK_CACHE_MAX_SIZE', '10000'))
+BOOK_CACHE_TTL = float(os.getenv('BOOK_CACHE_TTL', '5'))
+BOOK_CACHE_NEGATIVE_TTL = float(os.getenv('BOOK_CACHE_NEGATIVE_TTL', '1'))
+# Depois de uma escrita, por quantos segundos o livro não volta ao cache: uma réplica atrasada ainda
+# devolve a versão anterior. Padrão: a janela de read-your-writes quando há réplicas, senão 0
+BOOK_CACHE_WRITE_FENCE = float(os.getenv(
+    'BOOK_CACHE_WRITE_FENCE', str(DB_READ_YOUR_WRITES_SECONDS if DB_REPLICA_DSNS else 0)
+))
+
+# Janela em que buscas concorrentes por id viram uma única query (0 desliga)
+BOOK_LOADER_WINDOW_MS = float(os.getenv('BOOK_LOADER_WINDOW_MS', '0'))
+BOOK_LOADER_MAX_BATCH = int(os.getenv('BOOK_LOADER_MAX_BATCH', '100'))
+BATCH_GET_MAX_IDS = int(os.getenv('BATCH_GET_MAX_IDS', '200'))
+
+# Group commit: janela em que criações concorrentes (POST /books) viram um único INSERT e COMMIT (0 desliga)
+GROUP_COMMIT_WINDOW_MS = float(os.getenv('GROUP_COMMIT_WINDOW_MS', '0'))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv('GROUP_COMMIT_MAX_BATCH', '64'))
+
+# Cache-Control das leituras com ETag; vazio não envia o header
+HTTP_CACHE_CONTROL_BOOK = os.getenv('HTTP_CACHE_CONTROL_BOOK', 'no-cache')
+HTTP_CACHE_CONTROL_LIST = os.getenv('HTTP_CACHE_CONTROL_LIST', 'no-cache')
+
+BULK_INSERT_BATCH_SIZE = int(os.getenv('BULK_INSERT_BATCH_SIZE', '1000'))
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '50000'))
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+
+# Change feed (LISTEN/NOTIFY): canal do Postgres e limites dos assinantes de GET /books/changes
+CHANGE_FEED_ENABLED = os.getenv('CHANGE_FEED_ENABLED', 'true').lower() == 'true'
+CHANGE_FEED_CHANNEL = os.getenv('CHANGE_FEED_CHANNEL', 'books_changes')
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv('CHANGE_FEED_QUEUE_SIZE', '1000'))
+CHANGE_FEED_MAX_SUBSCRIBERS = int(os.getenv('CHANGE_FEED_MAX_SUBSCRIBERS', '1000'))
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv('CHANGE_FEED_HEARTBEAT_SECONDS', '15'))
+CHANGE_FEED_CHECK_INTERVAL = float(os.getenv('CHANGE_FEED_CHECK_INTERVAL', '30'))
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LAYER_LEVELS = {
+    layer: os.getenv(f'LOG_LEVEL_{layer.upper()}')
+    for layer in ('resource', 'service', 'dataprovider', 'mapper', 'dependency', 'database', 'cache', 'events')
+}
+LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() == 'true'
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1'))
+LOG_REQUEST_SUMMARY = os.getenv('LOG_REQUEST_SUMMARY', 'true').lower() == 'true'
+
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+_pool: ConnectionPool | None = None
+_replicas: ReplicaRouter | None = None
+
+
+def create_connection(dsn: str | None = None):
+    with db_connection_open_seconds.time():
+        if dsn is not None:
+            return psycopg2.connect(dsn)
+        return psycopg2.connect(
+            database=os.getenv('DB_NAME'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            host=os.getenv('DB_HOST'),
+            port=os.getenv('DB_PORT')
+        )
+
+
+def init_pool() -> ConnectionPool:
+    global _pool
+    logger.info("Criando pool de conexões com o banco de dados...")
+    _pool = ConnectionPool(
+        create_connection,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+        max_idle=DB_POOL_MAX_IDLE
     )
-    logger.info("Conexão com o banco de dados estabelecida.")
+    _pool.open()
+    logger.info("Pool de conexões criado.")
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+        logger.info("Pool de conexões fechado.")
+
+
+def get_pool() -> ConnectionPool:
+    if _pool is None:
+        raise RuntimeError("Connection pool is not initialized")
+    return _pool
+
+
+def init_replicas() -> ReplicaRouter | None:
+    global _replicas
+    if not DB_REPLICA_DSNS:
+        return None
+
+    logger.info("Criando pools das %d réplicas de leitura...", len(DB_REPLICA_DSNS))
+    pools = {}
+    for index, dsn in enumerate(DB_REPLICA_DSNS):
+        pool = ConnectionPool(
+            functools.partial(create_connection, dsn),
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+            max_idle=DB_POOL_MAX_IDLE
+        )
+        try:
+            pool.open()
+        except Exception as e:
+            # Réplica fora do ar não impede o startup: a verificação de saúde a tira da rotação
+            logger.warning("Réplica replica-%d indisponível no startup: %s", index, e)
+        pools[f"replica-{index}"] = pool
+
+    _replicas = ReplicaRouter(pools, DB_REPLICA_CHECK_INTERVAL)
+    _replicas.start()
+    return _replicas
+
+
+def close_replicas() -> None:
+    global _replicas
+    if _replicas is not None:
+        _replicas.close()
+        _replicas = None
+        logger.info("Pools das réplicas fechados.")
+
+
+def get_replica_router() -> ReplicaRouter | None:
+    return _replicas
+
+
+@contextmanager
+def borrow_connection(read_only: bool = False, deadline: float | None = None):
+    """Empresta uma conexão: do primário, ou de uma réplica saudável quando ``read_only``.
+
+    Com ``deadline`` (time.monotonic()), a espera pelo pool e o statement_timeout da
+    conexão ficam limitados ao tempo que ainda resta para a requisição.
+    """
+    name, pool = "primary", get_pool()
+    if read_only and _replicas is not None:
+        name, pool = _replicas.choose() or (name, pool)
+
+    remaining = remaining_seconds(deadline)
+    timeout = None if remaining is None else min(pool.acquire_timeout, remaining)
+    start = time.perf_counter()
     try:
+        conn = pool.acquire(timeout)
+    except PoolTimeout:
+        # Réplica ocupada não é réplica fora do ar: a requisição é recusada em vez de sobrecarregar o primário
+        raise
+    except Exception as e:
+        if name == "primary":
+            raise
+        logger.warning("Falha ao obter conexão da %s, usando o primário: %s", name, e)
+        _replicas.mark_unhealthy(name)
+        name, pool = "primary", get_pool()
+        conn = pool.acquire(timeout)
+    elapsed = time.perf_counter() - start
+    db_pool_acquire_seconds.observe(elapsed)
+    timings = timings_var.get()
+    if timings is not None:
+        timings["db_acquire"] = timings.get("db_acquire", 0.0) + elapsed
+    logger.debug("Conexão obtida do pool (%s).", name)
+    try:
+        apply_statement_timeout(conn, deadline)
         yield conn
     finally:
-        conn.close()
-        logger.info("Conexão com o banco de dados fechada.")          
\ No newline at end of file
+        pool.release(conn)
+        logger.debug("Conexão devolvida ao pool.")
+
+
+def connection_db():
+    with borrow_connection() as conn:
+        yield conn
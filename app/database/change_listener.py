@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import psycopg2
+from psycopg2 import sql
+from database.executor import run_blocking
+from events.change_feed import ChangeFeed
+from mapper.book_mapper import BookMapper
+from serialization.json_codec import loads
+
+logger = logging.getLogger(__name__)
+
+_listener: "ChangeListener | None" = None
+
+
+class ChangeListener:
+    """Conexão dedicada (fora do pool) com LISTEN no canal do change feed.
+
+    O socket da conexão é observado pelo event loop (``add_reader``): não há thread nem
+    polling, e cada NOTIFY recebido vira um ``BookChange`` publicado no ``ChangeFeed`` do
+    processo. A cada ``check_interval`` segundos um ``SELECT 1`` confirma que a conexão
+    continua viva; se ela cair, o feed é avisado da perda de eventos (``gap``) e a
+    conexão é refeita com backoff exponencial.
+    """
+
+    def __init__(self, connect, channel: str, feed: ChangeFeed, check_interval: float,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self._connect = connect
+        self.channel = channel
+        self.feed = feed
+        self.check_interval = check_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._conn = None
+        self._fd: int | None = None
+        self._lost: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+        self._received = 0
+        self._invalid = 0
+        self._reconnects = 0
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="change-listener")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "channel": self.channel,
+            "connected": self._conn is not None,
+            "received": self._received,
+            "invalid": self._invalid,
+            "reconnects": self._reconnects,
+        }
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        connected_before = False
+        while True:
+            try:
+                self._conn = await run_blocking(self._open)
+            except Exception as e:
+                logger.warning("[CHANGES] Could not LISTEN on '%s', retrying in %.1fs: %s", self.channel, delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            delay = self.reconnect_delay
+            self._lost = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            # Guarda o descritor: com a conexão quebrada, fileno() pode falhar
+            self._fd = self._conn.fileno()
+            loop.add_reader(self._fd, self._on_readable)
+            logger.info("[CHANGES] Listening on channel '%s'", self.channel)
+            if connected_before:
+                # O que mudou enquanto a conexão estava fora não chegou aqui
+                self._reconnects += 1
+                self.feed.gap()
+            connected_before = True
+
+            try:
+                while not self._lost.is_set():
+                    try:
+                        await asyncio.wait_for(self._lost.wait(), self.check_interval)
+                    except asyncio.TimeoutError:
+                        await self._check()
+            finally:
+                self._disconnect(loop)
+
+            logger.warning("[CHANGES] Lost the LISTEN connection, events may have been missed")
+            self.feed.gap()
+
+    def _open(self):
+        conn = self._connect()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+        return conn
+
+    def _on_readable(self) -> None:
+        try:
+            self._conn.poll()
+        except psycopg2.Error as e:
+            logger.warning("[CHANGES] Error reading notifications: %s", e)
+            self._mark_lost()
+            return
+        self._drain()
+
+    async def _check(self) -> None:
+        # O SELECT roda em outra thread: sem o reader, _on_readable não chama poll() na mesma
+        # conexão ao mesmo tempo, nem consome a resposta que o ping está esperando
+        loop = asyncio.get_running_loop()
+        loop.remove_reader(self._fd)
+        try:
+            await run_blocking(self._ping)
+        except psycopg2.Error as e:
+            logger.warning("[CHANGES] LISTEN connection check failed: %s", e)
+            self._lost.set()
+            return
+        loop.add_reader(self._fd, self._on_readable)
+        # Notificações lidas junto com a resposta do SELECT ficam em conn.notifies
+        self._drain()
+
+    def _ping(self) -> None:
+        with self._conn.cursor() as cur:
+            cur.execute("SELECT 1")
+
+    def _drain(self) -> None:
+        notifies = self._conn.notifies
+        while notifies:
+            notify = notifies.pop(0)
+            try:
+                change = BookMapper.from_change_payload(loads(notify.payload))
+            except (ValueError, KeyError, TypeError) as e:
+                self._invalid += 1
+                logger.warning("[CHANGES] Ignoring invalid payload %r: %s", notify.payload, e)
+                continue
+            self._received += 1
+            self.feed.publish(change)
+
+    def _mark_lost(self) -> None:
+        # Sem o reader o loop não fica chamando _on_readable para um socket fechado
+        asyncio.get_running_loop().remove_reader(self._fd)
+        self._lost.set()
+
+    def _disconnect(self, loop: asyncio.AbstractEventLoop) -> None:
+        conn, self._conn = self._conn, None
+        loop.remove_reader(self._fd)
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+async def start_change_listener(connect, channel: str, feed: ChangeFeed, check_interval: float) -> ChangeListener:
+    """Abre o LISTEN deste worker; se o banco estiver fora, tenta de novo em segundo plano"""
+    global _listener
+    _listener = ChangeListener(connect, channel, feed, check_interval)
+    await _listener.start()
+    return _listener
+
+
+async def stop_change_listener() -> None:
+    global _listener
+    if _listener is not None:
+        await _listener.close()
+        _listener = None
+
+
+def get_change_listener() -> ChangeListener | None:
+    return _listener
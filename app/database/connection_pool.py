@@ -0,0 +1,189 @@
+import collections
+import logging
+import threading
+import time
+
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera configurado"""
+
+
+class ConnectionPool:
+    """Pool de conexões limitado e thread-safe para o psycopg2.
+
+    Mantém no mínimo ``min_size`` conexões abertas e nunca mais que ``max_size``.
+    Conexões ociosas há mais de ``max_idle`` segundos são recicladas enquanto o
+    pool estiver acima do tamanho mínimo.
+    """
+
+    def __init__(self, connect, min_size: int, max_size: int, acquire_timeout: float, max_idle: float):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+
+        self._cond = threading.Condition()
+        self._idle = collections.deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._acquired = 0
+        self._opened = 0
+        self._recycled = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def open(self) -> None:
+        logger.info("[POOL] Opening %d connections (max=%d)", self.min_size, self.max_size)
+        for _ in range(self.min_size):
+            conn = self._new_connection()
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def acquire(self, timeout: float | None = None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+
+                while self._idle:
+                    conn, _ = self._idle.pop()
+                    if conn.closed:
+                        self._size -= 1
+                        continue
+                    self._checkout(start)
+                    return conn
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    self._checkout(start)
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {timeout:.2f}s "
+                        f"(max_size={self.max_size})"
+                    )
+
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        # Um slot foi reservado: abre a conexão fora do lock para não travar as outras threads
+        try:
+            return self._new_connection()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn) -> None:
+        if not conn.closed:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                conn.close()
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    logger.warning("[POOL] Rollback failed on release, discarding connection", exc_info=True)
+                    conn.close()
+
+        to_close = []
+        with self._cond:
+            self._in_use -= 1
+            if conn.closed or self._closed:
+                self._size -= 1
+                if not conn.closed:
+                    to_close.append(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            to_close.extend(self._prune_idle())
+            self._cond.notify()
+
+        for stale in to_close:
+            stale.close()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn in idle:
+            conn.close()
+        logger.info("[POOL] Connection pool closed")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "acquired_total": self._acquired,
+                "opened_total": self._opened,
+                "recycled_total": self._recycled,
+                "timeouts_total": self._timeouts,
+                "wait_time_total_seconds": round(self._wait_time_total, 6),
+                "wait_time_max_seconds": round(self._wait_time_max, 6),
+                "wait_time_avg_seconds": round(self._wait_time_total / self._acquired, 6) if self._acquired else 0.0,
+            }
+
+    def _checkout(self, start: float) -> None:
+        waited = time.monotonic() - start
+        self._in_use += 1
+        self._acquired += 1
+        self._wait_time_total += waited
+        if waited > self._wait_time_max:
+            self._wait_time_max = waited
+
+    def _prune_idle(self) -> list:
+        """Remove as conexões ociosas há mais tempo que max_idle (as mais antigas ficam à esquerda)"""
+        stale = []
+        if not self.max_idle:
+            return stale
+
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used <= self.max_idle:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._recycled += 1
+            stale.append(conn)
+        return stale
+
+    def _new_connection(self):
+        conn = self._connect()
+        with self._cond:
+            self._opened += 1
+        logger.debug("[POOL] New database connection opened")
+        return conn
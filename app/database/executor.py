@@ -0,0 +1,45 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("threadpool", "inline")
+
+_executor: ThreadPoolExecutor | None = None
+_mode = "inline"
+
+
+def init_executor(mode: str, max_workers: int) -> None:
+    """Configura como as chamadas bloqueantes do psycopg2 são executadas.
+
+    - ``threadpool``: em um pool de threads limitado, liberando o event loop
+    - ``inline``: direto no event loop (comportamento antigo)
+    """
+    global _executor, _mode
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Invalid DB_EXECUTION_MODE '{mode}', expected one of {EXECUTION_MODES}")
+
+    _mode = mode
+    if mode == "threadpool":
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+    logger.info("[EXECUTOR] Database calls running in '%s' mode (max_workers=%d)", mode, max_workers)
+
+
+def shutdown_executor() -> None:
+    global _executor, _mode
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    _mode = "inline"
+
+
+async def run_blocking(func, *args, **kwargs):
+    if _executor is None:
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    # Leva o contexto da requisição (request id, amostragem de logs) para a thread do banco
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(context.run, func, *args, **kwargs))
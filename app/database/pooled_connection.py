@@ -0,0 +1,18 @@
+from config import borrow_connection
+from observability.request_context import deadline_var
+
+
+class PooledConnection:
+    """Conexão que ainda não foi emprestada: o BookDataProvider pega uma do pool só quando vai usá-la.
+
+    Quem recebe uma ``PooledConnection`` no lugar da conexão empresta com ``borrow()`` e
+    devolve ao terminar, então a conexão fica presa ao trabalho no banco e não à
+    requisição inteira. ``read_only`` deixa a leitura ir para uma réplica; o prazo é o
+    da requisição no momento do empréstimo (``deadline_var``).
+    """
+
+    def __init__(self, read_only: bool = False):
+        self.read_only = read_only
+
+    def borrow(self):
+        return borrow_connection(self.read_only, deadline_var.get())
@@ -0,0 +1,107 @@
+import itertools
+import logging
+import threading
+
+from database.connection_pool import ConnectionPool, PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+# Cookie com o instante (epoch) até quando as leituras do cliente ficam no primário
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+
+class ReplicaRouter:
+    """Distribui as leituras entre as réplicas saudáveis, em round-robin.
+
+    Uma thread verifica cada réplica a cada ``check_interval`` segundos com ``SELECT 1``;
+    réplicas que falham (na verificação ou ao emprestar uma conexão) saem da rotação até
+    a próxima verificação bem-sucedida; pool sem conexão livre (``PoolTimeout``) não conta
+    como falha. Sem réplica saudável, ``choose`` devolve None e a leitura vai para o primário.
+    """
+
+    def __init__(self, replicas: dict[str, ConnectionPool], check_interval: float):
+        self._replicas = replicas
+        self.check_interval = check_interval
+        self._healthy = {name: True for name in replicas}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._routed = {name: 0 for name in replicas}
+        self._failures = {name: 0 for name in replicas}
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval + 1)
+            self._thread = None
+        for pool in self._replicas.values():
+            pool.close()
+
+    def choose(self) -> tuple[str, ConnectionPool] | None:
+        with self._lock:
+            healthy = [name for name, ok in self._healthy.items() if ok]
+            if not healthy:
+                return None
+            name = healthy[next(self._counter) % len(healthy)]
+            self._routed[name] += 1
+        return name, self._replicas[name]
+
+    def mark_unhealthy(self, name: str) -> None:
+        with self._lock:
+            self._failures[name] += 1
+            if self._healthy[name]:
+                logger.warning("[REPLICA] %s marked unhealthy, reads fall back to the other replicas/primary", name)
+            self._healthy[name] = False
+
+    def check(self) -> None:
+        for name, pool in self._replicas.items():
+            try:
+                conn = pool.acquire(timeout=self.check_interval)
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                        cur.fetchone()
+                finally:
+                    pool.release(conn)
+            except PoolTimeout:
+                # Todas as conexões ocupadas: réplica sobrecarregada não é réplica fora do ar, e
+                # tirá-la da rotação só mandaria a carga dela para o primário. O estado não muda
+                logger.debug("[REPLICA] Health check skipped for %s: pool is busy", name)
+                continue
+            except Exception as e:
+                logger.debug("[REPLICA] Health check failed for %s: %s", name, e)
+                self.mark_unhealthy(name)
+                continue
+
+            with self._lock:
+                if not self._healthy[name]:
+                    logger.info("[REPLICA] %s is healthy again", name)
+                self._healthy[name] = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "healthy": self._healthy[name],
+                    "routed_total": self._routed[name],
+                    "failures_total": self._failures[name],
+                    "pool": pool.stats(),
+                }
+                for name, pool in self._replicas.items()
+            }
+
+    def healthy(self) -> dict[str, bool]:
+        with self._lock:
+            return dict(self._healthy)
+
+    def _run(self) -> None:
+        while True:
+            self.check()
+            if self._stop.wait(self.check_interval):
+                return
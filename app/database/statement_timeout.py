@@ -0,0 +1,55 @@
+import logging
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# statement_timeout (ms) configurado em cada conexão; None = padrão do servidor
+_configured: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+class DeadlineExceeded(Exception):
+    """O prazo da requisição acabou antes de a query começar"""
+
+
+def remaining_seconds(deadline: float | None) -> float | None:
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded before reaching the database")
+    return remaining
+
+
+def apply_statement_timeout(conn, deadline: float | None) -> None:
+    """Faz o Postgres cancelar qualquer query desta requisição que passe do prazo.
+
+    O valor fica na sessão (SET fora de transação), então a conexão só recebe um novo SET
+    quando o valor atual difere do tempo restante em mais de 10%: com o mesmo REQUEST_TIMEOUT,
+    a maioria das requisições reaproveita o que já está configurado, ao custo de a query
+    poder passar do prazo em até 10% dele.
+    """
+    current = _configured.get(conn)
+    remaining = remaining_seconds(deadline)
+    if remaining is None:
+        if current is None:
+            return
+        target = None
+    else:
+        target = max(1, int(remaining * 1000))
+        if current is not None and target * 0.9 <= current <= target * 1.1:
+            return
+
+    # Em autocommit o SET não abre transação e não é desfeito pelo rollback do pool
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            if target is None:
+                cur.execute("SET statement_timeout TO DEFAULT")
+            else:
+                cur.execute("SET statement_timeout = %s", (target,))
+    finally:
+        conn.autocommit = autocommit
+    _configured[conn] = target
+    logger.debug("[DATABASE] statement_timeout set to %s ms", target)
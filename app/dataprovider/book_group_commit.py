@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import psycopg2
+from config import GROUP_COMMIT_WINDOW_MS, GROUP_COMMIT_MAX_BATCH
+from domain.book import Book
+from utils.futures import fail_future
+
+logger = logging.getLogger(__name__)
+
+
+class _GroupFailed(Exception):
+    """O INSERT do grupo falhou por causa de alguma linha: cada criação é refeita sozinha"""
+
+
+class _Group:
+    __slots__ = ("books", "futures", "full")
+
+    def __init__(self):
+        self.books: list[Book] = []
+        self.futures: list[asyncio.Future] = []
+        self.full = asyncio.Event()
+
+
+class BookGroupCommit:
+    """Junta criações concorrentes em um único INSERT com várias linhas e um único COMMIT.
+
+    A primeira criação abre um grupo e espera ``window`` segundos, ou até o grupo ter
+    ``max_batch`` livros; as que chegam nesse intervalo entram nele. Quem abriu o grupo
+    grava todos com a sua storage (``create_book_group``) e entrega a cada um o livro
+    criado, então o custo do COMMIT (fsync do WAL) é pago uma vez por grupo.
+
+    As storages das rotas emprestam conexão só durante cada chamada (``PooledConnection``):
+    quem espera no grupo não ocupa o pool, e a gravação, feita em uma task própria, pega
+    e devolve a sua conexão sem depender da requisição que abriu o grupo.
+
+    - erro de uma linha (constraint, tipo, trigger): o grupo inteiro volta atrás e cada
+      criação é refeita sozinha, com a storage da própria requisição, para receber o seu
+      próprio resultado ou erro
+    - erro de conexão, pool ou prazo: é o mesmo para todos e é entregue a todos
+    - se quem abriu o grupo for cancelado antes de gravar, os outros gravam por conta
+      própria; depois de começar, a gravação vai até o fim mesmo assim
+    """
+
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max_batch
+        self._group: _Group | None = None
+        self._flushing: set[asyncio.Task] = set()
+
+        self._creates = 0
+        self._groups = 0
+        self._grouped = 0
+        self._fallbacks = 0
+        self._largest = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch > 1
+
+    async def create(self, book: Book, storage) -> Book:
+        if not self.enabled:
+            return await storage.create_book(book)
+
+        self._creates += 1
+        group = self._group
+        opened = group is None
+        if opened:
+            group = self._group = _Group()
+        future = asyncio.get_running_loop().create_future()
+        group.books.append(book)
+        group.futures.append(future)
+        if len(group.books) >= self.max_batch:
+            # Grupo cheio: criações que chegarem agora abrem outro
+            self._group = None
+            group.full.set()
+
+        if opened:
+            await self._wait_and_flush(group, storage)
+
+        try:
+            return await asyncio.shield(future)
+        except _GroupFailed:
+            self._fallbacks += 1
+            return await storage.create_book(book)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # Quem abriu o grupo foi cancelado antes de gravar: nada foi escrito
+            return await storage.create_book(book)
+
+    async def _wait_and_flush(self, group: _Group, storage) -> None:
+        try:
+            await asyncio.wait_for(group.full.wait(), self.window)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if self._group is group:
+                self._group = None
+            for pending in group.futures:
+                pending.cancel()
+            raise
+        if self._group is group:
+            self._group = None
+
+        # Em uma task própria: cancelar a requisição que abriu o grupo não deixa os outros sem resposta
+        task = asyncio.create_task(self._flush(group, storage))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush(self, group: _Group, storage) -> None:
+        books, futures = group.books, group.futures
+        try:
+            if len(books) == 1:
+                created = [await storage.create_book(books[0])]
+            else:
+                created = await storage.create_book_group(books)
+        except psycopg2.DatabaseError as e:
+            if len(books) == 1 or isinstance(e, psycopg2.OperationalError):
+                for pending in futures:
+                    fail_future(pending, e)
+                return
+            logger.warning("[DATAPROVIDER] Group insert of %s books failed, retrying one by one: %s", len(books), e)
+            for pending in futures:
+                fail_future(pending, _GroupFailed(str(e)))
+            return
+        except Exception as e:
+            for pending in futures:
+                fail_future(pending, e)
+            return
+        except BaseException:
+            # Interrompida no meio (shutdown): sem saber se gravou, ninguém tenta de novo
+            for pending in futures:
+                fail_future(pending, RuntimeError("Group commit was interrupted"))
+            raise
+
+        self._groups += 1
+        self._grouped += len(books)
+        self._largest = max(self._largest, len(books))
+        logger.debug("[DATAPROVIDER] Created %s books in one commit", len(books))
+        for pending, book in zip(futures, created):
+            if not pending.done():
+                pending.set_result(book)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "creates": self._creates,
+            "commits": self._groups,
+            "grouped_books": self._grouped,
+            "largest_group": self._largest,
+            "fallbacks": self._fallbacks,
+        }
+
+
+book_group_commit = BookGroupCommit(GROUP_COMMIT_WINDOW_MS / 1000, GROUP_COMMIT_MAX_BATCH)
@@ -1,184 +1,646 @@
 from fastapi import HTTPException
-from config import connection_db
+from config import connection_db, CHANGE_FEED_ENABLED, CHANGE_FEED_CHANNEL
+from database.executor import run_blocking
+from database.pooled_connection import PooledConnection
+from observability.metrics import observe_query, db_commit_seconds
+from observability.request_context import timed
 from domain.book import Book
+from domain.book_change import BookChange
+from domain.book_filters import BookFilters
+from domain.book_stats import BookStats
 from mapper.book_mapper import BookMapper
-from psycopg2.extras import RealDictCursor
+from psycopg2 import errors, sql
+from psycopg2.extras import execute_values
+from serialization.json_codec import dumps
+from typing import AsyncIterator
+import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+BOOK_COLUMNS = ", ".join(BookMapper.COLUMNS)
+
 class BookDataProvider:
+    """Acesso ao Postgres.
+
+    Os métodos públicos são assíncronos e delegam o trabalho bloqueante do psycopg2
+    para ``run_blocking``, que executa no pool de threads do banco (DB_EXECUTION_MODE).
+    """
+
+    @timed("dataprovider")
     async def create_book(conn: connection_db, book: Book) -> Book:
-        logger.info("[DATAPROVIDER] Starting database operation")
-        logger.debug(f"[DATAPROVIDER] Book to insert: {book}")
+        return await BookDataProvider._run(BookDataProvider._create_book, conn, book)
+
+    @timed("dataprovider")
+    async def create_books(conn: connection_db, books: list[Book], batch_size: int) -> list[int]:
+        return await BookDataProvider._run(BookDataProvider._create_books, conn, books, batch_size)
+
+    @timed("dataprovider")
+    async def create_book_group(conn: connection_db, books: list[Book]) -> list[Book]:
+        return await BookDataProvider._run(BookDataProvider._create_book_group, conn, books)
+
+    @timed("dataprovider")
+    async def get_book_by_id(conn: connection_db, book_id: int) -> Book:
+        return await BookDataProvider._run(BookDataProvider._get_book_by_id, conn, book_id)
+
+    @timed("dataprovider")
+    async def get_books_by_ids(conn: connection_db, ids: list[int]) -> list[Book]:
+        return await BookDataProvider._run(BookDataProvider._get_books_by_ids, conn, ids)
+
+    @timed("dataprovider")
+    async def get_books(conn: connection_db, limit: int, offset: int, after_id: int | None = None,
+                        count_mode: str = "exact",
+                        filters: BookFilters | None = None) -> tuple[list[Book], int | None, bool]:
+        return await BookDataProvider._run(BookDataProvider._get_books, conn, limit, offset, after_id, count_mode, filters)
+
+    async def iter_books(conn: connection_db, chunk_size: int,
+                         updated_since: datetime.datetime | None = None) -> AsyncIterator[list[Book]]:
+        """Percorre a tabela inteira em blocos de ``chunk_size`` usando um cursor do lado do servidor.
+
+        Com uma ``PooledConnection`` o gerador empresta a sua própria conexão e a devolve no
+        mesmo ``finally`` que fecha o cursor: se o cliente desconectar e o gerador só for
+        finalizado depois, o rollback não cai em uma conexão que já voltou ao pool.
+        """
+        borrowed = conn.borrow() if isinstance(conn, PooledConnection) else None
+        if borrowed is not None:
+            conn = await run_blocking(borrowed.__enter__)
+        try:
+            cur = await run_blocking(BookDataProvider._open_export_cursor, conn, updated_since)
+            try:
+                while True:
+                    rows = await run_blocking(BookDataProvider._fetch_export_chunk, cur, chunk_size)
+                    if not rows:
+                        break
+                    yield [BookMapper.to_domain(row) for row in rows]
+            finally:
+                await run_blocking(BookDataProvider._close_export_cursor, conn, cur)
+        finally:
+            if borrowed is not None:
+                await run_blocking(borrowed.__exit__, None, None, None)
+
+    @timed("dataprovider")
+    async def update_book(conn: connection_db, book_id: int, fields: dict,
+                          expected_updated_in: datetime.datetime | None = None) -> Book:
+        return await BookDataProvider._run(BookDataProvider._update_book, conn, book_id, fields, expected_updated_in)
+
+    @timed("dataprovider")
+    async def adjust_stock(conn: connection_db, book_id: int, delta: int) -> Book:
+        return await BookDataProvider._run(BookDataProvider._adjust_stock, conn, book_id, delta)
+
+    @timed("dataprovider")
+    async def delete_book(conn: connection_db, book_id: int) -> None:
+        return await BookDataProvider._run(BookDataProvider._delete_book, conn, book_id)
+
+    @timed("dataprovider")
+    async def get_stats(conn: connection_db, limit: int) -> BookStats:
+        return await BookDataProvider._run(BookDataProvider._get_stats, conn, limit)
+
+    @timed("dataprovider")
+    async def rebuild_stats(conn: connection_db, dry_run: bool = False) -> int:
+        return await BookDataProvider._run(BookDataProvider._rebuild_stats, conn, dry_run)
+
+    @observe_query("create_book")
+    def _create_book(conn: connection_db, book: Book) -> Book:
+        logger.debug("[DATAPROVIDER] Starting database operation")
+        logger.debug("[DATAPROVIDER] Book to insert: %s", book)
 
         data = BookMapper.to_dict(book)
-        logger.debug(f"[DATAPROVIDER] Data prepared for insertion: {data}")
-        
-        query = """
+        logger.debug("[DATAPROVIDER] Data prepared for insertion: %s", data)
+
+        query = f"""
         INSERT INTO public.books (
-        title, author, publisher, publication_year, gender, 
+        title, author, publisher, publication_year, gender,
         quantity_copies, available, updated_in)
         VALUES (
-        %(title)s, %(author)s, %(publisher)s, %(publication_year)s, %(gender)s, %(quantity_copies)s, 
+        %(title)s, %(author)s, %(publisher)s, %(publication_year)s, %(gender)s, %(quantity_copies)s,
         %(available)s, %(updated_in)s
-        ) RETURNING *
+        ) RETURNING {BOOK_COLUMNS}
         """
 
-        cur = None
         try:
-            logger.info("[DATAPROVIDER] Executing INSERT query")
+            logger.debug("[DATAPROVIDER] Executing INSERT query")
 
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute(query, data)
-            row = cur.fetchone()
-            logger.info(f"[DATAPROVIDER] Row inserted with ID: {row['id']}")
-            
-            conn.commit()
-            logger.info("[DATAPROVIDER] Transaction committed")
-            
-            cur.close()
-            
-            result = BookMapper.to_domain(row)
-            logger.info("[DATAPROVIDER] Database operation completed successfully")
+            with conn.cursor() as cur:
+                cur.execute(query, data)
+                row = cur.fetchone()
+                result = BookMapper.to_domain(row)
+                BookDataProvider._notify(cur, [BookChange(result.id, "create", result.updated_in)])
+            logger.debug("[DATAPROVIDER] Row inserted with ID: %s", result.id)
+
+            BookDataProvider._commit(conn)
+            logger.debug("[DATAPROVIDER] Transaction committed")
+
+            logger.debug("[DATAPROVIDER] Database operation completed successfully")
             return result
-            
+
         except Exception as e:
-            logger.error(f"[DATAPROVIDER] Database error: {str(e)}", exc_info=True)
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
             conn.rollback()
             logger.warning("[DATAPROVIDER] Transaction rolled back")
             raise
 
-    async def get_book_by_id(conn: connection_db, book_id: int) -> Book:
-        logger.info(f"[DATAPROVIDER] Fetching book with ID: {book_id}")
+    @observe_query("create_books")
+    def _create_books(conn: connection_db, books: list[Book], batch_size: int) -> list[int]:
+        logger.debug("[DATAPROVIDER] Starting bulk insert of %s books (batch size %s)", len(books), batch_size)
+
+        query = """
+        INSERT INTO public.books (
+        title, author, publisher, publication_year, gender,
+        quantity_copies, available, updated_in)
+        VALUES %s
+        RETURNING id
+        """
+        rows = [
+            (book.title, book.author, book.publisher, book.publication_year, book.gender,
+             book.quantity_copies, book.available, book.updated_in)
+            for book in books
+        ]
 
-        query = "SELECT * FROM public.books WHERE id = %s"
-        
         try:
-            logger.info("[DATAPROVIDER] Executing SELECT query")
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute(query, (book_id,))
-            
-            row = cur.fetchone()
+            logger.debug("[DATAPROVIDER] Executing multi-row INSERT query")
+
+            # Um INSERT com várias linhas por lote, todos os lotes na mesma transação
+            with conn.cursor() as cur:
+                inserted = execute_values(cur, query, rows, page_size=batch_size, fetch=True)
+                ids = [row[0] for row in inserted]
+                BookDataProvider._notify(cur, [
+                    BookChange(book_id, "create", book.updated_in) for book_id, book in zip(ids, books)
+                ])
+
+            BookDataProvider._commit(conn)
+            logger.debug("[DATAPROVIDER] Transaction committed")
+
+            logger.debug("[DATAPROVIDER] Bulk insert completed successfully: %s rows", len(ids))
+            return ids
+
+        except Exception as e:
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
+            conn.rollback()
+            logger.warning("[DATAPROVIDER] Transaction rolled back")
+            raise
+
+    @observe_query("create_book_group")
+    def _create_book_group(conn: connection_db, books: list[Book]) -> list[Book]:
+        logger.debug("[DATAPROVIDER] Starting group insert of %s books", len(books))
+
+        query = f"""
+        INSERT INTO public.books (
+        title, author, publisher, publication_year, gender,
+        quantity_copies, available, updated_in)
+        VALUES %s
+        RETURNING {BOOK_COLUMNS}
+        """
+        rows = [
+            (book.title, book.author, book.publisher, book.publication_year, book.gender,
+             book.quantity_copies, book.available, book.updated_in)
+            for book in books
+        ]
+
+        try:
+            logger.debug("[DATAPROVIDER] Executing multi-row INSERT query")
+
+            # Um único comando (page_size = tamanho do grupo): o RETURNING volta na ordem do VALUES
+            with conn.cursor() as cur:
+                inserted = execute_values(cur, query, rows, page_size=len(rows), fetch=True)
+                result = [BookMapper.to_domain(row) for row in inserted]
+                BookDataProvider._notify(cur, [BookChange(book.id, "create", book.updated_in) for book in result])
+
+            BookDataProvider._commit(conn)
+            logger.debug("[DATAPROVIDER] Transaction committed")
+
+            logger.debug("[DATAPROVIDER] Group insert completed successfully: %s rows", len(result))
+            return result
+
+        except Exception as e:
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
+            conn.rollback()
+            logger.warning("[DATAPROVIDER] Transaction rolled back")
+            raise
+
+    @observe_query("get_book_by_id")
+    def _get_book_by_id(conn: connection_db, book_id: int) -> Book:
+        logger.debug("[DATAPROVIDER] Fetching book with ID: %s", book_id)
+
+        query = f"SELECT {BOOK_COLUMNS} FROM public.books WHERE id = %s"
+
+        try:
+            logger.debug("[DATAPROVIDER] Executing SELECT query")
+            with conn.cursor() as cur:
+                cur.execute(query, (book_id,))
+                row = cur.fetchone()
+
             if row is None:
-                error_msg = f"Book with ID {book_id} not found"
                 error_msg = f"Book with ID {book_id} does not exist"
                 raise HTTPException(status_code=404, detail=error_msg)
-            
-            logger.info(f"[DATAPROVIDER] Book fetched: ID={row['id']}, Title={row['title']}")
-            cur.close()
-            
+
             result = BookMapper.to_domain(row)
-            logger.info("[DATAPROVIDER] Book retrieval completed successfully")
+            logger.debug("[DATAPROVIDER] Book fetched: ID=%s, Title=%s", result.id, result.title)
+            logger.debug("[DATAPROVIDER] Book retrieval completed successfully")
             return result
-            
+
+        except HTTPException as e:
+            logger.debug("[DATAPROVIDER] Book ID %s not fetched: %s", book_id, e.detail)
+            raise
         except Exception as e:
-            logger.error(f"[DATAPROVIDER] Database error: {str(e)}", exc_info=True)
-            raise    
-
-    async def get_books(conn: connection_db, limit: int, offset: int) -> tuple[list[Book], int]:
-        logger.info("[DATAPROVIDER] Fetching list of books")
-        
-        query = "SELECT * FROM public.books ORDER BY id LIMIT %s OFFSET %s"
-        count_query = "SELECT COUNT(*) FROM public.books"
-        
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
+            raise
+
+    @observe_query("get_books_by_ids")
+    def _get_books_by_ids(conn: connection_db, ids: list[int]) -> list[Book]:
+        logger.debug("[DATAPROVIDER] Fetching %s books by ID", len(ids))
+
+        # Uma única query para todos os ids; os que não existem simplesmente não voltam
+        query = f"SELECT {BOOK_COLUMNS} FROM public.books WHERE id = ANY(%s)"
+
         try:
-            logger.info("[DATAPROVIDER] Executing COUNT query")
-
-            cur = conn.cursor()
-
-            cur.execute(count_query)
-            total_count = cur.fetchone()[0]
-            logger.info(f"[DATAPROVIDER] Total books count: {total_count}")
-            
-            logger.info("[DATAPROVIDER] Executing SELECT query for books list")
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute(query, (limit, offset))
-            
-            rows = cur.fetchall()
-            logger.info(f"[DATAPROVIDER] {len(rows)} books fetched")
-            cur.close()
-            
+            with conn.cursor() as cur:
+                cur.execute(query, (list(ids),))
+                rows = cur.fetchall()
+
+            logger.debug("[DATAPROVIDER] %s of %s books found", len(rows), len(ids))
+            return [BookMapper.to_domain(row) for row in rows]
+
+        except Exception as e:
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
+            raise
+
+    def _run(func, conn, *args):
+        """Roda ``func(conn, *args)`` no pool de threads do banco.
+
+        Com uma ``PooledConnection`` a conexão é emprestada na própria thread, só pelo tempo
+        da chamada: cache hits, buscas agrupadas pelo BookLoader e criações à espera do group
+        commit não seguram conexão do pool.
+        """
+        if isinstance(conn, PooledConnection):
+            return run_blocking(BookDataProvider._borrowing, func, conn, *args)
+        return run_blocking(func, conn, *args)
+
+    def _borrowing(func, source: PooledConnection, *args):
+        with source.borrow() as conn:
+            return func(conn, *args)
+
+    def _commit(conn: connection_db) -> None:
+        with db_commit_seconds.time():
+            conn.commit()
+
+    def _notify(cur, changes: list[BookChange]) -> None:
+        """Publica as mudanças no canal do change feed, na mesma transação da escrita.
+
+        O Postgres só entrega o NOTIFY no COMMIT (e descarta no rollback), então os
+        ouvintes nunca veem uma mudança que não foi gravada. Um único SELECT para o lote.
+        """
+        if not CHANGE_FEED_ENABLED or not changes:
+            return
+        payloads = [dumps(BookMapper.to_change_payload(change)).decode() for change in changes]
+        cur.execute("SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+                    (CHANGE_FEED_CHANNEL, payloads))
+
+    def _filter_clause(filters: BookFilters | None) -> tuple[list[str], list]:
+        """Monta as condições do WHERE para os filtros informados (colunas fixas, valores como parâmetros)"""
+        conditions = []
+        params = []
+        if filters is None:
+            return conditions, params
+
+        # Igualdade: índices B-tree (coluna, id), que também atendem ao ORDER BY id da paginação
+        for column in ('author', 'publisher', 'gender', 'publication_year'):
+            value = getattr(filters, column)
+            if value is not None:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+
+        # Busca por trecho: índices trigram (pg_trgm) em title e author
+        if filters.title is not None:
+            conditions.append("title ILIKE %s")
+            params.append(BookDataProvider._contains_pattern(filters.title))
+        if filters.q is not None:
+            pattern = BookDataProvider._contains_pattern(filters.q)
+            conditions.append("(title ILIKE %s OR author ILIKE %s)")
+            params.extend((pattern, pattern))
+
+        return conditions, params
+
+    def _contains_pattern(text: str) -> str:
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"%{escaped}%"
+
+    def _list_query(limit: int, offset: int, after_id: int | None = None,
+                    filters: BookFilters | None = None) -> tuple[str, list]:
+        conditions, params = BookDataProvider._filter_clause(filters)
+
+        # Busca um registro a mais para saber se existe próxima página sem precisar do COUNT
+        if after_id is not None:
+            conditions.append("id > %s")
+            params.append(after_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        query = f"SELECT {BOOK_COLUMNS} FROM public.books{where} ORDER BY id LIMIT %s"
+        params.append(limit + 1)
+        if after_id is None:
+            query += " OFFSET %s"
+            params.append(offset)
+        return query, params
+
+    @observe_query("get_books")
+    def _get_books(conn: connection_db, limit: int, offset: int, after_id: int | None = None,
+                   count_mode: str = "exact", filters: BookFilters | None = None) -> tuple[list[Book], int | None, bool]:
+        logger.debug("[DATAPROVIDER] Fetching list of books (filters=%s)", filters)
+
+        query, params = BookDataProvider._list_query(limit, offset, after_id, filters)
+
+        try:
+            total_count = BookDataProvider._count_books(conn, count_mode, filters)
+            logger.debug("[DATAPROVIDER] Total books count (%s): %s", count_mode, total_count)
+
+            logger.debug("[DATAPROVIDER] Executing SELECT query for books list")
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                rows = cur.fetchall()
+
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            logger.debug("[DATAPROVIDER] %s books fetched", len(rows))
+
             books = [BookMapper.to_domain(row) for row in rows]
-            logger.info("[DATAPROVIDER] Books list retrieval completed successfully")
-            return books, total_count
-            
+            logger.debug("[DATAPROVIDER] Books list retrieval completed successfully")
+            return books, total_count, has_more
+
         except Exception as e:
-            logger.error(f"[DATAPROVIDER] Database error: {str(e)}", exc_info=True)
-            raise    
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
+            raise
 
-    async def update_book(conn: connection_db, book: Book) -> Book:
-        book_id = book.id 
-        logger.info(f"[DATAPROVIDER] Updating book with ID: {book_id}")
+    def _count_books(conn: connection_db, count_mode: str, filters: BookFilters | None = None) -> int | None:
+        if count_mode == "none":
+            return None
 
-        data = BookMapper.to_dict(book)
+        conditions, params = BookDataProvider._filter_clause(filters)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with conn.cursor() as cur:
+            if count_mode == "estimated":
+                if conditions:
+                    # Com filtros, usa a estimativa de linhas do plano da query
+                    cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM public.books{where}", params)
+                    return int(cur.fetchone()[0][0]["Plan"]["Plan Rows"])
+
+                # Estimativa do planner (atualizada pelo autovacuum/ANALYZE), sem varrer a tabela
+                cur.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = 'public.books'::regclass")
+                estimate = cur.fetchone()[0]
+                if estimate >= 0:
+                    return estimate
+                logger.debug("[DATAPROVIDER] Table never analyzed, falling back to exact count")
+
+            logger.debug("[DATAPROVIDER] Executing COUNT query")
+            cur.execute(f"SELECT COUNT(*) FROM public.books{where}", params)
+            return cur.fetchone()[0]
+
+    @observe_query("export_open")
+    def _open_export_cursor(conn: connection_db, updated_since: datetime.datetime | None):
+        logger.debug("[DATAPROVIDER] Opening export cursor (updated_since=%s)", updated_since)
+
+        if updated_since is not None:
+            query = f"SELECT {BOOK_COLUMNS} FROM public.books WHERE updated_in >= %s ORDER BY id"
+            params = (updated_since,)
+        else:
+            query = f"SELECT {BOOK_COLUMNS} FROM public.books ORDER BY id"
+            params = None
+
+        # Cursor nomeado: as linhas ficam no servidor e são buscadas aos poucos com fetchmany
+        cur = conn.cursor(name="books_export")
+        try:
+            cur.execute(query, params)
+        except Exception as e:
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
+            conn.rollback()
+            raise
+        return cur
+
+    @observe_query("export_fetch")
+    def _fetch_export_chunk(cur, chunk_size: int) -> list[tuple]:
+        return cur.fetchmany(chunk_size)
+
+    def _close_export_cursor(conn: connection_db, cur) -> None:
+        try:
+            cur.close()
+        finally:
+            # A exportação é só leitura: encerra a transação aberta pelo cursor nomeado
+            conn.rollback()
+        logger.debug("[DATAPROVIDER] Export cursor closed")
+
+    @observe_query("update_book")
+    def _update_book(conn: connection_db, book_id: int, fields: dict,
+                     expected_updated_in: datetime.datetime | None = None) -> Book:
+        logger.debug("[DATAPROVIDER] Updating book with ID: %s", book_id)
+
+        unknown = set(fields) - set(BookMapper.UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Fields cannot be updated: {sorted(unknown)}")
+
+        if not fields:
+            # Nada para alterar: só confere a versão e devolve o livro atual
+            book = BookDataProvider._get_book_by_id(conn, book_id)
+            if expected_updated_in is not None and book.updated_in != expected_updated_in:
+                raise HTTPException(status_code=412, detail=f"Book with ID {book_id} was modified by another request")
+            return book
+
+        data = dict(fields)
+        data['updated_in'] = datetime.datetime.now()
         data['id'] = book_id
-        logger.debug(f"[DATAPROVIDER] Data prepared for update: {data}")
-        
-        query = """
-        UPDATE public.books SET
-        title = %(title)s,
-        author = %(author)s,
-        publisher = %(publisher)s,
-        publication_year = %(publication_year)s,
-        gender = %(gender)s,
-        quantity_copies = %(quantity_copies)s,
-        available = %(available)s,
-        updated_in = %(updated_in)s
-        WHERE id = %(id)s
-        RETURNING *
+        data['expected_updated_in'] = expected_updated_in
+        logger.debug("[DATAPROVIDER] Data prepared for update: %s", data)
+
+        # Só as colunas enviadas no PATCH; updated_in muda sempre e serve de versão do registro
+        assignments = sql.SQL(", ").join(
+            sql.SQL("{} = {}").format(sql.Identifier(field), sql.Placeholder(field))
+            for field in [*fields, 'updated_in']
+        )
+        query = sql.SQL("UPDATE public.books SET {} WHERE id = %(id)s").format(assignments)
+        if expected_updated_in is not None:
+            query += sql.SQL(" AND updated_in = %(expected_updated_in)s")
+        query += sql.SQL(" RETURNING " + BOOK_COLUMNS)
+
+        try:
+            logger.debug("[DATAPROVIDER] Executing UPDATE query")
+
+            with conn.cursor() as cur:
+                cur.execute(query, data)
+                row = cur.fetchone()
+
+                if row is None:
+                    # Só no caminho de falha: descobre se o livro não existe ou se a versão mudou
+                    cur.execute("SELECT 1 FROM public.books WHERE id = %s", (book_id,))
+                    if expected_updated_in is not None and cur.fetchone() is not None:
+                        error_msg = f"Book with ID {book_id} was modified by another request"
+                        raise HTTPException(status_code=412, detail=error_msg)
+                    error_msg = f"Book with ID {book_id} not found for update"
+                    raise HTTPException(status_code=404, detail=error_msg)
+
+                result = BookMapper.to_domain(row)
+                BookDataProvider._notify(cur, [BookChange(result.id, "update", result.updated_in)])
+
+            logger.debug("[DATAPROVIDER] Book updated: ID=%s, Title=%s", result.id, result.title)
+            BookDataProvider._commit(conn)
+            logger.debug("[DATAPROVIDER] Transaction committed")
+
+            logger.debug("[DATAPROVIDER] Book update completed successfully")
+            return result
+
+        except HTTPException as e:
+            conn.rollback()
+            logger.debug("[DATAPROVIDER] Book ID %s not updated: %s", book_id, e.detail)
+            raise
+        except Exception as e:
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
+            conn.rollback()
+            logger.warning("[DATAPROVIDER] Transaction rolled back")
+            raise
+
+    @observe_query("adjust_stock")
+    def _adjust_stock(conn: connection_db, book_id: int, delta: int) -> Book:
+        logger.debug("[DATAPROVIDER] Adjusting stock of book ID %s by %s", book_id, delta)
+
+        # Lê e grava na mesma instrução: a condição do WHERE é reavaliada sobre a versão
+        # travada da linha, então checkouts concorrentes nunca deixam o estoque negativo
+        query = f"""
+        UPDATE public.books
+        SET quantity_copies = quantity_copies + %(delta)s,
+            available = quantity_copies + %(delta)s > 0,
+            updated_in = %(updated_in)s
+        WHERE id = %(id)s AND quantity_copies + %(delta)s >= 0
+        RETURNING {BOOK_COLUMNS}
         """
+        data = {'id': book_id, 'delta': delta, 'updated_in': datetime.datetime.now()}
 
         try:
-            logger.info("[DATAPROVIDER] Executing UPDATE query")
+            logger.debug("[DATAPROVIDER] Executing conditional UPDATE query")
 
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute(query, data)
-            row = cur.fetchone()
-            if row is None:
-                error_msg = f"Book with ID {book_id} not found for update"
-                raise HTTPException(status_code=404, detail=error_msg)
-            
-            logger.info(f"[DATAPROVIDER] Book updated: ID={row['id']}, Title={row['title']}")
-            conn.commit()
-            logger.info("[DATAPROVIDER] Transaction committed")
-            
-            cur.close()
-            
-            result = BookMapper.to_domain(row)
-            logger.info("[DATAPROVIDER] Book update completed successfully")
+            with conn.cursor() as cur:
+                cur.execute(query, data)
+                row = cur.fetchone()
+
+                if row is None:
+                    # Só no caminho de falha: descobre se o livro não existe ou se faltou estoque
+                    cur.execute("SELECT quantity_copies FROM public.books WHERE id = %s", (book_id,))
+                    current = cur.fetchone()
+                    if current is None:
+                        raise HTTPException(status_code=404, detail=f"Book with ID {book_id} does not exist")
+                    error_msg = f"Book with ID {book_id} has {current[0]} copies, cannot check out {-delta}"
+                    raise HTTPException(status_code=409, detail=error_msg)
+
+                result = BookMapper.to_domain(row)
+                BookDataProvider._notify(cur, [BookChange(result.id, "update", result.updated_in)])
+
+            BookDataProvider._commit(conn)
+            logger.debug("[DATAPROVIDER] Stock of book ID %s is now %s", book_id, result.quantity_copies)
             return result
-            
+
+        except HTTPException as e:
+            conn.rollback()
+            logger.debug("[DATAPROVIDER] Stock of book ID %s not changed: %s", book_id, e.detail)
+            raise
         except Exception as e:
-            logger.error(f"[DATAPROVIDER] Database error: {str(e)}", exc_info=True)
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
             conn.rollback()
             logger.warning("[DATAPROVIDER] Transaction rolled back")
-            raise 
+            raise
 
-    async def delete_book(conn: connection_db, book_id: int) -> None:
-        logger.info(f"[DATAPROVIDER] Deleting book with ID: {book_id}")
+    @observe_query("delete_book")
+    def _delete_book(conn: connection_db, book_id: int) -> None:
+        logger.debug("[DATAPROVIDER] Deleting book with ID: %s", book_id)
+
+        query = "DELETE FROM public.books WHERE id = %s RETURNING id"
 
-        query = "DELETE FROM public.books WHERE id = %s RETURNING *"
-        
         try:
-            logger.info("[DATAPROVIDER] Executing DELETE query")
+            logger.debug("[DATAPROVIDER] Executing DELETE query")
 
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute(query, (book_id,))
-            row = cur.fetchone()
-            if row is None:
-                error_msg = f"Book with ID {book_id} not found for deletion"
-                raise HTTPException(status_code=404, detail=error_msg)
-            
-            logger.info(f"[DATAPROVIDER] Book deleted: ID={row['id']}, Title={row['title']}")
-            conn.commit()
-            logger.info("[DATAPROVIDER] Transaction committed")
-            
-            cur.close()
-            logger.info("[DATAPROVIDER] Book deletion completed successfully")
-            
+            with conn.cursor() as cur:
+                cur.execute(query, (book_id,))
+                row = cur.fetchone()
+
+                if row is None:
+                    error_msg = f"Book with ID {book_id} not found for deletion"
+                    raise HTTPException(status_code=404, detail=error_msg)
+                BookDataProvider._notify(cur, [BookChange(book_id, "delete", datetime.datetime.now())])
+
+            logger.debug("[DATAPROVIDER] Book deleted: ID=%s", row[0])
+            BookDataProvider._commit(conn)
+            logger.debug("[DATAPROVIDER] Transaction committed")
+            logger.debug("[DATAPROVIDER] Book deletion completed successfully")
+
+        except HTTPException as e:
+            conn.rollback()
+            logger.debug("[DATAPROVIDER] Book ID %s not deleted: %s", book_id, e.detail)
+            raise
         except Exception as e:
-            logger.error(f"[DATAPROVIDER] Database error: {str(e)}", exc_info=True)
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
             conn.rollback()
             logger.warning("[DATAPROVIDER] Transaction rolled back")
-            raise       
\ No newline at end of file
+            raise
+
+    @observe_query("get_stats")
+    def _get_stats(conn: connection_db, limit: int) -> BookStats:
+        logger.debug("[DATAPROVIDER] Fetching catalog statistics")
+
+        # Total e gêneros: poucas linhas, somadas entre as fatias (shards) de cada contador
+        summary_query = """
+        SELECT dimension, value, sum(books), sum(copies), sum(available_books)
+        FROM public.books_stats
+        WHERE dimension IN ('total', 'gender')
+        GROUP BY dimension, value
+        """
+        # Autores e editoras ficam numa fatia só: os maiores vêm direto do índice (dimension, books DESC, value)
+        top_query = """
+        SELECT value, books, copies, available_books
+        FROM public.books_stats
+        WHERE dimension = %s AND books > 0
+        ORDER BY books DESC, value
+        LIMIT %s
+        """
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(summary_query)
+                summary = cur.fetchall()
+                cur.execute(top_query, ('author', limit))
+                authors = cur.fetchall()
+                cur.execute(top_query, ('publisher', limit))
+                publishers = cur.fetchall()
+
+            logger.debug("[DATAPROVIDER] Catalog statistics fetched")
+            return BookMapper.to_stats(summary, authors, publishers)
+
+        except errors.UndefinedTable:
+            error_msg = "Catalog statistics are not installed, apply migrations/002_books_stats.sql"
+            raise HTTPException(status_code=503, detail=error_msg)
+        except Exception as e:
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
+            raise
+
+    @observe_query("rebuild_stats")
+    def _rebuild_stats(conn: connection_db, dry_run: bool = False) -> int:
+        logger.info("[DATAPROVIDER] %s catalog statistics", "Checking" if dry_run else "Rebuilding")
+
+        try:
+            with conn.cursor() as cur:
+                if dry_run:
+                    # Só compara: o agregado completo de public.books contra os contadores
+                    cur.execute("SELECT count(*) FROM public.books_stats_drift")
+                else:
+                    cur.execute("SELECT public.books_stats_rebuild()")
+                drifted = cur.fetchone()[0]
+
+            if dry_run:
+                conn.rollback()
+            else:
+                BookDataProvider._commit(conn)
+                logger.debug("[DATAPROVIDER] Transaction committed")
+
+            logger.info("[DATAPROVIDER] %s statistics groups had drifted", drifted)
+            return drifted
+
+        except Exception as e:
+            logger.error("[DATAPROVIDER] Database error: %s", e, exc_info=True)
+            conn.rollback()
+            logger.warning("[DATAPROVIDER] Transaction rolled back")
+            raise
+
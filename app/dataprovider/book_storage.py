@@ -0,0 +1,69 @@
+from abc import ABC, abstractmethod
+from domain.book import Book
+from domain.book_filters import BookFilters
+from domain.book_stats import BookStats
+from typing import AsyncIterator
+import datetime
+
+STORAGE_BACKENDS = ("postgres", "memory")
+
+
+class BookStorage(ABC):
+    """Interface de armazenamento usada pelo BookService.
+
+    As implementações seguem a mesma semântica do Postgres: ids crescentes, listagem
+    ordenada por id (offset ou keyset via ``after_id``), HTTPException 404 para livro
+    inexistente e 412 quando ``expected_updated_in`` não confere.
+    """
+
+    @abstractmethod
+    async def create_book(self, book: Book) -> Book:
+        ...
+
+    @abstractmethod
+    async def create_books(self, books: list[Book], batch_size: int) -> list[int]:
+        ...
+
+    @abstractmethod
+    async def create_book_group(self, books: list[Book]) -> list[Book]:
+        """Grava os livros em um único comando e uma única transação; devolve as linhas criadas na mesma ordem"""
+
+    @abstractmethod
+    async def get_book_by_id(self, book_id: int) -> Book:
+        ...
+
+    @abstractmethod
+    async def get_books_by_ids(self, ids: list[int]) -> list[Book]:
+        """Devolve os livros encontrados, em qualquer ordem; ids inexistentes são omitidos"""
+
+    @abstractmethod
+    async def get_books(self, limit: int, offset: int, after_id: int | None = None,
+                        count_mode: str = "exact",
+                        filters: BookFilters | None = None) -> tuple[list[Book], int | None, bool]:
+        """Devolve (livros da página, total conforme ``count_mode``, se existe próxima página)"""
+
+    @abstractmethod
+    def iter_books(self, chunk_size: int,
+                   updated_since: datetime.datetime | None = None) -> AsyncIterator[list[Book]]:
+        """Percorre todos os livros em ordem de id, em blocos de até ``chunk_size``"""
+
+    @abstractmethod
+    async def update_book(self, book_id: int, fields: dict,
+                          expected_updated_in: datetime.datetime | None = None) -> Book:
+        ...
+
+    @abstractmethod
+    async def adjust_stock(self, book_id: int, delta: int) -> Book:
+        """Soma ``delta`` a quantity_copies de forma atômica; HTTPException 409 se ficaria negativo"""
+
+    @abstractmethod
+    async def delete_book(self, book_id: int) -> None:
+        ...
+
+    @abstractmethod
+    async def get_stats(self, limit: int) -> BookStats:
+        """Totais e agregados por gênero, autor e editora (os ``limit`` maiores), sem varrer os livros"""
+
+    @abstractmethod
+    async def rebuild_stats(self, dry_run: bool = False) -> int:
+        """Recalcula as estatísticas a partir dos livros; devolve quantos grupos estavam divergentes"""
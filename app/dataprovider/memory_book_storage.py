@@ -0,0 +1,357 @@
+from array import array
+from fastapi import HTTPException
+from config import CHANGE_FEED_ENABLED
+from dataprovider.book_storage import BookStorage
+from domain.book import Book
+from domain.book_change import BookChange
+from events.change_feed import change_feed
+from domain.book_filters import BookFilters
+from domain.book_stats import STATS_DIMENSIONS, BookStats, StatsGroup
+from mapper.book_mapper import BookMapper
+from observability.request_context import timed
+from typing import AsyncIterator
+import bisect
+import datetime
+import heapq
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Posição de cada coluna na tupla armazenada (mesma ordem de BookMapper.COLUMNS)
+POSITION = {column: index for index, column in enumerate(BookMapper.COLUMNS)}
+
+# Colunas com índice secundário (valor -> ids em ordem), as mesmas filtradas por igualdade no Postgres
+INDEXED_COLUMNS = ('author', 'publisher', 'gender', 'publication_year')
+
+# Colunas de texto muito repetidas: strings internadas para guardar uma única cópia de cada valor
+INTERNED_COLUMNS = ('author', 'publisher', 'gender')
+
+_EMPTY = array('q')
+
+
+class InMemoryBookStorage(BookStorage):
+    """Armazenamento em memória, com a mesma semântica do Postgres.
+
+    Cada livro é uma tupla na ordem de COLUMNS, indexada por id em um dict. A ordem da
+    listagem vem de um ``array('q')`` de ids crescentes (8 bytes por livro), percorrido
+    com ``bisect`` para keyset. Os filtros de igualdade usam arrays de ids por valor e
+    title/q são avaliados sobre os candidatos, como o Postgres faria com os índices.
+
+    Todas as operações rodam no event loop, sem pontos de espera no meio de uma escrita,
+    então não precisam de lock. As escritas publicam direto no change feed do processo,
+    no lugar do NOTIFY do Postgres, e atualizam os contadores das estatísticas (o papel
+    dos triggers da migração 002).
+    """
+
+    def __init__(self):
+        self._rows: dict[int, tuple] = {}
+        self._ids = array('q')
+        self._indexes: dict[str, dict[object, array]] = {column: {} for column in INDEXED_COLUMNS}
+        # (dimensão, valor) -> [livros, exemplares, livros disponíveis]
+        self._stats: dict[tuple[str, str], list[int]] = {}
+        self._next_id = 1
+
+    @timed("dataprovider")
+    async def create_book(self, book: Book) -> Book:
+        row = self._insert(book)
+        self._publish(row[0], "create", row[POSITION['updated_in']])
+        logger.debug("[DATAPROVIDER] Book stored in memory with ID: %s", row[0])
+        return BookMapper.to_domain(row)
+
+    @timed("dataprovider")
+    async def create_books(self, books: list[Book], batch_size: int) -> list[int]:
+        ids = [self._insert(book)[0] for book in books]
+        for book_id, book in zip(ids, books):
+            self._publish(book_id, "create", book.updated_in)
+        logger.debug("[DATAPROVIDER] %s books stored in memory", len(ids))
+        return ids
+
+    @timed("dataprovider")
+    async def create_book_group(self, books: list[Book]) -> list[Book]:
+        rows = [self._insert(book) for book in books]
+        for row in rows:
+            self._publish(row[0], "create", row[POSITION['updated_in']])
+        logger.debug("[DATAPROVIDER] Group of %s books stored in memory", len(rows))
+        return [BookMapper.to_domain(row) for row in rows]
+
+    @timed("dataprovider")
+    async def get_book_by_id(self, book_id: int) -> Book:
+        row = self._rows.get(book_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Book with ID {book_id} does not exist")
+        return BookMapper.to_domain(row)
+
+    @timed("dataprovider")
+    async def get_books_by_ids(self, ids: list[int]) -> list[Book]:
+        rows = self._rows
+        return [BookMapper.to_domain(rows[book_id]) for book_id in ids if book_id in rows]
+
+    @timed("dataprovider")
+    async def get_books(self, limit: int, offset: int, after_id: int | None = None,
+                        count_mode: str = "exact",
+                        filters: BookFilters | None = None) -> tuple[list[Book], int | None, bool]:
+        candidates, match = self._plan(filters)
+
+        if after_id is not None:
+            # Keyset: como no Postgres, o offset é ignorado quando há cursor
+            start = bisect.bisect_right(candidates, after_id)
+            offset = 0
+        else:
+            start = 0
+
+        # Um registro a mais para saber se existe próxima página
+        rows = self._scan(candidates, start, offset, limit + 1, match)
+        has_more = len(rows) > limit
+        books = [BookMapper.to_domain(row) for row in rows[:limit]]
+        return books, self._count(candidates, match, count_mode), has_more
+
+    async def iter_books(self, chunk_size: int,
+                         updated_since: datetime.datetime | None = None) -> AsyncIterator[list[Book]]:
+        updated_since = self._naive(updated_since)
+        last_id = 0
+        while True:
+            # Retoma pelo último id visto: escritas entre um bloco e outro não deslocam a leitura
+            ids = self._ids
+            position = bisect.bisect_right(ids, last_id)
+            books = []
+            while position < len(ids) and len(books) < chunk_size:
+                row = self._rows[ids[position]]
+                position += 1
+                last_id = row[0]
+                if updated_since is None or row[POSITION['updated_in']] >= updated_since:
+                    books.append(BookMapper.to_domain(row))
+            if not books:
+                return
+            yield books
+
+    @timed("dataprovider")
+    async def update_book(self, book_id: int, fields: dict,
+                          expected_updated_in: datetime.datetime | None = None) -> Book:
+        unknown = set(fields) - set(BookMapper.UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Fields cannot be updated: {sorted(unknown)}")
+
+        row = self._rows.get(book_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Book with ID {book_id} not found for update")
+        if expected_updated_in is not None and row[POSITION['updated_in']] != expected_updated_in:
+            raise HTTPException(status_code=412, detail=f"Book with ID {book_id} was modified by another request")
+        if not fields:
+            return BookMapper.to_domain(row)
+
+        values = list(row)
+        for field, value in fields.items():
+            values[POSITION[field]] = self._compact(field, value)
+        values[POSITION['updated_in']] = datetime.datetime.now()
+        new_row = tuple(values)
+
+        for column in INDEXED_COLUMNS:
+            old_value, new_value = row[POSITION[column]], new_row[POSITION[column]]
+            if old_value != new_value:
+                self._unindex(column, old_value, book_id)
+                bisect.insort(self._indexes[column].setdefault(new_value, array('q')), book_id)
+        self._rows[book_id] = new_row
+        self._tally(self._stats, row, -1)
+        self._tally(self._stats, new_row, 1)
+        self._publish(book_id, "update", new_row[POSITION['updated_in']])
+        return BookMapper.to_domain(new_row)
+
+    @timed("dataprovider")
+    async def adjust_stock(self, book_id: int, delta: int) -> Book:
+        row = self._rows.get(book_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Book with ID {book_id} does not exist")
+        quantity = row[POSITION['quantity_copies']] + delta
+        if quantity < 0:
+            error_msg = f"Book with ID {book_id} has {row[POSITION['quantity_copies']]} copies, cannot check out {-delta}"
+            raise HTTPException(status_code=409, detail=error_msg)
+
+        values = list(row)
+        values[POSITION['quantity_copies']] = quantity
+        values[POSITION['available']] = quantity > 0
+        values[POSITION['updated_in']] = datetime.datetime.now()
+        new_row = self._rows[book_id] = tuple(values)
+        self._tally(self._stats, row, -1)
+        self._tally(self._stats, new_row, 1)
+        self._publish(book_id, "update", new_row[POSITION['updated_in']])
+        return BookMapper.to_domain(new_row)
+
+    @timed("dataprovider")
+    async def delete_book(self, book_id: int) -> None:
+        row = self._rows.pop(book_id, None)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Book with ID {book_id} not found for deletion")
+
+        del self._ids[bisect.bisect_left(self._ids, book_id)]
+        for column in INDEXED_COLUMNS:
+            self._unindex(column, row[POSITION[column]], book_id)
+        self._tally(self._stats, row, -1)
+        self._publish(book_id, "delete", datetime.datetime.now())
+
+    @timed("dataprovider")
+    async def get_stats(self, limit: int) -> BookStats:
+        totals = self._stats.get(('total', ''), (0, 0, 0))
+        groups = {dimension: [] for dimension in STATS_DIMENSIONS}
+        for (dimension, value), counters in self._stats.items():
+            if dimension != 'total':
+                groups[dimension].append(StatsGroup(value, *counters))
+
+        def ranked(items: list[StatsGroup], size: int | None = None) -> list[StatsGroup]:
+            def key(group: StatsGroup):
+                return -group.books, group.value
+            return sorted(items, key=key) if size is None else heapq.nsmallest(size, items, key=key)
+
+        return BookStats(
+            totals=StatsGroup('', *totals),
+            by_gender=ranked(groups['gender']),
+            by_author=ranked(groups['author'], limit),
+            by_publisher=ranked(groups['publisher'], limit)
+        )
+
+    @timed("dataprovider")
+    async def rebuild_stats(self, dry_run: bool = False) -> int:
+        stats = {}
+        for row in self._rows.values():
+            self._tally(stats, row, 1)
+        drifted = sum(1 for key in stats.keys() | self._stats.keys() if stats.get(key) != self._stats.get(key))
+        if not dry_run:
+            self._stats = stats
+        return drifted
+
+    def stats(self) -> dict:
+        return {
+            "rows": len(self._rows),
+            "next_id": self._next_id,
+            "stats_groups": len(self._stats),
+            "indexes": {column: len(index) for column, index in self._indexes.items()},
+        }
+
+    def clear(self) -> None:
+        self._rows.clear()
+        self._ids = array('q')
+        for index in self._indexes.values():
+            index.clear()
+        self._stats = {}
+        self._next_id = 1
+
+    def _insert(self, book: Book) -> tuple:
+        book_id = self._next_id
+        self._next_id += 1
+        row = (
+            book_id, book.title, self._compact('author', book.author),
+            self._compact('publisher', book.publisher), book.publication_year,
+            self._compact('gender', book.gender), book.quantity_copies, book.available,
+            book.updated_in
+        )
+        self._rows[book_id] = row
+        # ids são sempre crescentes: append mantém os arrays ordenados
+        self._ids.append(book_id)
+        for column in INDEXED_COLUMNS:
+            self._indexes[column].setdefault(row[POSITION[column]], array('q')).append(book_id)
+        self._tally(self._stats, row, 1)
+        return row
+
+    def _publish(self, book_id: int, operation: str, updated_in: datetime.datetime | None) -> None:
+        if CHANGE_FEED_ENABLED:
+            change_feed.publish(BookChange(book_id, operation, updated_in))
+
+    @staticmethod
+    def _tally(stats: dict, row: tuple, sign: int) -> None:
+        """Soma (sign=1) ou subtrai (sign=-1) o livro dos contadores do total e de cada dimensão"""
+        copies = row[POSITION['quantity_copies']] or 0
+        available = 1 if row[POSITION['available']] else 0
+        for key in (('total', ''), *((dimension, row[POSITION[dimension]] or '') for dimension in STATS_DIMENSIONS)):
+            counters = stats.get(key)
+            if counters is None:
+                counters = stats[key] = [0, 0, 0]
+            counters[0] += sign
+            counters[1] += sign * copies
+            counters[2] += sign * available
+            if counters[0] == 0 and key[0] != 'total':
+                del stats[key]
+
+    def _unindex(self, column: str, value, book_id: int) -> None:
+        ids = self._indexes[column][value]
+        del ids[bisect.bisect_left(ids, book_id)]
+        if not ids:
+            del self._indexes[column][value]
+
+    def _compact(self, column: str, value):
+        if column in INTERNED_COLUMNS and isinstance(value, str):
+            return sys.intern(value)
+        return value
+
+    def _plan(self, filters: BookFilters | None):
+        """Escolhe o menor índice entre os filtros de igualdade; o resto vira predicado sobre a tupla"""
+        if filters is None or filters.is_empty():
+            return self._ids, None
+
+        equalities = [
+            (column, getattr(filters, column)) for column in INDEXED_COLUMNS
+            if getattr(filters, column) is not None
+        ]
+        candidates = self._ids
+        if equalities:
+            candidates, chosen = min(
+                ((self._indexes[column].get(value, _EMPTY), column) for column, value in equalities),
+                key=lambda posting: len(posting[0])
+            )
+            equalities = [(column, value) for column, value in equalities if column != chosen]
+
+        checks = [(POSITION[column], value) for column, value in equalities]
+        title = filters.title.lower() if filters.title is not None else None
+        q = filters.q.lower() if filters.q is not None else None
+        if not checks and title is None and q is None:
+            return candidates, None
+
+        title_at, author_at = POSITION['title'], POSITION['author']
+
+        def match(row: tuple) -> bool:
+            for position, value in checks:
+                if row[position] != value:
+                    return False
+            if title is not None and title not in row[title_at].lower():
+                return False
+            if q is not None and q not in row[title_at].lower() and q not in row[author_at].lower():
+                return False
+            return True
+
+        return candidates, match
+
+    def _scan(self, candidates, start: int, skip: int, size: int, match) -> list[tuple]:
+        rows = self._rows
+        if match is None:
+            begin = start + skip
+            return [rows[book_id] for book_id in candidates[begin:begin + size]]
+
+        found = []
+        for position in range(start, len(candidates)):
+            row = rows[candidates[position]]
+            if not match(row):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            found.append(row)
+            if len(found) == size:
+                break
+        return found
+
+    def _count(self, candidates, match, count_mode: str) -> int | None:
+        if count_mode == "none":
+            return None
+        if match is None or count_mode == "estimated":
+            # "estimated" conta só os candidatos do índice, como a estimativa do plano no Postgres
+            return len(candidates)
+        rows = self._rows
+        return sum(1 for book_id in candidates if match(rows[book_id]))
+
+    def _naive(self, value: datetime.datetime | None) -> datetime.datetime | None:
+        # updated_in é gravado sem fuso (como a coluna timestamp): converte para o horário local
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+
+memory_book_storage = InMemoryBookStorage()
@@ -0,0 +1,58 @@
+from dataprovider.book_provider import BookDataProvider
+from dataprovider.book_storage import BookStorage
+from domain.book import Book
+from domain.book_filters import BookFilters
+from domain.book_stats import BookStats
+from typing import AsyncIterator
+import datetime
+
+
+class PostgresBookStorage(BookStorage):
+    """Armazenamento no Postgres: delega ao BookDataProvider.
+
+    ``conn`` é uma conexão já aberta (scripts como rebuild_stats.py) ou, nas rotas, uma
+    ``PooledConnection``, que empresta uma conexão do pool só durante cada chamada.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def create_book(self, book: Book) -> Book:
+        return await BookDataProvider.create_book(self.conn, book)
+
+    async def create_books(self, books: list[Book], batch_size: int) -> list[int]:
+        return await BookDataProvider.create_books(self.conn, books, batch_size)
+
+    async def create_book_group(self, books: list[Book]) -> list[Book]:
+        return await BookDataProvider.create_book_group(self.conn, books)
+
+    async def get_book_by_id(self, book_id: int) -> Book:
+        return await BookDataProvider.get_book_by_id(self.conn, book_id)
+
+    async def get_books_by_ids(self, ids: list[int]) -> list[Book]:
+        return await BookDataProvider.get_books_by_ids(self.conn, ids)
+
+    async def get_books(self, limit: int, offset: int, after_id: int | None = None,
+                        count_mode: str = "exact",
+                        filters: BookFilters | None = None) -> tuple[list[Book], int | None, bool]:
+        return await BookDataProvider.get_books(self.conn, limit, offset, after_id, count_mode, filters)
+
+    def iter_books(self, chunk_size: int,
+                   updated_since: datetime.datetime | None = None) -> AsyncIterator[list[Book]]:
+        return BookDataProvider.iter_books(self.conn, chunk_size, updated_since)
+
+    async def update_book(self, book_id: int, fields: dict,
+                          expected_updated_in: datetime.datetime | None = None) -> Book:
+        return await BookDataProvider.update_book(self.conn, book_id, fields, expected_updated_in)
+
+    async def adjust_stock(self, book_id: int, delta: int) -> Book:
+        return await BookDataProvider.adjust_stock(self.conn, book_id, delta)
+
+    async def delete_book(self, book_id: int) -> None:
+        return await BookDataProvider.delete_book(self.conn, book_id)
+
+    async def get_stats(self, limit: int) -> BookStats:
+        return await BookDataProvider.get_stats(self.conn, limit)
+
+    async def rebuild_stats(self, dry_run: bool = False) -> int:
+        return await BookDataProvider.rebuild_stats(self.conn, dry_run)
@@ -1,10 +1,17 @@
 import logging
-from fastapi import Depends
-from config import connection_db
+from fastapi import Depends, Request
+from dataprovider.book_storage import BookStorage
+from dependencies.get_book_storage import get_book_storage, get_read_book_storage
 from service.book_service import BookService
 
 logger = logging.getLogger(__name__)
-async def get_book_service(connection = Depends(connection_db)) -> BookService:
-    logger.info("Conexão foi estabelecida com sucesso. Criando BookService...")
-    logger.info("[DEPENDENCY] Criando dependencia do BookService")
-    return BookService(connection)
\ No newline at end of file
+async def get_book_service(storage: BookStorage = Depends(get_book_storage)) -> BookService:
+    logger.debug("[DEPENDENCY] Storage obtido (%s). Criando BookService...", type(storage).__name__)
+    return BookService(storage)
+
+
+async def get_read_book_service(request: Request,
+                                storage: BookStorage = Depends(get_read_book_storage)) -> BookService:
+    """BookService para rotas só de leitura, que podem ir para uma réplica"""
+    logger.debug("[DEPENDENCY] Storage de leitura obtido (%s). Criando BookService...", type(storage).__name__)
+    return BookService(storage, use_cache=not getattr(request.state, "read_your_writes", False))
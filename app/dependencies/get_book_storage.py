@@ -0,0 +1,63 @@
+import logging
+import time
+from fastapi import Request
+from config import STORAGE_BACKEND, init_pool, close_pool, init_replicas, close_replicas
+from database.replica_router import READ_YOUR_WRITES_COOKIE
+from database.pooled_connection import PooledConnection
+from dataprovider.book_storage import STORAGE_BACKENDS
+from dataprovider.memory_book_storage import memory_book_storage
+from dataprovider.postgres_book_storage import PostgresBookStorage
+
+logger = logging.getLogger(__name__)
+
+
+def init_storage(backend: str = STORAGE_BACKEND) -> None:
+    """Prepara o backend escolhido em STORAGE_BACKEND; só o Postgres abre os pools de conexões"""
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Invalid STORAGE_BACKEND '{backend}', expected one of {STORAGE_BACKENDS}")
+    if backend == "postgres":
+        init_pool()
+        init_replicas()
+    logger.info("[DEPENDENCY] Storage backend: %s", backend)
+
+
+def close_storage(backend: str = STORAGE_BACKEND) -> None:
+    if backend == "postgres":
+        close_replicas()
+        close_pool()
+
+
+def get_book_storage(request: Request):
+    """Storage para rotas que escrevem: sempre no primário.
+
+    Nenhuma conexão é emprestada aqui: o BookDataProvider pega uma do pool só durante
+    cada chamada ao banco (``PooledConnection``).
+    """
+    if STORAGE_BACKEND == "memory":
+        return memory_book_storage
+
+    # ReadYourWritesMiddleware usa a marca para manter as próximas leituras do cliente no primário
+    request.state.db_write = True
+    return PostgresBookStorage(PooledConnection())
+
+
+def get_read_book_storage(request: Request):
+    """Storage para rotas só de leitura: réplica, se houver, exceto logo depois de uma escrita do cliente"""
+    if STORAGE_BACKEND == "memory":
+        return memory_book_storage
+
+    # Na janela de read-your-writes a leitura vai ao primário e o BookService não usa o cache,
+    # que pode ter sido preenchido por uma réplica atrasada depois da escrita
+    primary = _wrote_recently(request)
+    request.state.read_your_writes = primary
+    return PostgresBookStorage(PooledConnection(read_only=not primary))
+
+
+def _wrote_recently(request: Request) -> bool:
+    value = request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    if value is None:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 import datetime
 
-@dataclass
+@dataclass(slots=True)
 class Book:
     id: int
     title: str
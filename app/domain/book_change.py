@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+import datetime
+
+# Operações publicadas no change feed
+CHANGE_OPERATIONS = ("create", "update", "delete")
+
+
+@dataclass(slots=True, frozen=True)
+class BookChange:
+    id: int
+    operation: str
+    updated_in: datetime.datetime | None
@@ -0,0 +1,14 @@
+from dataclasses import dataclass, fields
+
+
+@dataclass(slots=True)
+class BookFilters:
+    author: str | None = None
+    title: str | None = None
+    publisher: str | None = None
+    gender: str | None = None
+    publication_year: int | None = None
+    q: str | None = None
+
+    def is_empty(self) -> bool:
+        return all(getattr(self, field.name) is None for field in fields(self))
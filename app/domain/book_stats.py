@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+# Dimensões agrupadas nas estatísticas do catálogo (além do total)
+STATS_DIMENSIONS = ("gender", "author", "publisher")
+
+
+@dataclass(slots=True)
+class StatsGroup:
+    value: str
+    books: int
+    copies: int
+    available_books: int
+
+
+@dataclass(slots=True)
+class BookStats:
+    totals: StatsGroup
+    by_gender: list[StatsGroup]
+    by_author: list[StatsGroup]
+    by_publisher: list[StatsGroup]
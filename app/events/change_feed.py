@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from config import CHANGE_FEED_QUEUE_SIZE, CHANGE_FEED_MAX_SUBSCRIBERS
+from domain.book_change import BookChange
+from observability.metrics import change_feed_events_total, change_feed_dropped_total
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Fila limitada de um assinante do change feed.
+
+    Quando o assinante não acompanha (fila cheia) ou o feed perde eventos (reconexão do
+    LISTEN), a assinatura é encerrada com ``resync``: o cliente deve reler o que mudou
+    (ex.: GET /books/export?updated_since=...) e assinar de novo.
+    """
+
+    def __init__(self, queue_size: int):
+        self._queue: asyncio.Queue[BookChange | None] = asyncio.Queue(queue_size)
+        self.resync = False
+
+    async def get(self, timeout: float) -> BookChange | None:
+        """Próximo evento, ou None se nada chegou em ``timeout`` segundos ou se a assinatura foi encerrada"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _offer(self, change: BookChange) -> bool:
+        try:
+            self._queue.put_nowait(change)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def _close(self) -> None:
+        self.resync = True
+        # Acorda quem está esperando: a fila só fica cheia se o assinante não está lendo
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+
+class ChangeFeed:
+    """Distribui as mudanças de livros para os assinantes deste processo.
+
+    - ``publish`` nunca espera: cada assinante tem uma fila de ``queue_size`` eventos e quem
+      enche a fila é desconectado, então um cliente lento não atrasa os outros nem a escrita
+    - ``add_listener`` registra consumidores internos (ex.: invalidação do cache), chamados
+      a cada evento e a cada perda de eventos (``on_gap``)
+
+    Todas as chamadas acontecem no event loop, então não há lock.
+    """
+
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscriptions: set[Subscription] = set()
+        self._listeners: list[tuple] = []
+
+        self._published = 0
+        self._dropped = 0
+        self._gaps = 0
+
+    def subscribe(self) -> Subscription | None:
+        if len(self._subscriptions) >= self.max_subscribers:
+            return None
+        subscription = Subscription(self.queue_size)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def add_listener(self, on_change, on_gap=None) -> None:
+        self._listeners.append((on_change, on_gap))
+
+    def publish(self, change: BookChange) -> None:
+        self._published += 1
+        change_feed_events_total.inc(change.operation)
+        for on_change, _ in self._listeners:
+            on_change(change)
+
+        for subscription in list(self._subscriptions):
+            if not subscription._offer(change):
+                logger.warning("[CHANGES] Subscriber fell %s events behind, disconnecting", self.queue_size)
+                self._drop(subscription, "overflow")
+
+    def gap(self) -> None:
+        """Eventos podem ter sido perdidos: avisa os consumidores internos e encerra as assinaturas"""
+        self._gaps += 1
+        for _, on_gap in self._listeners:
+            if on_gap is not None:
+                on_gap()
+        for subscription in list(self._subscriptions):
+            self._drop(subscription, "gap")
+
+    def close(self) -> None:
+        for subscription in list(self._subscriptions):
+            self._drop(subscription, "shutdown")
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscriptions),
+            "max_subscribers": self.max_subscribers,
+            "queue_size": self.queue_size,
+            "published": self._published,
+            "dropped_subscribers": self._dropped,
+            "gaps": self._gaps,
+        }
+
+    def _drop(self, subscription: Subscription, reason: str) -> None:
+        self._subscriptions.discard(subscription)
+        subscription._close()
+        self._dropped += 1
+        change_feed_dropped_total.inc(reason)
+
+
+change_feed = ChangeFeed(CHANGE_FEED_QUEUE_SIZE, CHANGE_FEED_MAX_SUBSCRIBERS)
@@ -1,26 +1,163 @@
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from config import (
+    create_connection, get_pool, get_replica_router, STORAGE_BACKEND, DB_EXECUTION_MODE, DB_EXECUTOR_MAX_WORKERS,
+    DB_REPLICA_DSNS, DB_READ_YOUR_WRITES_SECONDS,
+    LOG_LEVEL, LOG_LAYER_LEVELS, LOG_ASYNC, LOG_SAMPLE_RATE, LOG_REQUEST_SUMMARY, METRICS_ENABLED,
+    COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY,
+    CHANGE_FEED_ENABLED, CHANGE_FEED_CHANNEL, CHANGE_FEED_CHECK_INTERVAL,
+    ADMISSION_READ_CONCURRENCY, ADMISSION_WRITE_CONCURRENCY, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_RETRY_AFTER, REQUEST_TIMEOUT
+)
+from cache.book_cache import book_cache
+from cache.book_loader import book_loader
+from database.change_listener import start_change_listener, stop_change_listener, get_change_listener
+from database.executor import init_executor, shutdown_executor
+from dataprovider.book_group_commit import book_group_commit
+from dataprovider.memory_book_storage import memory_book_storage
+from dependencies.get_book_storage import init_storage, close_storage
+from events.change_feed import change_feed
+from middleware.admission import AdmissionControlMiddleware, ConcurrencyLimiter
+from middleware.compression import CompressionMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.read_your_writes import ReadYourWritesMiddleware
+from middleware.request_logging import RequestLoggingMiddleware
+from observability.metrics import registry, Gauge
+from observability.logging_config import setup_logging
 from resource.book_resource import router
+from resource.error_handlers import register_error_handlers
 
-logging.basicConfig(
-    level=logging.INFO, 
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-)
+setup_logging(LOG_LEVEL, LOG_LAYER_LEVELS, LOG_ASYNC)
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_storage(STORAGE_BACKEND)
+    init_executor(DB_EXECUTION_MODE, DB_EXECUTOR_MAX_WORKERS)
+    if STORAGE_BACKEND == "postgres" and CHANGE_FEED_ENABLED:
+        # Um LISTEN por worker, sempre no primário (NOTIFY não passa pelas réplicas)
+        await start_change_listener(create_connection, CHANGE_FEED_CHANNEL, change_feed, CHANGE_FEED_CHECK_INTERVAL)
+    try:
+        yield
+    finally:
+        change_feed.close()
+        await stop_change_listener()
+        shutdown_executor()
+        close_storage(STORAGE_BACKEND)
+
+
 app = FastAPI(
-    title="Library Management System", 
-    version="1.0.0"
+    title="Library Management System",
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+registry.enabled = METRICS_ENABLED
+admission_limiters = {
+    route_class: ConcurrencyLimiter(route_class, limit, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT)
+    for route_class, limit in (("read", ADMISSION_READ_CONCURRENCY), ("write", ADMISSION_WRITE_CONCURRENCY))
+    if limit > 0
+}
+# Escritas feitas por qualquer worker invalidam o cache deste; se eventos se perderam, o cache inteiro
+change_feed.add_listener(lambda change: book_cache.invalidate(change.id), book_cache.clear)
+if DB_REPLICA_DSNS and DB_READ_YOUR_WRITES_SECONDS > 0:
+    app.add_middleware(ReadYourWritesMiddleware, window=DB_READ_YOUR_WRITES_SECONDS)
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE,
+        gzip_level=COMPRESSION_GZIP_LEVEL, brotli_quality=COMPRESSION_BROTLI_QUALITY
+    )
+# Dentro da métrica e do log, para que as recusas (503) também apareçam neles
+app.add_middleware(
+    AdmissionControlMiddleware, limiters=admission_limiters, request_timeout=REQUEST_TIMEOUT,
+    retry_after=ADMISSION_RETRY_AFTER, read_paths=("/books/batch-get",), untimed_paths=("/books/export",),
+    exempt_paths=("/health", "/metrics", "/docs", "/openapi.json", "/books/changes")
+)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestLoggingMiddleware, sample_rate=LOG_SAMPLE_RATE, summary=LOG_REQUEST_SUMMARY)
 app.include_router(router)
+register_error_handlers(app)
 
 @app.get("/health", tags=["Health"])
 async def root():
-    logger.info("Health check endpoint called")
+    logger.debug("Health check endpoint called")
     return {"message": "Welcome to the Library Management System API"}
 
+@app.get("/health/pool", tags=["Health"])
+async def pool_stats():
+    if STORAGE_BACKEND != "postgres":
+        raise HTTPException(status_code=404, detail=f"No connection pool with STORAGE_BACKEND={STORAGE_BACKEND}")
+    return get_pool().stats()
+
+@app.get("/health/replicas", tags=["Health"])
+async def replica_stats():
+    router = get_replica_router()
+    return router.stats() if router is not None else {}
+
+@app.get("/health/storage", tags=["Health"])
+async def storage_stats():
+    stats = {"backend": STORAGE_BACKEND, "group_commit": book_group_commit.stats()}
+    if STORAGE_BACKEND == "memory":
+        stats.update(memory_book_storage.stats())
+    return stats
+
+@app.get("/health/cache", tags=["Health"])
+async def cache_stats():
+    return {**book_cache.stats(), "loader": book_loader.stats()}
+
+@app.get("/health/changes", tags=["Health"])
+async def change_feed_stats():
+    listener = get_change_listener()
+    return {**change_feed.stats(), "listener": listener.stats() if listener is not None else None}
+
+@app.get("/health/admission", tags=["Health"])
+async def admission_stats():
+    return {
+        "request_timeout_seconds": REQUEST_TIMEOUT,
+        "limiters": {route_class: limiter.stats() for route_class, limiter in admission_limiters.items()}
+    }
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics():
+    if not registry.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+def _pool_gauges():
+    if STORAGE_BACKEND != "postgres":
+        return []
+    stats = get_pool().stats()
+    return [((state,), stats[state]) for state in ("size", "in_use", "idle", "waiting")]
+
+def _replica_gauges():
+    router = get_replica_router()
+    if router is None:
+        return []
+    return [((name,), int(healthy)) for name, healthy in router.healthy().items()]
+
+def _cache_gauges():
+    stats = book_cache.stats()
+    return [((counter,), stats[counter]) for counter in ("size", "hits", "negative_hits", "misses", "coalesced", "evictions")]
+
+registry.register(Gauge("db_pool_connections", "Connection pool state", _pool_gauges, ("state",)))
+registry.register(Gauge("db_replica_healthy", "1 when the read replica is in rotation", _replica_gauges, ("replica",)))
+registry.register(Gauge(
+    "change_feed_subscribers", "Open GET /books/changes streams on this worker",
+    lambda: [((), change_feed.stats()["subscribers"])]
+))
+registry.register(Gauge(
+    "admission_requests", "Requests running and waiting per route class",
+    lambda: [((route_class, state), limiter.stats()[state])
+             for route_class, limiter in admission_limiters.items() for state in ("active", "waiting")],
+    ("route_class", "state")
+))
+registry.register(Gauge("book_cache", "Book cache size and counters", _cache_gauges, ("counter",)))
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,33 +1,35 @@
 from domain.book import Book
+from domain.book_change import BookChange
+from domain.book_stats import BookStats, StatsGroup
 from schema.book_schema import CreateBookRequest, BookResponse
+from email.utils import format_datetime
+import base64
+import binascii
 import datetime
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
 class BookMapper:
+    # Ordem das colunas nas queries (SELECT/RETURNING), igual à ordem dos campos de Book
+    COLUMNS = (
+        'id', 'title', 'author', 'publisher', 'publication_year', 'gender',
+        'quantity_copies', 'available', 'updated_in'
+    )
+
     @staticmethod
-    def to_domain(row) -> Book:
-        """Converte uma row do banco para o objeto Book"""
-        logger.debug(f"[MAPPER] Converting row to domain: {row}")
-        book = Book(
-            id=row['id'],
-            title=row['title'],
-            author=row['author'],
-            publisher=row['publisher'],
-            publication_year=row['publication_year'],
-            gender=row['gender'],
-            quantity_copies=row['quantity_copies'],
-            available=row['available'],
-            updated_in=row['updated_in']
-        )
-        logger.debug(f"[MAPPER] Domain object created: {book}")
+    def to_domain(row: tuple) -> Book:
+        """Converte uma row do banco (tupla na ordem de COLUMNS) para o objeto Book"""
+        book = Book(*row)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[MAPPER] Domain object created: %s", book)
         return book
     
     @staticmethod
     def to_dict(book: Book) -> dict:
         """Converte Book para dict para inserção no banco"""
-        logger.debug(f"[MAPPER] Converting domain to dict: {book}")
+        logger.debug("[MAPPER] Converting domain to dict: %s", book)
         data = {
             'title': book.title,
             'author': book.author,
@@ -38,13 +40,13 @@ class BookMapper:
             'available': book.available,
             'updated_in': book.updated_in
         }
-        logger.debug(f"[MAPPER] Dict created: {data}")
+        logger.debug("[MAPPER] Dict created: %s", data)
         return data
 
     @staticmethod
     def to_request(request: CreateBookRequest) -> Book:
         """Converte CreateBookRequest para Book"""
-        logger.debug(f"[MAPPER] Converting request to domain: {request}")
+        logger.debug("[MAPPER] Converting request to domain: %s", request)
         book = Book(
             id=None,
             title=request.title,
@@ -56,13 +58,12 @@ class BookMapper:
             available=request.available,
             updated_in=datetime.datetime.now()
         )
-        logger.debug(f"[MAPPER] Domain object created from request: {book}")
+        logger.debug("[MAPPER] Domain object created from request: %s", book)
         return book
     
     @staticmethod
     def to_response(book: Book) -> BookResponse:
         """Converte Book para BookResponse"""
-        logger.debug(f"[MAPPER] Converting domain to response: {book}")
         response = BookResponse(
             id=book.id,
             title=book.title,
@@ -74,5 +75,149 @@ class BookMapper:
             available=book.available,
             updated_in=book.updated_in
         )
-        logger.debug(f"[MAPPER] Response object created: {response}")
-        return response
\ No newline at end of file
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[MAPPER] Response object created: %s", response)
+        return response
+
+    @staticmethod
+    def to_list_response(books: list[Book], total_count: int | None, limit: int,
+                         offset: int | None, next_cursor: str | None) -> dict:
+        """Monta o corpo de ListBooksResponse sem construir os modelos pydantic.
+
+        Os campos de Book são os mesmos de BookResponse, então as dataclasses vão direto
+        para o FastJSONResponse; em páginas grandes isso é a maior parte do custo da rota.
+        """
+        return {
+            "books": books,
+            "totalCount": total_count,
+            "limit": limit,
+            "offset": offset,
+            "nextCursor": next_cursor
+        }
+
+    @staticmethod
+    def to_batch_response(books: list[Book], missing_ids: list[int]) -> dict:
+        """Monta o corpo de BatchGetBooksResponse, como ``to_list_response``"""
+        return {"books": books, "missingIds": missing_ids}
+
+    UPDATABLE_FIELDS = (
+        'title', 'author', 'publisher', 'publication_year', 'gender', 'quantity_copies', 'available'
+    )
+
+    @staticmethod
+    def to_export_row(book: Book) -> tuple:
+        """Converte Book para uma linha de exportação, na ordem de COLUMNS"""
+        return (
+            book.id, book.title, book.author, book.publisher, book.publication_year, book.gender,
+            book.quantity_copies, book.available,
+            book.updated_in.isoformat() if book.updated_in is not None else None
+        )
+
+    @staticmethod
+    def to_change_payload(change: BookChange) -> dict:
+        """Evento do change feed: o que mudou e a nova versão (updated_in), sem o livro inteiro"""
+        return {
+            'id': change.id,
+            'operation': change.operation,
+            'updated_in': change.updated_in.isoformat() if change.updated_in is not None else None
+        }
+
+    @staticmethod
+    def from_change_payload(payload: dict) -> BookChange:
+        updated_in = payload.get('updated_in')
+        return BookChange(
+            id=int(payload['id']),
+            operation=payload['operation'],
+            updated_in=datetime.datetime.fromisoformat(updated_in) if updated_in is not None else None
+        )
+
+    @staticmethod
+    def to_stats(summary: list[tuple], authors: list[tuple], publishers: list[tuple]) -> BookStats:
+        """Monta BookStats a partir das rows (dimension, value, books, copies, available_books) do
+        total e dos gêneros e das rows (value, books, copies, available_books) dos maiores autores e editoras"""
+        totals = StatsGroup('', 0, 0, 0)
+        genders = []
+        for dimension, value, books, copies, available_books in summary:
+            group = StatsGroup(value, int(books), int(copies), int(available_books))
+            if dimension == 'total':
+                totals = group
+            elif group.books > 0:
+                genders.append(group)
+        genders.sort(key=lambda group: (-group.books, group.value))
+        return BookStats(
+            totals=totals,
+            by_gender=genders,
+            by_author=[StatsGroup(*row) for row in authors],
+            by_publisher=[StatsGroup(*row) for row in publishers]
+        )
+
+    @staticmethod
+    def to_stats_response(stats: BookStats) -> dict:
+        """Converte BookStats para o corpo de GET /books/stats"""
+        def group(stats_group: StatsGroup) -> dict:
+            return {
+                "value": stats_group.value,
+                "books": stats_group.books,
+                "copies": stats_group.copies,
+                "availableBooks": stats_group.available_books,
+            }
+
+        totals = group(stats.totals)
+        del totals["value"]
+        return {
+            "totals": totals,
+            "byGender": [group(item) for item in stats.by_gender],
+            "byAuthor": [group(item) for item in stats.by_author],
+            "byPublisher": [group(item) for item in stats.by_publisher],
+        }
+
+    @staticmethod
+    def to_cursor(book: Book) -> str:
+        """Converte o último Book de uma página no cursor opaco da próxima página"""
+        return base64.urlsafe_b64encode(f"id:{book.id}".encode()).decode().rstrip("=")
+
+    @staticmethod
+    def from_cursor(cursor: str) -> int:
+        """Converte o cursor opaco de volta no último id visto"""
+        try:
+            decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            prefix, _, last_id = decoded.partition(":")
+            if prefix != "id":
+                raise ValueError
+            return int(last_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    @staticmethod
+    def to_etag(updated_in: datetime.datetime) -> str:
+        """Converte a versão de um livro (updated_in) em um ETag forte"""
+        return f'"{updated_in.isoformat()}"'
+
+    @staticmethod
+    def to_list_etag(response: dict) -> str:
+        """ETag fraco de uma página (``to_list_response``): muda quando entra, sai ou é alterado algum livro"""
+        digest = hashlib.blake2b(digest_size=16)
+        for book in response["books"]:
+            digest.update(f"{book.id}:{book.updated_in.isoformat() if book.updated_in else ''};".encode())
+        digest.update(f"{response['totalCount']}:{response['nextCursor']}".encode())
+        return f'W/"{digest.hexdigest()}"'
+
+    @staticmethod
+    def to_last_modified(updated_in: datetime.datetime) -> datetime.datetime:
+        """updated_in (horário local, sem fuso) em UTC com precisão de segundos, como no header HTTP"""
+        return updated_in.astimezone(datetime.timezone.utc).replace(microsecond=0)
+
+    @staticmethod
+    def to_http_date(updated_in: datetime.datetime) -> str:
+        return format_datetime(BookMapper.to_last_modified(updated_in), usegmt=True)
+
+    @staticmethod
+    def from_etag(etag: str) -> datetime.datetime:
+        """Converte um ETag (If-Match) de volta no updated_in esperado"""
+        value = etag.strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        try:
+            return datetime.datetime.fromisoformat(value.strip('"'))
+        except ValueError:
+            raise ValueError(f"Invalid ETag: {etag}")
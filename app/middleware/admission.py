@@ -0,0 +1,141 @@
+import asyncio
+import collections
+import logging
+import time
+from starlette.responses import JSONResponse
+from observability.metrics import requests_shed_total
+from observability.request_context import deadline_var
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimiter:
+    """Limita quantas requisições de uma classe rodam ao mesmo tempo.
+
+    Até ``limit`` requisições entram direto; as seguintes esperam em uma fila FIFO de no
+    máximo ``queue_size`` posições por até ``queue_timeout`` segundos. Com a fila cheia a
+    recusa é imediata, para o cliente tentar de novo em vez de acumular latência. Roda só
+    no event loop, sem lock.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+
+        self._admitted = 0
+        self._queued = 0
+        self._rejected = 0
+        self._timeouts = 0
+
+    async def acquire(self) -> str | None:
+        """Ocupa uma vaga; devolve None quando conseguiu ou o motivo da recusa"""
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            self._admitted += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            self._rejected += 1
+            return "queue_full"
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._queued += 1
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # A vaga chegou junto com o timeout ou o cancelamento: passa para o próximo
+                self.release()
+            elif future in self._waiters:
+                # release() pode já ter descartado o future cancelado pelo wait_for
+                self._waiters.remove(future)
+            if isinstance(e, asyncio.TimeoutError):
+                self._timeouts += 1
+                return "queue_timeout"
+            raise
+        # release() transferiu a vaga sem decrementar _active
+        self._admitted += 1
+        return None
+
+    def release(self) -> None:
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "queue_size": self.queue_size,
+            "queue_timeout_seconds": self.queue_timeout,
+            "admitted_total": self._admitted,
+            "queued_total": self._queued,
+            "rejected_total": self._rejected,
+            "queue_timeouts_total": self._timeouts,
+        }
+
+
+class AdmissionControlMiddleware:
+    """Middleware ASGI que decide, antes de qualquer trabalho, se a requisição entra.
+
+    - leituras (GET/HEAD e os POST em ``read_paths``) e escritas têm limitadores separados,
+      para uma rajada de escritas não derrubar as leituras e vice-versa
+    - sem vaga, responde 503 com ``Retry-After``
+    - cada requisição admitida recebe um prazo de ``request_timeout`` segundos (contado da
+      chegada, incluindo a fila), usado como limite da espera pelo pool e statement_timeout
+    - ``untimed_paths`` (prefixos) passam pelos limitadores, mas sem prazo: exportações longas
+    - ``exempt_paths`` (prefixos) não passam pelos limitadores nem recebem prazo
+    """
+
+    def __init__(self, app, limiters: dict[str, ConcurrencyLimiter], request_timeout: float,
+                 retry_after: int, read_paths: tuple[str, ...] = (), untimed_paths: tuple[str, ...] = (),
+                 exempt_paths: tuple[str, ...] = ()):
+        self.app = app
+        self.limiters = limiters
+        self.request_timeout = request_timeout
+        self.retry_after = retry_after
+        self.read_paths = read_paths
+        self.untimed_paths = untimed_paths
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            return await self.app(scope, receive, send)
+
+        arrived = time.monotonic()
+        route_class = self._classify(scope)
+        # Disponível como request.state.route_class para os handlers de erro de sobrecarga
+        scope.setdefault("state", {})["route_class"] = route_class
+        limiter = self.limiters.get(route_class)
+        if limiter is not None:
+            reason = await limiter.acquire()
+            if reason is not None:
+                requests_shed_total.inc(route_class, reason)
+                logger.warning("[ADMISSION] %s %s rejected (%s: %s)", scope["method"], scope["path"], route_class, reason)
+                response = JSONResponse(
+                    {"detail": f"Server is overloaded ({route_class} {reason}), retry later"},
+                    status_code=503, headers={"Retry-After": str(self.retry_after)}
+                )
+                return await response(scope, receive, send)
+
+        timed = self.request_timeout > 0 and not scope["path"].startswith(self.untimed_paths)
+        token = deadline_var.set(arrived + self.request_timeout if timed else None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            deadline_var.reset(token)
+            if limiter is not None:
+                limiter.release()
+
+    def _classify(self, scope) -> str:
+        if scope["method"] in ("GET", "HEAD") or scope["path"] in self.read_paths:
+            return "read"
+        return "write"
@@ -0,0 +1,138 @@
+import zlib
+from starlette.datastructures import MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só gzip é oferecido
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Streams longos com eventos pequenos: comprimir só atrasaria a entrega (e alguns proxies bufferizam)
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Sem ser o último bloco, SYNC_FLUSH entrega o que já foi comprimido (streaming)
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime as respostas com brotli ou gzip, conforme o Accept-Encoding.
+
+    - só respostas JSON/NDJSON/texto com pelo menos ``minimum_size`` bytes (as pequenas não
+      compensam o custo); respostas em streaming são comprimidas bloco a bloco
+    - adiciona ``Vary: Accept-Encoding`` e enfraquece o ETag, já que o corpo enviado muda
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+
+        encoding = self._negotiate(scope["headers"])
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Os headers só são decididos quando chega o primeiro bloco do corpo
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=list(start_message.get("headers", [])))
+                if not self._compressible(start_message["status"], headers) or (
+                        not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = self._compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("ETag")
+                if etag is not None and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                del headers["Content-Length"]
+                data = compressor.compress(body, not more_body)
+                if not more_body:
+                    headers["Content-Length"] = str(len(data))
+                start_message["headers"] = headers.raw
+                await send(start_message)
+            else:
+                data = compressor.compress(body, not more_body)
+
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _negotiate(self, raw_headers) -> str | None:
+        accept = b""
+        for name, value in raw_headers:
+            if name == b"accept-encoding":
+                accept = value
+                break
+        if not accept:
+            return None
+
+        weights = {}
+        for part in accept.decode("latin-1").lower().split(","):
+            coding, _, params = part.strip().partition(";")
+            weight = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    weight = float(params[2:])
+                except ValueError:
+                    weight = 0.0
+            weights[coding.strip()] = weight
+
+        wildcard = weights.get("*", 0.0)
+        br = weights.get("br", wildcard) if brotli is not None else 0.0
+        gzip = weights.get("gzip", wildcard)
+        if br > 0 and br >= gzip:
+            return "br"
+        if gzip > 0:
+            return "gzip"
+        return None
+
+    def _compressible(self, status: int, headers: MutableHeaders) -> bool:
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNCOMPRESSED_TYPES)
+
+    def _compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
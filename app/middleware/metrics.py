@@ -0,0 +1,37 @@
+import time
+from observability.metrics import http_requests_total, http_request_duration_seconds, http_errors_total
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que conta as requisições e mede a latência por rota.
+
+    A rota é o template registrado (ex.: ``/books/{book_id}``), nunca o path bruto, para
+    que o número de séries não cresça com os ids consultados.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_duration_seconds.observe(time.perf_counter() - start, method, route_path)
+            http_requests_total.inc(method, route_path, status)
+            if status >= 400:
+                http_errors_total.inc(route_path, status)
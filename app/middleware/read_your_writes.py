@@ -0,0 +1,31 @@
+import math
+import time
+from database.replica_router import READ_YOUR_WRITES_COOKIE
+
+
+class ReadYourWritesMiddleware:
+    """Middleware ASGI que mantém as leituras de um cliente no primário logo depois de ele escrever.
+
+    Quando a rota usou a storage de escrita (``request.state.db_write``) e respondeu com
+    sucesso, devolve um cookie com o instante até quando as leituras desse cliente devem
+    ignorar as réplicas, cobrindo o atraso da replicação.
+    """
+
+    def __init__(self, app, window: float):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400 \
+                    and scope.get("state", {}).get("db_write"):
+                until = time.time() + self.window
+                cookie = (f"{READ_YOUR_WRITES_COOKIE}={until:.3f}; Max-Age={math.ceil(self.window)}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,64 @@
+import logging
+import random
+import time
+import uuid
+from observability.logging_config import SUMMARY_LOGGER
+from observability.request_context import request_id_var, sampled_var, timings_var
+
+logger = logging.getLogger(SUMMARY_LOGGER)
+
+
+class RequestLoggingMiddleware:
+    """Middleware ASGI que identifica cada requisição e registra uma linha de resumo ao final.
+
+    - request id vindo do header X-Request-ID (ou gerado), devolvido no mesmo header
+    - sorteia se os logs detalhados da requisição entram na amostra (``sample_rate``)
+    - mede o tempo total e o tempo de cada camada (ver ``observability.request_context.timed``)
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, summary: bool = True):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.summary = summary
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        timings = {}
+        tokens = (
+            request_id_var.set(request_id),
+            sampled_var.set(self.sample_rate >= 1 or random.random() < self.sample_rate),
+            timings_var.set(timings),
+        )
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self.summary:
+                elapsed = time.perf_counter() - start
+                layers = " ".join(f"{layer}_ms={seconds * 1000:.2f}" for layer, seconds in timings.items())
+                logger.info(
+                    "method=%s path=%s status=%d duration_ms=%.2f %s",
+                    scope["method"], scope["path"], status, elapsed * 1000, layers
+                )
+            request_id_var.reset(tokens[0])
+            sampled_var.reset(tokens[1])
+            timings_var.reset(tokens[2])
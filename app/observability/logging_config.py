@@ -0,0 +1,73 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+from observability.request_context import request_id_var, sampled_var
+
+SUMMARY_LOGGER = "request.summary"
+
+# Prefixo dos loggers de cada camada (os módulos usam logging.getLogger(__name__))
+LAYERS = {
+    "resource": "resource",
+    "service": "service",
+    "dataprovider": "dataprovider",
+    "mapper": "mapper",
+    "dependency": "dependencies",
+    "database": "database",
+    "cache": "cache",
+    "events": "events",
+}
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s [%(request_id)s]: %(message)s"
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Adiciona o request id ao registro e descarta os logs abaixo de WARNING das requisições fora da amostra"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        if record.levelno < logging.WARNING and record.name != SUMMARY_LOGGER:
+            return sampled_var.get()
+        return True
+
+
+def setup_logging(level: str, layer_levels: dict[str, str | None], use_queue: bool) -> None:
+    """Configura o logging da aplicação.
+
+    Com ``use_queue`` as mensagens vão para uma fila e são escritas no stdout por uma thread
+    separada, então quem loga nunca bloqueia esperando o terminal.
+    """
+    global _listener
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        handler = logging.handlers.QueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        handler = stream_handler
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    logging.getLogger(SUMMARY_LOGGER).setLevel(logging.INFO)
+
+    for layer, layer_level in layer_levels.items():
+        if layer_level:
+            logging.getLogger(LAYERS[layer]).setLevel(layer_level.upper())
+
+
+def stop_logging() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
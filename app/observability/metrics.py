@@ -0,0 +1,180 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        if not registry.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # label_values -> [contagem por bucket (o último é +Inf), soma]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values) -> None:
+        if not registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(label_values, list(counts), total) for label_values, (counts, total) in self._series.items()]
+        for label_values, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Gauge calculado na hora da coleta (ex.: estatísticas do pool de conexões)"""
+
+    def __init__(self, name: str, description: str, collect, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge"]
+        for label_values, value in self._collect():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.enabled = True
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+))
+http_errors_total = registry.register(Counter(
+    "http_errors_total", "HTTP responses with status >= 400 by route and status", ("route", "status")
+))
+db_query_duration_seconds = registry.register(Histogram(
+    "db_query_duration_seconds", "Time spent running each data provider query", ("query",)
+))
+db_query_errors_total = registry.register(Counter(
+    "db_query_errors_total", "Data provider queries that failed with a database error", ("query",)
+))
+db_pool_acquire_seconds = registry.register(Histogram(
+    "db_pool_acquire_seconds", "Time waiting for a connection from the pool"
+))
+db_connection_open_seconds = registry.register(Histogram(
+    "db_connection_open_seconds", "Time opening a new database connection"
+))
+db_commit_seconds = registry.register(Histogram(
+    "db_commit_seconds", "Time spent in COMMIT"
+))
+change_feed_events_total = registry.register(Counter(
+    "change_feed_events_total", "Book changes delivered to the change feed of this worker", ("operation",)
+))
+change_feed_dropped_total = registry.register(Counter(
+    "change_feed_dropped_subscribers_total", "Change feed subscriptions closed by the server", ("reason",)
+))
+requests_shed_total = registry.register(Counter(
+    "requests_shed_total", "Requests rejected or cut short because of overload", ("route_class", "reason")
+))
+stage_duration_seconds = registry.register(Histogram(
+    "app_stage_duration_seconds", "Time spent mapping and serializing responses", ("stage",)
+))
+
+
+def observe_query(name: str):
+    """Mede a função síncrona decorada (executada na thread do banco) como a query ``name``"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                # Erros de negócio (404, 412) não são falhas do banco
+                if getattr(e, "status_code", None) is None:
+                    db_query_errors_total.inc(name)
+                raise
+            finally:
+                db_query_duration_seconds.observe(time.perf_counter() - start, name)
+        return wrapper
+    return decorator
@@ -0,0 +1,27 @@
+import contextvars
+import functools
+import time
+
+# Estado da requisição atual, preenchido pelo RequestLoggingMiddleware
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+sampled_var: contextvars.ContextVar[bool] = contextvars.ContextVar("sampled", default=True)
+timings_var: contextvars.ContextVar[dict | None] = contextvars.ContextVar("timings", default=None)
+# Prazo da requisição (time.monotonic()), preenchido pelo AdmissionControlMiddleware
+deadline_var: contextvars.ContextVar[float | None] = contextvars.ContextVar("deadline", default=None)
+
+
+def timed(layer: str):
+    """Soma o tempo gasto na função assíncrona decorada ao tempo da camada na requisição atual"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            timings = timings_var.get()
+            if timings is None:
+                return await func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                timings[layer] = timings.get(layer, 0.0) + time.perf_counter() - start
+        return wrapper
+    return decorator
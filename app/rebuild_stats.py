@@ -0,0 +1,37 @@
+"""Confere e recalcula as estatísticas do catálogo (migrations/002_books_stats.sql) a partir de public.books.
+
+    python rebuild_stats.py            # recalcula; as escritas em public.books esperam até o fim
+    python rebuild_stats.py --check    # só compara; sai com código 1 se houver divergência
+
+Roda a partir de app/, com as mesmas variáveis DB_* da aplicação. O backend memory mantém
+as estatísticas no próprio processo e não precisa disto.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from config import create_connection
+from dataprovider.postgres_book_storage import PostgresBookStorage
+
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+
+async def main(args) -> int:
+    conn = create_connection()
+    try:
+        drifted = await PostgresBookStorage(conn).rebuild_stats(dry_run=args.check)
+    finally:
+        conn.close()
+
+    if args.check:
+        print(f"{drifted} statistics groups differ from public.books")
+        return 1 if drifted else 0
+    print(f"Statistics rebuilt ({drifted} groups had drifted)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Só mostra quantos grupos divergem, sem alterar nada")
+    sys.exit(asyncio.run(main(parser.parse_args())))
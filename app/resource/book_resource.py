@@ -1,76 +1,400 @@
-from fastapi import APIRouter, HTTPException, Depends
+import datetime
+import json
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Literal
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from config import (
+    BULK_MAX_ITEMS, BATCH_GET_MAX_IDS, HTTP_CACHE_CONTROL_BOOK, HTTP_CACHE_CONTROL_LIST,
+    CHANGE_FEED_ENABLED, CHANGE_FEED_HEARTBEAT_SECONDS
+)
+from domain.book_filters import BookFilters
+from events.change_feed import change_feed, Subscription
+from mapper.book_mapper import BookMapper
+from observability.metrics import stage_duration_seconds
+from resource.error_handlers import PROPAGATED_ERRORS
+from resource.json_response import FastJSONResponse
+from serialization.json_codec import dumps, loads
 from service.book_service import BookService
-from schema.book_schema import CreateBookRequest, BookResponse, ListBooksResponse, UpdateBookRequest
-from dependencies.get_book_service import get_book_service
+from schema.book_schema import (
+    CreateBookRequest, BookResponse, ListBooksResponse, UpdateBookRequest,
+    BulkCreateBooksResponse, BulkCreateBooksErrorResponse, BulkItemError,
+    BatchGetBooksRequest, BatchGetBooksResponse, BookStatsResponse
+)
+from dependencies.get_book_service import get_book_service, get_read_book_service
 import logging
 
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/books", tags=["books"])
+router = APIRouter(prefix="/books", tags=["books"], default_response_class=FastJSONResponse)
+
+
+def _json_response(content: BaseModel | dict, status_code: int = 200, headers: dict | None = None) -> Response:
+    """Serializa o corpo direto para JSON (modelo pydantic ou dict montado pelo BookMapper).
+
+    Devolver um Response evita que o FastAPI converta o modelo em dict e valide tudo de
+    novo contra o response_model; a documentação continua vindo da anotação da rota.
+    """
+    with stage_duration_seconds.time("serialization"):
+        return FastJSONResponse(content=content, status_code=status_code, headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca do If-None-Match: W/"x" e "x" são a mesma versão"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def _is_not_modified(etag: str, last_modified: datetime.datetime | None,
+                     if_none_match: str | None, if_modified_since: str | None) -> bool:
+    # If-None-Match tem precedência; If-Modified-Since só vale quando ele não vem
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.timezone.utc)
+    return last_modified <= since
+
+
+def _conditional_response(build: Callable[[], BaseModel | dict], etag: str, cache_control: str,
+                          last_modified: datetime.datetime | None = None,
+                          if_none_match: str | None = None,
+                          if_modified_since: str | None = None) -> Response:
+    """Responde 304 sem montar nem serializar o corpo quando o cliente já tem a versão atual;
+    ``build`` só é chamado para a resposta 200"""
+    headers = {"ETag": etag}
+    modified = None
+    if last_modified is not None:
+        modified = BookMapper.to_last_modified(last_modified)
+        headers["Last-Modified"] = BookMapper.to_http_date(last_modified)
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if _is_not_modified(etag, modified, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+    return _json_response(build(), headers=headers)
 
 
 @router.post("/", response_model=BookResponse)
 async def create_book(request: CreateBookRequest, book_service: BookService = Depends(get_book_service)):
-    logger.info("[RESOURCE] Received request to create book")
-    logger.info(f"[RESOURCE] Book data: title={request.title}, author={request.author}")
+    logger.debug("[RESOURCE] Received request to create book")
+    logger.debug("[RESOURCE] Book data: title=%s, author=%s", request.title, request.author)
     
     try:
         created_book = await book_service.create_book(request)
         
-        logger.info(f"[RESOURCE] Book created successfully with ID: {created_book.id}")
-        return created_book
+        logger.debug("[RESOURCE] Book created successfully with ID: %s", created_book.id)
+        return _json_response(created_book)
+    except PROPAGATED_ERRORS:
+        raise
     except Exception as e:
-        logger.error(f"[RESOURCE] Error creating book: {str(e)}", exc_info=True)
+        logger.error("[RESOURCE] Error creating book: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
-    
+
+
+def _parse_bulk_body(body: bytes, content_type: str) -> list:
+    """Aceita um array JSON ou NDJSON (um objeto por linha)"""
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            return [loads(line) for line in body.splitlines() if line.strip()]
+        items = loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of books or NDJSON")
+    return items
+
+
+@router.post(
+    path="/bulk",
+    description="Create many books in one transaction. The body is a JSON array of books or NDJSON "
+                "(`Content-Type: application/x-ndjson`). If any item is invalid nothing is inserted "
+                "and the errors are reported per item index.",
+    summary="Bulk Create Books",
+    status_code=201,
+    responses={422: {"model": BulkCreateBooksErrorResponse}}
+)
+async def create_books(request: Request, book_service: BookService = Depends(get_book_service)) -> BulkCreateBooksResponse:
+    logger.debug("[RESOURCE] Received request to bulk create books")
+
+    items = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} books per request")
+
+    book_requests = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            book_requests.append(CreateBookRequest.model_validate(item))
+        except ValidationError as e:
+            errors.append(BulkItemError(index=index, errors=e.errors(include_url=False, include_context=False)))
+
+    if errors:
+        logger.debug("[RESOURCE] Bulk create rejected: %s invalid items", len(errors))
+        content = BulkCreateBooksErrorResponse(detail=f"{len(errors)} invalid items", errors=errors)
+        return _json_response(content, status_code=422)
+
+    try:
+        created = await book_service.create_books(book_requests)
+        logger.debug("[RESOURCE] %s books created successfully", created.createdCount)
+        return _json_response(created, status_code=201)
+    except PROPAGATED_ERRORS:
+        raise
+    except Exception as e:
+        logger.error("[RESOURCE] Error bulk creating books: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    path="/batch-get",
+    description="Get many books by ID in a single query. Books come back in the order of `ids` "
+                "(duplicates collapsed) and ids that do not exist are listed in `missingIds`.",
+    summary="Batch Get Books",
+    status_code=200
+)
+async def batch_get_books(request: BatchGetBooksRequest,
+                          book_service: BookService = Depends(get_read_book_service)) -> BatchGetBooksResponse:
+    logger.debug("[RESOURCE] Received request to get %s books by ID", len(request.ids))
+    if len(request.ids) > BATCH_GET_MAX_IDS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_GET_MAX_IDS} ids per request")
+
+    try:
+        books = await book_service.get_books_by_ids(request.ids)
+        return _json_response(books)
+    except PROPAGATED_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get(
+    path="/export",
+    description="Stream the whole catalog as NDJSON or CSV. `updated_since` restricts the export "
+                "to books changed at or after that timestamp (incremental sync).",
+    summary="Export Books",
+    status_code=200,
+    response_class=StreamingResponse
+)
+async def export_books(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    updated_since: datetime.datetime | None = None,
+    book_service: BookService = Depends(get_read_book_service)
+):
+    logger.debug("[RESOURCE] Received request to export books as %s", format)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        book_service.export_books(format, updated_since),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'}
+    )
+
+
+@router.get(
+    path="/stats",
+    description="Catalog statistics: totals, and books, copies and available books per gender and for the "
+                "`limit` largest authors and publishers. Served from counters kept up to date on every "
+                "write, so the cost does not grow with the number of books.",
+    summary="Catalog Statistics",
+    status_code=200,
+    responses={503: {"description": "The statistics migration was not applied"}}
+)
+async def get_stats(limit: int = Query(default=10, ge=1, le=1000),
+                    book_service: BookService = Depends(get_read_book_service)) -> BookStatsResponse:
+    logger.debug("[RESOURCE] Received request for catalog statistics")
+    try:
+        return _json_response(await book_service.get_stats(limit))
+    except PROPAGATED_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _change_events(subscription: Subscription) -> AsyncIterator[bytes]:
+    """Formata os eventos da assinatura como Server-Sent Events, com keepalive nos intervalos"""
+    try:
+        # Reconexão do EventSource em 1s; também envia os headers logo de início
+        yield b"retry: 1000\n\n"
+        while True:
+            change = await subscription.get(CHANGE_FEED_HEARTBEAT_SECONDS)
+            if subscription.resync:
+                yield b"event: resync\ndata: {}\n\n"
+                return
+            if change is None:
+                yield b": keepalive\n\n"
+                continue
+            yield b"event: change\ndata: " + dumps(BookMapper.to_change_payload(change)) + b"\n\n"
+    finally:
+        change_feed.unsubscribe(subscription)
+
+
+@router.get(
+    path="/changes",
+    description="Stream book changes as Server-Sent Events. Each `change` event carries the book `id`, the "
+                "`operation` (create, update or delete) and the new `updated_in`. A `resync` event ends the "
+                "stream when events were lost (slow consumer or database reconnect): re-read what changed with "
+                "`GET /books/export?updated_since=...` and subscribe again.",
+    summary="Book Change Feed",
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={503: {"description": "Too many subscribers on this worker"}}
+)
+async def book_changes():
+    if not CHANGE_FEED_ENABLED:
+        raise HTTPException(status_code=404, detail="Change feed is disabled")
+    # Sem dependência do BookService: a assinatura não segura conexão do pool
+    subscription = change_feed.subscribe()
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Too many change feed subscribers", headers={"Retry-After": "5"})
+
+    logger.debug("[RESOURCE] Change feed subscriber connected")
+    return StreamingResponse(
+        _change_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 @router.get(
     path="/{book_id}",
-    description="Get a book by its ID",
+    description="Get a book by its ID. The response carries `ETag` and `Last-Modified`; send them back "
+                "in `If-None-Match` / `If-Modified-Since` to get 304 when the book did not change.",
     summary="Get Book by ID",
-    status_code=200
+    status_code=200,
+    responses={304: {"description": "The book did not change since the given validator"}}
 )
-async def get_book(book_id: int, book_service: BookService = Depends(get_book_service)) -> BookResponse:
+async def get_book(book_id: int,
+                   if_none_match: str | None = Header(default=None),
+                   if_modified_since: str | None = Header(default=None),
+                   book_service: BookService = Depends(get_read_book_service)) -> BookResponse:
     try: 
         book = await book_service.get_book_by_id(book_id)
-        return book
+        if book.updated_in is None:
+            return _json_response(BookMapper.to_response(book))
+        # ETag e Last-Modified vêm do livro do domínio: um 304 não chega a montar o BookResponse
+        return _conditional_response(
+            lambda: BookMapper.to_response(book), BookMapper.to_etag(book.updated_in), HTTP_CACHE_CONTROL_BOOK,
+            book.updated_in, if_none_match, if_modified_since
+        )
+    except PROPAGATED_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 
 @router.get(
     path="/",
-    description="Get a list of books with pagination",
+    description="Get a list of books with pagination. Pass the `nextCursor` of a page as `cursor` "
+                "to seek past it (keyset pagination); `count` controls how `totalCount` is computed. "
+                "`author`, `publisher`, `gender` and `publication_year` match exactly, `title` matches "
+                "a substring and `q` searches title and author. The page carries a weak `ETag`; send it "
+                "back in `If-None-Match` to get 304 when no book on the page changed.",
     summary="List Books",
-    status_code=200
+    status_code=200,
+    responses={304: {"description": "The page did not change since the given ETag"}}
 )    
 async def get_books(
-    limit: int | None = 10,
-    offset: int | None = 0,
-    book_service: BookService = Depends(get_book_service)
+    limit: int = Query(default=10, ge=1),
+    offset: int = Query(default=0, ge=0),
+    cursor: str | None = None,
+    count: Literal["exact", "estimated", "none"] = "exact",
+    author: str | None = None,
+    title: str | None = None,
+    publisher: str | None = None,
+    gender: str | None = None,
+    publication_year: int | None = None,
+    q: str | None = Query(default=None, min_length=3),
+    if_none_match: str | None = Header(default=None),
+    book_service: BookService = Depends(get_read_book_service)
 ) -> ListBooksResponse:
     try:
-        books_response = await book_service.get_books(limit, offset)
-        return books_response
+        filters = BookFilters(
+            author=author, title=title, publisher=publisher, gender=gender,
+            publication_year=publication_year, q=q
+        )
+        books_response = await book_service.get_books(
+            limit, offset, cursor, count, None if filters.is_empty() else filters
+        )
+        # Sem Last-Modified: uma exclusão muda a página sem aumentar o maior updated_in dela
+        return _conditional_response(
+            lambda: books_response, BookMapper.to_list_etag(books_response), HTTP_CACHE_CONTROL_LIST,
+            if_none_match=if_none_match
+        )
+    except PROPAGATED_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 
 @router.patch(
     path="/{book_id}",
-    description="Update a book by its ID",
+    description="Update only the fields sent for a book. Send the book ETag in `If-Match` to fail "
+                "with 412 instead of overwriting a concurrent change.",
     summary="Update Book by ID",
-    status_code=200
+    status_code=200,
+    responses={412: {"description": "The book was modified since the given ETag"}}
 )
 async def update_book(book_id: int, 
                       request: UpdateBookRequest, 
+                      if_match: str | None = Header(default=None),
+                      book_service: BookService = Depends(get_book_service)) -> BookResponse:
+    logger.debug("[RESOURCE] Received request to update book with ID: %s", book_id)
+    try:
+        expected_version = None if if_match is None or if_match.strip() == "*" else if_match
+        updated_book = await book_service.update_book(book_id, request, expected_version)
+        logger.debug("[RESOURCE] Book with ID: %s updated successfully", book_id)
+        return _json_response(updated_book, headers={"ETag": BookMapper.to_etag(updated_book.updated_in)})
+    except PROPAGATED_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    path="/{book_id}/checkout",
+    description="Check out `quantity` copies of a book in one atomic update. Fails with 409 instead "
+                "of letting the stock go below zero; `available` follows the remaining copies.",
+    summary="Check Out Book",
+    status_code=200,
+    responses={409: {"description": "Not enough copies in stock"}}
+)
+async def checkout_book(book_id: int,
+                        quantity: int = Query(default=1, ge=1),
+                        book_service: BookService = Depends(get_book_service)) -> BookResponse:
+    logger.debug("[RESOURCE] Received request to check out book with ID: %s", book_id)
+    try:
+        book = await book_service.checkout_book(book_id, quantity)
+        return _json_response(book, headers={"ETag": BookMapper.to_etag(book.updated_in)})
+    except PROPAGATED_ERRORS:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    path="/{book_id}/return",
+    description="Return `quantity` copies of a book in one atomic update.",
+    summary="Return Book",
+    status_code=200
+)
+async def return_book(book_id: int,
+                      quantity: int = Query(default=1, ge=1),
                       book_service: BookService = Depends(get_book_service)) -> BookResponse:
-    logger.info(f"[RESOURCE] Received request to update book with ID: {book_id}")
+    logger.debug("[RESOURCE] Received request to return book with ID: %s", book_id)
     try:
-        updated_book = await book_service.update_book(book_id, request)
-        logger.info(f"[RESOURCE] Book with ID: {book_id} updated successfully")
-        return updated_book
+        book = await book_service.return_book(book_id, quantity)
+        return _json_response(book, headers={"ETag": BookMapper.to_etag(book.updated_in)})
+    except PROPAGATED_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -82,10 +406,12 @@ async def update_book(book_id: int,
     status_code=204
 )
 async def delete_book(book_id: int, book_service: BookService = Depends(get_book_service)):
-    logger.info(f"[RESOURCE] Received request to delete book with ID: {book_id}")
+    logger.debug("[RESOURCE] Received request to delete book with ID: %s", book_id)
     try:
         await book_service.delete_book(book_id)
-        logger.info(f"[RESOURCE] Book with ID: {book_id} deleted successfully")
+        logger.debug("[RESOURCE] Book with ID: %s deleted successfully", book_id)
+    except PROPAGATED_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))        
 
@@ -0,0 +1,43 @@
+import logging
+import psycopg2
+from psycopg2 import errors
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from config import ADMISSION_RETRY_AFTER
+from database.connection_pool import PoolTimeout
+from database.statement_timeout import DeadlineExceeded
+from observability.metrics import requests_shed_total
+
+logger = logging.getLogger(__name__)
+
+# Erros que as rotas deixam passar em vez de transformar em 500: os de sobrecarga viram 503/504 aqui
+PROPAGATED_ERRORS = (HTTPException, PoolTimeout, DeadlineExceeded, psycopg2.OperationalError)
+
+
+def _overload_response(request: Request, status_code: int, reason: str, detail: str) -> JSONResponse:
+    route_class = getattr(request.state, "route_class", "unclassified")
+    requests_shed_total.inc(route_class, reason)
+    logger.warning("[RESOURCE] %s %s failed under load (%s): %s", request.method, request.url.path, reason, detail)
+    headers = {"Retry-After": str(ADMISSION_RETRY_AFTER)} if status_code == 503 else None
+    return JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+
+
+async def _pool_timeout(request: Request, exc: PoolTimeout) -> JSONResponse:
+    return _overload_response(request, 503, "pool_timeout", "No database connection available, retry later")
+
+
+async def _deadline_exceeded(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    return _overload_response(request, 504, "deadline", "Request deadline exceeded")
+
+
+async def _operational_error(request: Request, exc: psycopg2.OperationalError) -> JSONResponse:
+    # QueryCanceled: o statement_timeout derivado do prazo da requisição cancelou a query
+    if isinstance(exc, errors.QueryCanceled):
+        return _overload_response(request, 504, "statement_timeout", "Database query exceeded the request deadline")
+    return _overload_response(request, 503, "database_unavailable", "Database is unavailable, retry later")
+
+
+def register_error_handlers(app: FastAPI) -> None:
+    app.add_exception_handler(PoolTimeout, _pool_timeout)
+    app.add_exception_handler(DeadlineExceeded, _deadline_exceeded)
+    app.add_exception_handler(psycopg2.OperationalError, _operational_error)
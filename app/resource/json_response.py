@@ -0,0 +1,18 @@
+from fastapi import Response
+from pydantic import BaseModel
+from serialization.json_codec import dumps
+
+
+class FastJSONResponse(Response):
+    """Resposta JSON sem o jsonable_encoder do FastAPI.
+
+    Modelos pydantic usam ``model_dump_json`` (serializador em Rust do pydantic); o resto
+    (dicts com dataclasses do domínio, listas) vai direto para o orjson.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        return dumps(content)
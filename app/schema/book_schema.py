@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+import datetime
 
 class CreateBookRequest(BaseModel):
     title: str
@@ -28,9 +29,44 @@ class BookResponse(BaseModel):
     gender: str
     quantity_copies: int
     available: bool
+    updated_in: Optional[datetime.datetime] = None
 
 class ListBooksResponse(BaseModel):
     books: list[BookResponse]
-    totalCount: int
+    totalCount: Optional[int] = None
     limit: int
-    offset: int        
\ No newline at end of file
+    offset: Optional[int] = None
+    nextCursor: Optional[str] = None
+
+class BulkItemError(BaseModel):
+    index: int
+    errors: list[dict]
+
+class BulkCreateBooksResponse(BaseModel):
+    ids: list[int]
+    createdCount: int
+
+class BulkCreateBooksErrorResponse(BaseModel):
+    detail: str
+    errors: list[BulkItemError]
+
+class BatchGetBooksRequest(BaseModel):
+    ids: list[int]
+
+class BatchGetBooksResponse(BaseModel):
+    books: list[BookResponse]
+    missingIds: list[int]
+
+class StatsTotalsResponse(BaseModel):
+    books: int
+    copies: int
+    availableBooks: int
+
+class StatsGroupResponse(StatsTotalsResponse):
+    value: str
+
+class BookStatsResponse(BaseModel):
+    totals: StatsTotalsResponse
+    byGender: list[StatsGroupResponse]
+    byAuthor: list[StatsGroupResponse]
+    byPublisher: list[StatsGroupResponse]
\ No newline at end of file
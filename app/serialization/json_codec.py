@@ -0,0 +1,38 @@
+"""Serialização JSON rápida: orjson quando instalado, json da biblioteca padrão como alternativa.
+
+As duas saídas são iguais às do pydantic para os tipos usados nas respostas (dataclasses
+do domínio, datetime sem fuso, modelos pydantic), então trocar o caminho não muda o JSON.
+"""
+import dataclasses
+import datetime
+import json
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if dataclasses.is_dataclass(value):
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        # Dataclasses e datetime são serializados nativamente (em Rust), sem passar pelo default
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data: bytes | str):
+    """orjson.JSONDecodeError herda de json.JSONDecodeError: quem chama trata os dois do mesmo jeito"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,100 +1,244 @@
-from schema.book_schema import CreateBookRequest, BookResponse, ListBooksResponse, UpdateBookRequest
-from dataprovider.book_provider import BookDataProvider
+from typing import AsyncIterator
+from fastapi import HTTPException
+from schema.book_schema import (
+    CreateBookRequest, BookResponse, UpdateBookRequest, BulkCreateBooksResponse
+)
+from dataprovider.book_storage import BookStorage
+from domain.book import Book
+from domain.book_filters import BookFilters
+from cache.book_cache import book_cache
+from cache.book_loader import book_loader
+from dataprovider.book_group_commit import book_group_commit
+from observability.metrics import stage_duration_seconds
+from observability.request_context import timed
+from config import BULK_INSERT_BATCH_SIZE, EXPORT_CHUNK_SIZE
 from mapper.book_mapper import BookMapper
+from serialization.json_codec import dumps
+import csv
+import datetime
+import io
 import logging
 
 logger = logging.getLogger(__name__)
 
 class BookService:
-    def __init__(self, connection_db):
-        self.connection_db = connection_db
+    def __init__(self, storage: BookStorage, use_cache: bool = True):
+        self.storage = storage
+        self.use_cache = use_cache
         logger.debug("[SERVICE] BookService initialized")
 
+    @timed("service")
     async def create_book(self, request: CreateBookRequest) -> BookResponse:
-        logger.info("[SERVICE] Starting book creation process")
-        logger.debug(f"[SERVICE] Request data: {request}")
+        logger.debug("[SERVICE] Starting book creation process")
+        logger.debug("[SERVICE] Request data: %s", request)
         
-        logger.info("[SERVICE] Mapping request to domain object")
+        logger.debug("[SERVICE] Mapping request to domain object")
         book = BookMapper.to_request(request)
-        logger.debug(f"[SERVICE] Domain object created: {book}")
+        logger.debug("[SERVICE] Domain object created: %s", book)
         
-        logger.info("[SERVICE] Calling DataProvider to persist book")
-        created_book = await BookDataProvider.create_book(self.connection_db, book)
-        logger.info(f"[SERVICE] Book persisted with ID: {created_book.id}")
+        logger.debug("[SERVICE] Calling storage to persist book")
+        created_book = await book_group_commit.create(book, self.storage)
+        book_cache.invalidate(created_book.id)
+        logger.debug("[SERVICE] Book persisted with ID: %s", created_book.id)
         
-        logger.info("[SERVICE] Mapping domain object to response")
+        logger.debug("[SERVICE] Mapping domain object to response")
         response = BookMapper.to_response(created_book)
-        logger.info("[SERVICE] Book creation completed successfully")
+        logger.debug("[SERVICE] Book creation completed successfully")
         
         return response
     
-    async def get_book_by_id(self, book_id: int) -> BookResponse:
-        logger.info(f"[SERVICE] Fetching book with ID: {book_id}")
+    @timed("service")
+    async def create_books(self, requests: list[CreateBookRequest]) -> BulkCreateBooksResponse:
+        logger.debug("[SERVICE] Starting bulk creation of %s books", len(requests))
+
+        books = [BookMapper.to_request(request) for request in requests]
+        ids = await self.storage.create_books(books, BULK_INSERT_BATCH_SIZE)
+        for book_id in ids:
+            book_cache.invalidate(book_id)
+
+        logger.debug("[SERVICE] Bulk creation completed successfully: %s books", len(ids))
+        return BulkCreateBooksResponse(ids=ids, createdCount=len(ids))
+
+    @timed("service")
+    async def get_book_by_id(self, book_id: int) -> Book:
+        """Devolve o livro do domínio: a rota decide o 304 pelo updated_in antes de montar o corpo"""
+        logger.debug("[SERVICE] Fetching book with ID: %s", book_id)
         
         try:
-            book = await BookDataProvider.get_book_by_id(self.connection_db, book_id)
-            logger.info(f"[SERVICE] Book fetched: ID={book.id}, Title={book.title}")
-            
-            response = BookMapper.to_response(book)
-            logger.info("[SERVICE] Book retrieval completed successfully")
-            
-            return response
+            if self.use_cache:
+                book = await book_cache.get_or_load(
+                    book_id, lambda: book_loader.load(book_id, self.storage)
+                )
+            else:
+                book = await self.storage.get_book_by_id(book_id)
+            logger.debug("[SERVICE] Book fetched: ID=%s, Title=%s", book.id, book.title)
+            return book
+        except HTTPException as e:
+            logger.debug("[SERVICE] Book ID %s not fetched: %s", book_id, e.detail)
+            raise
         except Exception as e:
-            logger.error(f"[SERVICE] Error fetching book: {str(e)}", exc_info=True)
+            logger.error("[SERVICE] Error fetching book: %s", e, exc_info=True)
             raise
 
 
-    async def get_books(self, limit: int, offset: int) -> ListBooksResponse:
+    @timed("service")
+    async def get_books_by_ids(self, ids: list[int]) -> dict:
+        logger.debug("[SERVICE] Fetching %s books by ID", len(ids))
+
+        # Ids repetidos viram um só; a resposta segue a ordem do pedido
+        unique_ids = list(dict.fromkeys(ids))
+        books = await self.storage.get_books_by_ids(unique_ids) if unique_ids else []
+        by_id = {book.id: book for book in books}
+
+        with stage_duration_seconds.time("mapper"):
+            response = BookMapper.to_batch_response(
+                [by_id[book_id] for book_id in unique_ids if book_id in by_id],
+                [book_id for book_id in unique_ids if book_id not in by_id]
+            )
+        logger.debug("[SERVICE] %s books found, %s missing", len(response["books"]), len(response["missingIds"]))
+        return response
+
+    @timed("service")
+    async def get_books(self, limit: int, offset: int, cursor: str | None = None,
+                        count_mode: str = "exact", filters: BookFilters | None = None) -> dict:
         try:
-            logger.info("[SERVICE] Fetching list of books")
+            logger.debug("[SERVICE] Fetching list of books")
 
-            books, total_count = await BookDataProvider.get_books(self.connection_db, limit, offset)
-            logger.info(f"[SERVICE] {len(books)} books fetched, Total count: {total_count}")
-            
-            book_responses = [BookMapper.to_response(book) for book in books]
-            response = ListBooksResponse(
-                books=book_responses,
-                totalCount=total_count,
-                limit=limit,
-                offset=offset
+            after_id = None
+            if cursor:
+                try:
+                    after_id = BookMapper.from_cursor(cursor)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+
+            books, total_count, has_more = await self.storage.get_books(
+                limit, offset, after_id, count_mode, filters
             )
-            logger.info("[SERVICE] Book list retrieval completed successfully")
+            logger.debug("[SERVICE] %s books fetched, Total count: %s", len(books), total_count)
+
+            with stage_duration_seconds.time("mapper"):
+                response = BookMapper.to_list_response(
+                    books,
+                    total_count,
+                    limit,
+                    None if cursor else offset,
+                    BookMapper.to_cursor(books[-1]) if has_more and books else None
+                )
+            logger.debug("[SERVICE] Book list retrieval completed successfully")
             return response
+        except HTTPException as e:
+            logger.debug("[SERVICE] Book list not fetched: %s", e.detail)
+            raise
         except Exception as e:
-            logger.error(f"[SERVICE] Error fetching book list: {str(e)}", exc_info=True)
+            logger.error("[SERVICE] Error fetching book list: %s", e, exc_info=True)
             raise
 
-    async def update_book(self, book_id: int, request: UpdateBookRequest) -> BookResponse:
-        logger.info(f"[SERVICE] Starting update process for book ID: {book_id}")
-        logger.debug(f"[SERVICE] Update request data: {request}")
+    async def export_books(self, export_format: str,
+                           updated_since: datetime.datetime | None = None) -> AsyncIterator[bytes]:
+        """Gera o catálogo em NDJSON ou CSV, um bloco de EXPORT_CHUNK_SIZE livros por vez"""
+        logger.debug("[SERVICE] Starting %s export (updated_since=%s)", export_format, updated_since)
+        fields = BookMapper.COLUMNS
+        exported = 0
+
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+            yield buffer.getvalue().encode()
+
+        async for books in self.storage.iter_books(EXPORT_CHUNK_SIZE, updated_since):
+            if export_format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(BookMapper.to_export_row(book) for book in books)
+                chunk = buffer.getvalue().encode()
+            else:
+                # Os campos de Book são as colunas exportadas, na mesma ordem
+                chunk = b"".join(dumps(book) + b"\n" for book in books)
+            exported += len(books)
+            yield chunk
+
+        logger.debug("[SERVICE] Export completed successfully: %s books", exported)
+
+    @timed("service")
+    async def update_book(self, book_id: int, request: UpdateBookRequest,
+                          expected_version: str | None = None) -> BookResponse:
+        logger.debug("[SERVICE] Starting update process for book ID: %s", book_id)
+        logger.debug("[SERVICE] Update request data: %s", request)
         
         try:
-            logger.info("[SERVICE] Fetching existing book from DataProvider")
-            existing_book = await BookDataProvider.get_book_by_id(self.connection_db, book_id)
-            logger.info(f"[SERVICE] Existing book fetched: ID={existing_book.id}, Title={existing_book.title}")
-            
-            logger.info("[SERVICE] Updating book fields")
-            for field, value in request.model_dump(exclude_unset=True).items():
-                setattr(existing_book, field, value)
-            logger.debug(f"[SERVICE] Updated domain object: {existing_book}")
-            
-            logger.info("[SERVICE] Persisting updated book via DataProvider")
-            updated_book = await BookDataProvider.update_book(self.connection_db, existing_book)
-            logger.info(f"[SERVICE] Book updated successfully: ID={updated_book.id}")
+            expected_updated_in = None
+            if expected_version is not None:
+                try:
+                    expected_updated_in = BookMapper.from_etag(expected_version)
+                except ValueError:
+                    raise HTTPException(status_code=412, detail=f"Book with ID {book_id} does not match If-Match")
+
+            fields = request.model_dump(exclude_unset=True)
+            logger.debug("[SERVICE] Persisting fields %s via storage", sorted(fields))
+            try:
+                updated_book = await self.storage.update_book(
+                    book_id, fields, expected_updated_in
+                )
+            finally:
+                book_cache.invalidate(book_id)
+            logger.debug("[SERVICE] Book updated successfully: ID=%s", updated_book.id)
             
             response = BookMapper.to_response(updated_book)
-            logger.info("[SERVICE] Book update process completed successfully")
+            logger.debug("[SERVICE] Book update process completed successfully")
             return response
+        except HTTPException as e:
+            logger.debug("[SERVICE] Book ID %s not updated: %s", book_id, e.detail)
+            raise
         except Exception as e:
-            logger.error(f"[SERVICE] Error updating book: {str(e)}", exc_info=True)
+            logger.error("[SERVICE] Error updating book: %s", e, exc_info=True)
             raise  
 
+    @timed("service")
+    async def checkout_book(self, book_id: int, quantity: int = 1) -> BookResponse:
+        logger.debug("[SERVICE] Checking out %s copies of book ID: %s", quantity, book_id)
+        return await self._adjust_stock(book_id, -quantity)
+
+    @timed("service")
+    async def return_book(self, book_id: int, quantity: int = 1) -> BookResponse:
+        logger.debug("[SERVICE] Returning %s copies of book ID: %s", quantity, book_id)
+        return await self._adjust_stock(book_id, quantity)
+
+    async def _adjust_stock(self, book_id: int, delta: int) -> BookResponse:
+        try:
+            try:
+                book = await self.storage.adjust_stock(book_id, delta)
+            finally:
+                book_cache.invalidate(book_id)
+            logger.debug("[SERVICE] Book ID %s now has %s copies", book_id, book.quantity_copies)
+            return BookMapper.to_response(book)
+        except HTTPException as e:
+            logger.debug("[SERVICE] Stock of book ID %s not changed: %s", book_id, e.detail)
+            raise
+        except Exception as e:
+            logger.error("[SERVICE] Error adjusting stock: %s", e, exc_info=True)
+            raise
+
+    @timed("service")
     async def delete_book(self, book_id: int) -> None:
-        logger.info(f"[SERVICE] Starting deletion process for book ID: {book_id}")
+        logger.debug("[SERVICE] Starting deletion process for book ID: %s", book_id)
         
         try:
-            await BookDataProvider.delete_book(self.connection_db, book_id)
-            logger.info(f"[SERVICE] Book with ID: {book_id} deleted successfully")
+            try:
+                await self.storage.delete_book(book_id)
+            finally:
+                book_cache.invalidate(book_id)
+            logger.debug("[SERVICE] Book with ID: %s deleted successfully", book_id)
+        except HTTPException as e:
+            logger.debug("[SERVICE] Book ID %s not deleted: %s", book_id, e.detail)
+            raise
         except Exception as e:
-            logger.error(f"[SERVICE] Error deleting book: {str(e)}", exc_info=True)
-            raise    
\ No newline at end of file
+            logger.error("[SERVICE] Error deleting book: %s", e, exc_info=True)
+            raise    
+
+    @timed("service")
+    async def get_stats(self, limit: int) -> dict:
+        logger.debug("[SERVICE] Fetching catalog statistics (top %s)", limit)
+        stats = await self.storage.get_stats(limit)
+        with stage_duration_seconds.time("mapper"):
+            return BookMapper.to_stats_response(stats)
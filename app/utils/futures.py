@@ -0,0 +1,18 @@
+import asyncio
+
+
+def fail_future(future: asyncio.Future, error: BaseException) -> None:
+    """Entrega ``error`` a quem espera o future; CancelledError cancela em vez de virar exceção.
+
+    Future já resolvido fica como está: quem falha um lote inteiro não precisa saber quais
+    já receberam resultado.
+    """
+    if future.done():
+        return
+    if isinstance(error, asyncio.CancelledError):
+        future.cancel()
+    else:
+        future.set_exception(error)
+    # Marca a exceção como consumida para não gerar warning quando não há outros leitores
+    if not future.cancelled():
+        future.exception()
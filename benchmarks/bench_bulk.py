@@ -0,0 +1,78 @@
+"""Compara linhas/s inseridas por POST /books (uma a uma) e por POST /books/bulk.
+
+Atenção: insere livros de verdade no banco configurado.
+
+    python -m benchmarks.bench_bulk --rows 5000 --concurrency 16
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from benchmarks.common import http_client, write_results
+
+
+def make_book(index: int) -> dict:
+    return {
+        "title": f"Bench Book {index}",
+        "author": f"Author {index % 500}",
+        "publisher": f"Publisher {index % 50}",
+        "publication_year": 1950 + index % 75,
+        "gender": ("fiction", "science", "history", "poetry")[index % 4],
+        "quantity_copies": index % 10,
+        "available": index % 10 > 0,
+    }
+
+
+async def single_inserts(client, rows: int, concurrency: int) -> float:
+    counter = itertools.count()
+
+    async def worker():
+        while (index := next(counter)) < rows:
+            response = await client.post("/books/", json=make_book(index))
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def bulk_insert(client, rows: int, chunk: int, ndjson: bool) -> float:
+    start = time.perf_counter()
+    for first in range(0, rows, chunk):
+        books = [make_book(index) for index in range(first, min(first + chunk, rows))]
+        if ndjson:
+            body = "\n".join(json.dumps(book) for book in books)
+            response = await client.post("/books/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+        else:
+            response = await client.post("/books/bulk", json=books)
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def main(args) -> None:
+    async with http_client(args.base_url) as client:
+        results = []
+        single = await single_inserts(client, args.rows, args.concurrency)
+        results.append({"mode": "single", "rows": args.rows, "seconds": round(single, 4),
+                        "rows_per_second": round(args.rows / single, 1)})
+
+        for ndjson in (False, True):
+            elapsed = await bulk_insert(client, args.rows, args.chunk, ndjson)
+            results.append({"mode": "bulk-ndjson" if ndjson else "bulk-json", "rows": args.rows,
+                            "seconds": round(elapsed, 4), "rows_per_second": round(args.rows / elapsed, 1)})
+
+    for result in results:
+        print(f"{result['mode']:<12} {result['rows_per_second']:>12} rows/s")
+    write_results(args.output, "bulk", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Servidor já rodando; se omitido usa o app em processo")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes concorrentes no modo single")
+    parser.add_argument("--chunk", type=int, default=5000, help="Livros por requisição no modo bulk")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""Contenção no estoque: muitos clientes fazendo checkout do mesmo livro ao mesmo tempo.
+
+Cria um livro com ``--copies`` exemplares e dispara ``--concurrency`` clientes contra ele
+até o estoque acabar, depois devolve tudo. Mede checkouts/s e confere que nenhum
+exemplar foi vendido a mais (checkouts aceitos == copies, estoque final 0 e available false).
+
+Com ``--mode patch`` usa o caminho antigo (GET + PATCH com quantity_copies - 1), que perde
+atualizações sob concorrência, para comparação.
+
+Atenção: cria um livro de verdade no banco configurado.
+
+    python -m benchmarks.bench_checkout --copies 1000 --concurrency 64
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_bulk import make_book
+from benchmarks.common import http_client, summarize, write_results
+
+
+async def hammer(client, book_id: int, concurrency: int, path: str, limit: int | None = None) -> tuple[list, int]:
+    """Cada cliente repete a operação até receber 409 (ou até ``limit`` requisições no total)"""
+    latencies = []
+    conflicts = 0
+    issued = 0
+
+    async def worker():
+        nonlocal conflicts, issued
+        while limit is None or issued < limit:
+            issued += 1
+            start = time.perf_counter()
+            response = await client.post(f"/books/{book_id}/{path}")
+            if response.status_code == 409:
+                conflicts += 1
+                return
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, conflicts
+
+
+async def hammer_patch(client, book_id: int, concurrency: int) -> list:
+    """Leitura seguida de escrita pelo cliente: o caminho sujeito a perder atualizações"""
+    latencies = []
+
+    async def worker():
+        while True:
+            start = time.perf_counter()
+            book = (await client.get(f"/books/{book_id}")).json()
+            if book["quantity_copies"] <= 0:
+                return
+            quantity = book["quantity_copies"] - 1
+            response = await client.patch(f"/books/{book_id}",
+                                          json={"quantity_copies": quantity, "available": quantity > 0})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def main(args) -> None:
+    async with http_client(args.base_url) as client:
+        book = make_book(0) | {"title": "Bench Hot Book", "quantity_copies": args.copies, "available": True}
+        response = await client.post("/books/", json=book)
+        response.raise_for_status()
+        book_id = response.json()["id"]
+
+        start = time.perf_counter()
+        if args.mode == "patch":
+            latencies, conflicts = await hammer_patch(client, book_id, args.concurrency), 0
+        else:
+            latencies, conflicts = await hammer(client, book_id, args.concurrency, "checkout")
+        checkout = summarize(latencies, time.perf_counter() - start)
+        after_checkout = (await client.get(f"/books/{book_id}")).json()
+
+        results = {
+            "mode": args.mode,
+            "copies": args.copies,
+            "concurrency": args.concurrency,
+            "checkout": checkout,
+            "accepted": len(latencies),
+            "oversold": len(latencies) - args.copies,
+            "rejected": conflicts,
+            "stock_after_checkout": after_checkout["quantity_copies"],
+            "available_after_checkout": after_checkout["available"],
+        }
+
+        if args.mode == "checkout":
+            start = time.perf_counter()
+            latencies, _ = await hammer(client, book_id, args.concurrency, "return", limit=args.copies)
+            results["return"] = summarize(latencies, time.perf_counter() - start)
+            results["stock_after_return"] = (await client.get(f"/books/{book_id}")).json()["quantity_copies"]
+
+        await client.delete(f"/books/{book_id}")
+
+    correct = (results["oversold"] == 0 and results["stock_after_checkout"] == 0
+               and not results["available_after_checkout"]
+               and results.get("stock_after_return", args.copies) == args.copies)
+    results["correct"] = correct
+    print(f"{args.mode}: {results['accepted']} accepted for {args.copies} copies "
+          f"({checkout['rps']} req/s, p99 {checkout['p99_ms']} ms) -> {'OK' if correct else 'OVERSOLD/INCONSISTENT'}")
+    write_results(args.output, "checkout", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Servidor já rodando; se omitido usa o app em processo")
+    parser.add_argument("--copies", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--mode", choices=("checkout", "patch"), default="checkout")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+"""Mede o throughput de GET /books/{id} com diferentes números de clientes concorrentes.
+
+Com DB_EXECUTION_MODE=threadpool o throughput deve crescer com a concorrência;
+com DB_EXECUTION_MODE=inline as requisições ficam serializadas no event loop.
+
+    python -m benchmarks.bench_concurrency --levels 1,4,16,64 --requests 2000
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from benchmarks.common import http_client, summarize, write_results
+
+
+async def run_level(client, concurrency: int, total: int, ids: list[int]) -> dict:
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+    id_cycle = itertools.cycle(ids)
+
+    async def worker():
+        nonlocal errors
+        while next(counter) < total:
+            start = time.perf_counter()
+            response = await client.get(f"/books/{next(id_cycle)}")
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, time.perf_counter() - start, errors)
+    result["concurrency"] = concurrency
+    return result
+
+
+async def main(args) -> None:
+    levels = [int(level) for level in args.levels.split(",")]
+    async with http_client(args.base_url) as client:
+        listing = (await client.get("/books/", params={"limit": args.ids})).json()
+        ids = [book["id"] for book in listing["books"]] or [1]
+
+        results = []
+        for concurrency in levels:
+            result = await run_level(client, concurrency, args.requests, ids)
+            print(f"concurrency={concurrency:<4} rps={result['rps']:<10} p50={result['p50_ms']}ms p99={result['p99_ms']}ms")
+            results.append(result)
+
+    write_results(args.output, "concurrency", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Servidor já rodando; se omitido usa o app em processo")
+    parser.add_argument("--levels", default="1,2,4,8,16,32")
+    parser.add_argument("--requests", type=int, default=1000, help="Requisições por nível de concorrência")
+    parser.add_argument("--ids", type=int, default=100, help="Quantidade de livros distintos consultados")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    asyncio.run(main(parser.parse_args()))
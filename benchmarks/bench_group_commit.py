@@ -0,0 +1,90 @@
+"""Compara POST /books com um COMMIT por requisição e com group commit (GROUP_COMMIT_WINDOW_MS).
+
+Em processo, cada janela de --windows é aplicada ao app antes da rodada (0 = um COMMIT por
+requisição). Com --base-url a janela é a do servidor: rode uma vez com GROUP_COMMIT_WINDOW_MS=0
+e outra com a janela desejada e compare os dois JSON com benchmarks.compare.
+
+Atenção: insere livros de verdade no banco configurado.
+
+    python -m benchmarks.bench_group_commit --rows 5000 --concurrency 64 --windows 0,2,5
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from benchmarks.bench_bulk import make_book
+from benchmarks.common import http_client, summarize, write_results
+
+
+async def create_books(client, rows: int, concurrency: int) -> dict:
+    counter = itertools.count()
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (index := next(counter)) < rows:
+            start = time.perf_counter()
+            response = await client.post("/books/", json=make_book(index))
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def group_commit_stats(client) -> dict:
+    response = await client.get("/health/storage")
+    response.raise_for_status()
+    return response.json()["group_commit"]
+
+
+async def main(args) -> None:
+    windows = [float(window) for window in args.windows.split(",")]
+    async with http_client(args.base_url) as client:
+        if args.base_url:
+            windows = [None]
+        else:
+            from dataprovider.book_group_commit import book_group_commit
+
+        results = []
+        for window in windows:
+            if window is not None:
+                book_group_commit.window = window / 1000
+                book_group_commit.max_batch = args.max_batch
+            before = await group_commit_stats(client)
+            summary = await create_books(client, args.rows, args.concurrency)
+            after = await group_commit_stats(client)
+
+            commits = after["commits"] - before["commits"]
+            results.append({
+                "window_ms": after["window_ms"],
+                "max_batch": after["max_batch"],
+                "concurrency": args.concurrency,
+                **summary,
+                # Com a janela em 0 cada requisição faz o seu próprio COMMIT
+                "books_per_commit": round((after["grouped_books"] - before["grouped_books"]) / commits, 2)
+                if commits else 1.0,
+                "fallbacks": after["fallbacks"] - before["fallbacks"],
+            })
+
+    for result in results:
+        print(f"window {result['window_ms']:>6} ms  {result['rps']:>10} rows/s  "
+              f"p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  "
+              f"{result['books_per_commit']:>6} books/commit  {result['errors']} errors")
+    write_results(args.output, "group_commit", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Servidor já rodando; se omitido usa o app em processo")
+    parser.add_argument("--rows", type=int, default=5000, help="Livros criados em cada rodada")
+    parser.add_argument("--concurrency", type=int, default=64, help="Clientes concorrentes")
+    parser.add_argument("--windows", default="0,2,5", help="Janelas em ms, só em processo (0 = sem group commit)")
+    parser.add_argument("--max-batch", type=int, default=64, help="Livros por grupo, só em processo")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    asyncio.run(main(parser.parse_args()))
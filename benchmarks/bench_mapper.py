@@ -0,0 +1,106 @@
+"""Microbenchmarks do BookMapper: caminho atual contra o caminho antigo (dict row + revalidação do FastAPI).
+
+Não precisa de banco.
+
+    python -m benchmarks.bench_mapper --page-size 100
+"""
+import argparse
+import dataclasses
+import datetime
+import json
+import timeit
+
+from benchmarks.common import setup_app_path, write_results
+
+setup_app_path()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from domain.book import Book  # noqa: E402
+from mapper.book_mapper import BookMapper  # noqa: E402
+from schema.book_schema import BookResponse, ListBooksResponse  # noqa: E402
+
+
+@dataclasses.dataclass
+class LegacyBook:
+    id: int
+    title: str
+    author: str
+    publisher: str
+    publication_year: int
+    gender: str
+    quantity_copies: int
+    available: bool
+    updated_in: datetime.datetime
+
+
+def make_rows(count: int) -> list[tuple]:
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        (i, f"Title {i}", f"Author {i % 100}", f"Publisher {i % 10}", 1950 + i % 70, "fiction", i % 7, i % 7 > 0, now)
+        for i in range(1, count + 1)
+    ]
+
+
+def legacy_to_domain(row: dict) -> LegacyBook:
+    return LegacyBook(
+        id=row['id'], title=row['title'], author=row['author'], publisher=row['publisher'],
+        publication_year=row['publication_year'], gender=row['gender'],
+        quantity_copies=row['quantity_copies'], available=row['available'], updated_in=row['updated_in']
+    )
+
+
+def legacy_to_response(book) -> BookResponse:
+    return BookResponse(
+        id=book.id, title=book.title, author=book.author, publisher=book.publisher,
+        publication_year=book.publication_year, gender=book.gender,
+        quantity_copies=book.quantity_copies, available=book.available, updated_in=book.updated_in
+    )
+
+
+def legacy_page(dict_rows: list[dict]) -> bytes:
+    """Caminho antigo: RealDictCursor -> Book -> BookResponse -> dump + revalidação do FastAPI -> JSON"""
+    books = [legacy_to_domain(row) for row in dict_rows]
+    page = ListBooksResponse(books=[legacy_to_response(book) for book in books], totalCount=len(books), limit=len(books), offset=0)
+    revalidated = ListBooksResponse.model_validate(page.model_dump())
+    return json.dumps(jsonable_encoder(revalidated)).encode()
+
+
+def current_page(rows: list[tuple]) -> bytes:
+    books = [BookMapper.to_domain(row) for row in rows]
+    page = ListBooksResponse(
+        books=[BookMapper.to_response(book) for book in books], totalCount=len(books), limit=len(books), offset=0
+    )
+    return page.model_dump_json().encode()
+
+
+def bench(label: str, func, number: int) -> dict:
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{label:<32} {seconds * 1e6:>10.2f} us")
+    return {"name": label, "microseconds": round(seconds * 1e6, 3)}
+
+
+def main(args) -> None:
+    rows = make_rows(args.page_size)
+    columns = BookMapper.COLUMNS
+    dict_rows = [dict(zip(columns, row)) for row in rows]
+    book = BookMapper.to_domain(rows[0])
+    number = args.number
+
+    results = [
+        bench("to_domain (legacy dict row)", lambda: legacy_to_domain(dict_rows[0]), number),
+        bench("to_domain (tuple, slots)", lambda: BookMapper.to_domain(rows[0]), number),
+        bench("to_response", lambda: BookMapper.to_response(book), number),
+        bench("to_dict", lambda: BookMapper.to_dict(book), number),
+        bench("to_export_row", lambda: BookMapper.to_export_row(book), number),
+        bench(f"page of {args.page_size} (legacy)", lambda: legacy_page(dict_rows), max(1, number // args.page_size)),
+        bench(f"page of {args.page_size} (current)", lambda: current_page(rows), max(1, number // args.page_size)),
+    ]
+    write_results(args.output, "mapper", {"page_size": args.page_size, "timings": results})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--number", type=int, default=20000, help="Execuções por medição")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    main(parser.parse_args())
@@ -0,0 +1,90 @@
+"""Planos de execução e latência dos filtros mais comuns de GET /books.
+
+Para cada cenário roda EXPLAIN (ANALYZE, BUFFERS) da query gerada pelo BookDataProvider,
+mostrando quais nós o plano usou (ex.: Index Scan em books_author_id_idx), e mede a latência
+da rota HTTP. Rode depois de aplicar migrations/001_books_search_indexes.sql.
+
+    python -m benchmarks.bench_search --requests 200
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import http_client, setup_app_path, summarize, write_results
+
+setup_app_path()
+
+from config import create_connection  # noqa: E402
+from dataprovider.book_provider import BookDataProvider  # noqa: E402
+from domain.book_filters import BookFilters  # noqa: E402
+
+SCENARIOS = {
+    "author": {"author": "Author 42"},
+    "publisher": {"publisher": "Publisher 7"},
+    "gender": {"gender": "poetry"},
+    "publication_year": {"publication_year": 1999},
+    "gender+year": {"gender": "history", "publication_year": 1980},
+    "title substring": {"title": "Book 12"},
+    "q search": {"q": "Author 13"},
+}
+
+
+def plan_nodes(plan: dict) -> list[str]:
+    node = plan["Node Type"]
+    if "Index Name" in plan:
+        node += f" on {plan['Index Name']}"
+    nodes = [node]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain(conn, params: dict, limit: int) -> dict:
+    query, query_params = BookDataProvider._list_query(limit, 0, None, BookFilters(**params))
+    with conn.cursor() as cur:
+        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", query_params)
+        result = cur.fetchone()[0][0]
+    conn.rollback()
+    return {
+        "nodes": plan_nodes(result["Plan"]),
+        "planning_ms": result["Planning Time"],
+        "execution_ms": result["Execution Time"],
+    }
+
+
+async def measure(client, params: dict, requests: int, limit: int) -> dict:
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_start = time.perf_counter()
+        response = await client.get("/books/", params={**params, "limit": limit, "count": "estimated"})
+        latencies.append(time.perf_counter() - request_start)
+        if response.status_code != 200:
+            errors += 1
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def main(args) -> None:
+    conn = create_connection()
+    results = []
+    try:
+        async with http_client(args.base_url) as client:
+            for name, params in SCENARIOS.items():
+                plan = explain(conn, params, args.limit)
+                latency = await measure(client, params, args.requests, args.limit)
+                print(f"{name:<18} p50={latency['p50_ms']}ms p99={latency['p99_ms']}ms plan={' > '.join(plan['nodes'])}")
+                results.append({"scenario": name, "params": params, "plan": plan, "http": latency})
+    finally:
+        conn.close()
+
+    write_results(args.output, "search", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Servidor já rodando; se omitido usa o app em processo")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""Tempo de serialização e bytes enviados de uma página de GET /books por tamanho de página.
+
+Compara o caminho antigo (BookResponse + ListBooksResponse + model_dump_json) com o atual
+(dict do BookMapper com as dataclasses, serializado pelo FastJSONResponse) e mostra o
+tamanho do corpo sem compressão, com gzip e com brotli (se o pacote estiver instalado).
+Não precisa de banco.
+
+    python -m benchmarks.bench_serialization --page-sizes 10,100,1000
+"""
+import argparse
+import timeit
+import zlib
+
+from benchmarks.bench_mapper import make_rows
+from benchmarks.common import setup_app_path, write_results
+
+setup_app_path()
+
+from mapper.book_mapper import BookMapper  # noqa: E402
+from middleware.compression import brotli  # noqa: E402
+from resource.json_response import FastJSONResponse  # noqa: E402
+from schema.book_schema import ListBooksResponse  # noqa: E402
+from serialization.json_codec import orjson  # noqa: E402
+
+
+def best_of(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def gzip_size(body: bytes, level: int) -> int:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return len(compressor.compress(body) + compressor.flush())
+
+
+def run(page_size: int, args) -> dict:
+    books = [BookMapper.to_domain(row) for row in make_rows(page_size)]
+    number = max(1, args.number // page_size)
+
+    def legacy():
+        return ListBooksResponse(
+            books=[BookMapper.to_response(book) for book in books],
+            totalCount=page_size, limit=page_size, offset=0, nextCursor=None
+        ).model_dump_json().encode()
+
+    def current():
+        return FastJSONResponse(BookMapper.to_list_response(books, page_size, page_size, 0, None)).body
+
+    body = current()
+    result = {
+        "page_size": page_size,
+        "legacy_us": round(best_of(legacy, number) * 1e6, 2),
+        "current_us": round(best_of(current, number) * 1e6, 2),
+        "bytes": len(body),
+        "gzip_bytes": gzip_size(body, args.gzip_level),
+        "gzip_us": round(best_of(lambda: gzip_size(body, args.gzip_level), number) * 1e6, 2),
+    }
+    if brotli is not None:
+        result["br_bytes"] = len(brotli.compress(body, quality=args.brotli_quality))
+        result["br_us"] = round(best_of(lambda: brotli.compress(body, quality=args.brotli_quality), number) * 1e6, 2)
+    return result
+
+
+def main(args) -> None:
+    print(f"json backend: {'orjson' if orjson is not None else 'json (stdlib)'}; "
+          f"brotli: {'yes' if brotli is not None else 'not installed'}")
+    results = []
+    for page_size in (int(size) for size in args.page_sizes.split(",")):
+        result = run(page_size, args)
+        results.append(result)
+        line = (f"page {page_size:>5}: legacy {result['legacy_us']:>10.1f} us  current {result['current_us']:>10.1f} us"
+                f"  bytes {result['bytes']:>8}  gzip {result['gzip_bytes']:>7} ({result['gzip_us']:.1f} us)")
+        if "br_bytes" in result:
+            line += f"  br {result['br_bytes']:>7} ({result['br_us']:.1f} us)"
+        print(line)
+    write_results(args.output, "serialization", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-sizes", default="10,100,1000")
+    parser.add_argument("--number", type=int, default=20000, help="Livros serializados por medição")
+    parser.add_argument("--gzip-level", type=int, default=6)
+    parser.add_argument("--brotli-quality", type=int, default=4)
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    main(parser.parse_args())
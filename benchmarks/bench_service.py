@@ -0,0 +1,70 @@
+"""Microbenchmarks da camada de serviço (BookService + BookMapper + cache), sem banco.
+
+O serviço usa o armazenamento em memória (STORAGE_BACKEND=memory), então o tempo medido
+é só o custo de orquestração, mapeamento e cache.
+
+    python -m benchmarks.bench_service --page-size 100
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_mapper import make_rows
+from benchmarks.common import setup_app_path, write_results
+
+setup_app_path()
+
+from cache.book_cache import book_cache  # noqa: E402
+from dataprovider.memory_book_storage import InMemoryBookStorage  # noqa: E402
+from mapper.book_mapper import BookMapper  # noqa: E402
+from schema.book_schema import CreateBookRequest, UpdateBookRequest  # noqa: E402
+from service.book_service import BookService  # noqa: E402
+
+
+async def make_storage(rows: list[tuple]) -> InMemoryBookStorage:
+    storage = InMemoryBookStorage()
+    await storage.create_books([BookMapper.to_domain(row) for row in rows], len(rows))
+    return storage
+
+
+async def bench(label: str, func, number: int) -> dict:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        best = min(best, (time.perf_counter() - start) / number)
+    print(f"{label:<32} {best * 1e6:>10.2f} us")
+    return {"name": label, "microseconds": round(best * 1e6, 3)}
+
+
+async def main(args) -> None:
+    rows = make_rows(max(args.page_size, 10))
+    service = BookService(await make_storage(rows))
+    create = CreateBookRequest(title="t", author="a", publisher="p", publication_year=2000,
+                               gender="fiction", quantity_copies=1, available=True)
+    update = UpdateBookRequest(quantity_copies=3)
+    number = args.number
+
+    async def get_miss():
+        book_cache.invalidate(1)
+        await service.get_book_by_id(1)
+
+    await service.get_book_by_id(2)
+    results = [
+        await bench("get_book_by_id (cache miss)", get_miss, number),
+        await bench("get_book_by_id (cache hit)", lambda: service.get_book_by_id(2), number),
+        await bench(f"get_books ({args.page_size})", lambda: service.get_books(args.page_size, 0),
+                    max(1, number // args.page_size)),
+        await bench("create_book", lambda: service.create_book(create), number),
+        await bench("update_book", lambda: service.update_book(1, update), number),
+    ]
+    write_results(args.output, "service", {"page_size": args.page_size, "timings": results})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--number", type=int, default=5000, help="Execuções por medição")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    asyncio.run(main(parser.parse_args()))
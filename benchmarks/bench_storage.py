@@ -0,0 +1,98 @@
+"""Microbenchmarks do armazenamento em memória (InMemoryBookStorage) com muitas linhas.
+
+Carrega ``--rows`` livros e mede busca por id, páginas por offset e por cursor (keyset),
+filtros por índice e por trecho de texto. Com ``--memory`` mede também os bytes por livro
+(tracemalloc deixa a carga bem mais lenta).
+
+    python -m benchmarks.bench_storage --rows 1000000
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+from benchmarks.common import setup_app_path, write_results
+
+setup_app_path()
+
+from dataprovider.memory_book_storage import InMemoryBookStorage  # noqa: E402
+from domain.book import Book  # noqa: E402
+from domain.book_filters import BookFilters  # noqa: E402
+import datetime  # noqa: E402
+
+
+def make_books(count: int, start: int = 0) -> list[Book]:
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        Book(None, f"Title {i}", f"Author {i % 1000}", f"Publisher {i % 50}", 1950 + i % 70,
+             ("fiction", "poetry", "drama", "essay")[i % 4], i % 7, i % 7 > 0, now)
+        for i in range(start, start + count)
+    ]
+
+
+async def load(storage: InMemoryBookStorage, rows: int, batch: int = 100_000) -> None:
+    for start in range(0, rows, batch):
+        await storage.create_books(make_books(min(batch, rows - start), start), batch)
+
+
+async def bench(label: str, func, number: int) -> dict:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        best = min(best, (time.perf_counter() - start) / number)
+    print(f"{label:<36} {best * 1e6:>12.2f} us")
+    return {"name": label, "microseconds": round(best * 1e6, 3)}
+
+
+async def main(args) -> None:
+    storage = InMemoryBookStorage()
+    if args.memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    await load(storage, args.rows)
+    load_seconds = time.perf_counter() - start
+    bytes_per_row = None
+    if args.memory:
+        bytes_per_row = tracemalloc.get_traced_memory()[0] / args.rows
+        tracemalloc.stop()
+    print(f"load {args.rows} rows: {load_seconds:.2f}s"
+          + (f", {bytes_per_row:.0f} bytes/row" if bytes_per_row is not None else ""))
+
+    rng = random.Random(42)
+    size = args.page_size
+    middle = args.rows // 2
+    number = args.number
+    results = [
+        await bench("get_book_by_id", lambda: storage.get_book_by_id(rng.randint(1, args.rows)), number),
+        await bench(f"get_books first page ({size})", lambda: storage.get_books(size, 0), number),
+        await bench(f"get_books offset {middle}", lambda: storage.get_books(size, middle), number),
+        await bench(f"get_books after_id {middle}", lambda: storage.get_books(size, 0, middle), number),
+        await bench("filter author (index)",
+                    lambda: storage.get_books(size, 0, filters=BookFilters(author="Author 7")), number),
+        await bench("filter author+year (index+check)",
+                    lambda: storage.get_books(size, 0, filters=BookFilters(author="Author 7", publication_year=1957)),
+                    number),
+        await bench("filter q (scan, count=none)",
+                    lambda: storage.get_books(size, 0, count_mode="none", filters=BookFilters(q="title 99999")),
+                    max(1, number // 100)),
+        await bench("update_book (indexed column)",
+                    lambda: storage.update_book(rng.randint(1, args.rows), {"author": f"Author {rng.randint(0, 999)}"}),
+                    number),
+    ]
+    write_results(args.output, "storage", {
+        "rows": args.rows, "page_size": size, "load_seconds": round(load_seconds, 3),
+        "bytes_per_row": bytes_per_row, "timings": results,
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--number", type=int, default=1000, help="Execuções por medição")
+    parser.add_argument("--memory", action="store_true", help="Mede bytes por livro com tracemalloc")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    asyncio.run(main(parser.parse_args()))
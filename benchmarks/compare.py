@@ -0,0 +1,60 @@
+"""Compara dois resultados JSON dos benchmarks e aponta regressões.
+
+    python -m benchmarks.compare results/before.json results/after.json --threshold 10
+
+Sai com código 1 se alguma métrica piorou mais que --threshold por cento.
+"""
+import argparse
+import json
+import sys
+
+# Métricas em que um valor maior é melhor; as demais (latências, tempos) são "menor é melhor"
+HIGHER_IS_BETTER = ("rps", "rows_per_second")
+COMPARED = HIGHER_IS_BETTER + ("p50_ms", "p95_ms", "p99_ms", "microseconds", "seconds")
+
+
+def flatten(value, prefix: str = "") -> dict[str, float]:
+    metrics = {}
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key == "config":
+                continue
+            metrics.update(flatten(child, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            # Usa um campo identificador do item quando existe (ex.: name, mode, scenario)
+            label = next((str(child[k]) for k in ("name", "mode", "scenario", "concurrency")
+                          if isinstance(child, dict) and k in child), str(index))
+            metrics.update(flatten(child, f"{prefix}[{label}]"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool) and prefix.rsplit(".", 1)[-1] in COMPARED:
+        metrics[prefix] = float(value)
+    return metrics
+
+
+def main(args) -> int:
+    with open(args.before) as before_file, open(args.after) as after_file:
+        before = flatten(json.load(before_file)["results"])
+        after = flatten(json.load(after_file)["results"])
+
+    regressions = 0
+    print(f"{'metric':<60} {'before':>12} {'after':>12} {'change':>9}")
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        change = (new - old) / old * 100 if old else 0.0
+        worse = -change if name.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change
+        flag = ""
+        if worse > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<60} {old:>12.3f} {new:>12.3f} {change:>+8.1f}%{flag}")
+
+    print(f"\n{regressions} regressions above {args.threshold}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Piora percentual tolerada")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,125 @@
+"""Teste de carga da API com um mix configurável de operações.
+
+    python -m benchmarks.load --concurrency 32 --duration 30 --mix get=70,list=15,create=5,update=7,delete=3
+    python -m benchmarks.load --base-url http://localhost:8000 --output results/before.json
+
+Rode antes ``python -m benchmarks.seed`` para ter dados. Os deletes só apagam livros criados
+pelo próprio teste, então o conjunto de dados semeado continua igual entre execuções.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.bench_bulk import make_book
+from benchmarks.common import http_client, summarize, write_results
+
+OPERATIONS = ("get", "list", "create", "update", "delete")
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation '{name}', expected one of {OPERATIONS}")
+        mix[name] = int(weight)
+    return mix
+
+
+class Workload:
+    def __init__(self, client, ids: list[int], rng: random.Random):
+        self.client = client
+        self.ids = ids
+        self.created: list[int] = []
+        self.rng = rng
+        self.counter = 0
+
+    async def get(self):
+        return await self.client.get(f"/books/{self.rng.choice(self.ids)}")
+
+    async def list(self):
+        params = {"limit": 20, "count": "estimated"}
+        if self.rng.random() < 0.5:
+            params["offset"] = self.rng.randint(0, 1000)
+        return await self.client.get("/books/", params=params)
+
+    async def create(self):
+        self.counter += 1
+        response = await self.client.post("/books/", json=make_book(self.counter))
+        if response.status_code == 200:
+            self.created.append(response.json()["id"])
+        return response
+
+    async def update(self):
+        book_id = self.rng.choice(self.ids)
+        return await self.client.patch(f"/books/{book_id}", json={"quantity_copies": self.rng.randint(0, 20)})
+
+    async def delete(self):
+        if not self.created:
+            return await self.create()
+        return await self.client.delete(f"/books/{self.created.pop()}")
+
+
+async def main(args) -> None:
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    operations = list(mix)
+    weights = [mix[name] for name in operations]
+
+    async with http_client(args.base_url) as client:
+        sample = (await client.get("/books/", params={"limit": args.sample, "count": "none"})).json()
+        ids = [book["id"] for book in sample["books"]]
+        if not ids:
+            raise SystemExit("No books found: run `python -m benchmarks.seed` first")
+        workload = Workload(client, ids, rng)
+
+        latencies = {name: [] for name in operations}
+        errors = {name: 0 for name in operations}
+        deadline = time.perf_counter() + args.duration
+        remaining = args.requests
+
+        async def worker():
+            nonlocal remaining
+            while time.perf_counter() < deadline and (args.requests == 0 or remaining > 0):
+                remaining -= 1
+                name = rng.choices(operations, weights)[0]
+                start = time.perf_counter()
+                response = await getattr(workload, name)()
+                latencies[name].append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors[name] += 1
+
+        # Aquecimento: pool de conexões, cache e JIT de planos antes de medir
+        await asyncio.gather(*(workload.get() for _ in range(min(args.concurrency, len(ids)))))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    results = {
+        "config": {"concurrency": args.concurrency, "mix": mix, "duration": args.duration,
+                   "requests": args.requests, "seed": args.seed},
+        "overall": summarize(all_latencies, elapsed, sum(errors.values())),
+        "operations": {name: summarize(latencies[name], elapsed, errors[name]) for name in operations},
+    }
+
+    print(f"{'operation':<10} {'requests':>9} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, result in [("overall", results["overall"]), *results["operations"].items()]:
+        print(f"{name:<10} {result['requests']:>9} {result['rps']:>9} {result['p50_ms']:>9} "
+              f"{result['p95_ms']:>9} {result['p99_ms']:>9} {result['errors']:>7}")
+    write_results(args.output, "load", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Servidor já rodando; se omitido usa o app em processo")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="Segundos de medição")
+    parser.add_argument("--requests", type=int, default=0, help="Limite de requisições (0 = só a duração)")
+    parser.add_argument("--mix", default="get=70,list=15,create=5,update=7,delete=3")
+    parser.add_argument("--sample", type=int, default=1000, help="Quantos ids existentes usar em get/update")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    asyncio.run(main(parser.parse_args()))
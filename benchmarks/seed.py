@@ -0,0 +1,89 @@
+"""Popula public.books com um conjunto de dados sintético e reprodutível usando COPY.
+
+    python -m benchmarks.seed --rows 100000 --truncate
+    python -m benchmarks.seed --rows 10000000 --seed 7
+
+Os valores dependem só de --seed e do índice da linha, então dois ambientes com os mesmos
+parâmetros ficam com os mesmos dados.
+"""
+import argparse
+import datetime
+import io
+import random
+import time
+
+from benchmarks.common import setup_app_path
+
+setup_app_path()
+
+from config import create_connection  # noqa: E402
+
+GENDERS = ("fiction", "science", "history", "poetry", "biography", "fantasy", "romance", "technology")
+COLUMNS = ("title", "author", "publisher", "publication_year", "gender", "quantity_copies", "available", "updated_in")
+
+
+class RowStream(io.RawIOBase):
+    """Arquivo somente leitura que gera as linhas do COPY sob demanda (memória constante)"""
+
+    def __init__(self, rows: int, seed: int):
+        self._rows = iter(self._generate(rows, seed))
+        self._buffer = b""
+
+    @staticmethod
+    def _generate(rows: int, seed: int):
+        rng = random.Random(seed)
+        base = datetime.datetime(2020, 1, 1)
+        for index in range(rows):
+            copies = rng.randint(0, 20)
+            updated_in = base + datetime.timedelta(seconds=rng.randint(0, 4 * 365 * 86400))
+            yield (
+                f"Book {index} {rng.choice(('of', 'and', 'in', 'the'))} {rng.randint(1, 99999)}\t"
+                f"Author {rng.randint(1, max(10, rows // 50))}\t"
+                f"Publisher {rng.randint(1, 500)}\t"
+                f"{rng.randint(1900, 2025)}\t"
+                f"{rng.choice(GENDERS)}\t"
+                f"{copies}\t"
+                f"{'t' if copies > 0 else 'f'}\t"
+                f"{updated_in.isoformat(sep=' ')}\n"
+            ).encode()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while len(self._buffer) < len(target):
+            chunk = b"".join(line for _, line in zip(range(1000), self._rows))
+            if not chunk:
+                break
+            self._buffer += chunk
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def main(args) -> None:
+    conn = create_connection()
+    try:
+        with conn.cursor() as cur:
+            if args.truncate:
+                cur.execute("TRUNCATE public.books RESTART IDENTITY")
+            start = time.perf_counter()
+            stream = io.BufferedReader(RowStream(args.rows, args.seed), buffer_size=1 << 20)
+            cur.copy_expert(f"COPY public.books ({', '.join(COLUMNS)}) FROM STDIN", stream)
+            conn.commit()
+            elapsed = time.perf_counter() - start
+
+            conn.autocommit = True
+            cur.execute("ANALYZE public.books")
+        print(f"{args.rows} books loaded in {elapsed:.1f}s ({args.rows / elapsed:.0f} rows/s)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="Apaga os livros existentes antes de popular")
+    main(parser.parse_args())
@@ -0,0 +1,21 @@
+-- Índices para os filtros e a busca de GET /books.
+-- CONCURRENTLY não bloqueia escritas na tabela; rode com psql (fora de uma transação):
+--   psql "$DATABASE_URL" -f migrations/001_books_search_indexes.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Filtros por igualdade. O id no fim do índice atende ao ORDER BY id e ao "id > cursor"
+-- da paginação sem ordenar as linhas filtradas.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS books_author_id_idx ON public.books (author, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS books_publisher_id_idx ON public.books (publisher, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS books_gender_id_idx ON public.books (gender, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS books_publication_year_id_idx ON public.books (publication_year, id);
+
+-- Exportação incremental (GET /books/export?updated_since=...)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS books_updated_in_idx ON public.books (updated_in);
+
+-- Busca por trecho (ILIKE '%texto%') em title e author, usada por ?title= e ?q=
+CREATE INDEX CONCURRENTLY IF NOT EXISTS books_title_trgm_idx ON public.books USING gin (title gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS books_author_trgm_idx ON public.books USING gin (author gin_trgm_ops);
+
+ANALYZE public.books;
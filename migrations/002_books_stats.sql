@@ -0,0 +1,224 @@
+-- Estatísticas do catálogo (GET /books/stats) mantidas por triggers em public.books.
+--   psql "$DATABASE_URL" -f migrations/002_books_stats.sql
+--
+-- Cada comando em public.books registra a sua diferença (total, por gênero, por autor e por
+-- editora) em public.books_stats_pending; os triggers são por comando (FOR EACH STATEMENT) e
+-- leem as tabelas de transição, então um INSERT em lote ou COPY de milhões de linhas gera uma
+-- linha por valor afetado, e não uma por linha do lote.
+--
+-- As diferenças só são somadas em public.books_stats no COMMIT (trigger de constraint
+-- adiado), agregadas pela transação inteira e em uma ordem global (dimension, value, shard).
+-- Assim uma importação em vários comandos não trava as linhas de autor/editora em uma ordem
+-- diferente da de outra transação: todas travam na mesma sequência, sem deadlock, e só no fim.
+--
+-- As linhas de total e de gênero são tocadas por quase toda escrita: cada backend soma na sua
+-- fatia (shard) do contador, para que transações concorrentes não esperem pelo lock da mesma
+-- linha, e a leitura soma as fatias. Autores e editoras usam uma fatia só, e os maiores saem
+-- direto do índice (dimension, books DESC).
+--
+-- Para corrigir divergências (ex.: escrita feita com os triggers desabilitados):
+--   SELECT * FROM public.books_stats_drift;      -- o que está diferente
+--   SELECT public.books_stats_rebuild();          -- recalcula tudo a partir de public.books
+-- ou, a partir de app/: python rebuild_stats.py
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.books_stats (
+    dimension text NOT NULL,               -- 'total', 'gender', 'author' ou 'publisher'
+    value text NOT NULL,                   -- valor da dimensão ('' no total)
+    shard smallint NOT NULL DEFAULT 0,
+    books bigint NOT NULL DEFAULT 0,
+    copies bigint NOT NULL DEFAULT 0,
+    available_books bigint NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value, shard)
+);
+
+CREATE INDEX IF NOT EXISTS books_stats_top_idx ON public.books_stats (dimension, books DESC, value);
+
+-- Diferenças da transação em andamento, ainda não somadas em books_stats. Cada transação só
+-- enxerga as suas, e elas são apagadas no COMMIT; UNLOGGED porque nada aqui sobrevive à transação
+CREATE UNLOGGED TABLE IF NOT EXISTS public.books_stats_pending (
+    dimension text NOT NULL,
+    value text NOT NULL,
+    shard smallint NOT NULL,
+    books bigint NOT NULL,
+    copies bigint NOT NULL,
+    available_books bigint NOT NULL,
+    flush boolean NOT NULL DEFAULT false   -- marcador que agenda books_stats_flush() para o COMMIT
+);
+
+-- Agregado calculado direto de public.books (varre a tabela): base da reconstrução e da conferência
+CREATE OR REPLACE VIEW public.books_stats_live AS
+WITH rows AS (
+    SELECT coalesce(gender, '') AS gender, coalesce(author, '') AS author,
+           coalesce(publisher, '') AS publisher, coalesce(quantity_copies, 0) AS copies,
+           coalesce(available, false)::int AS available_books
+    FROM public.books
+)
+SELECT 'total'::text AS dimension, ''::text AS value, count(*) AS books,
+       coalesce(sum(copies), 0) AS copies, coalesce(sum(available_books), 0) AS available_books
+FROM rows
+UNION ALL
+SELECT 'gender', gender, count(*), sum(copies), sum(available_books) FROM rows GROUP BY gender
+UNION ALL
+SELECT 'author', author, count(*), sum(copies), sum(available_books) FROM rows GROUP BY author
+UNION ALL
+SELECT 'publisher', publisher, count(*), sum(copies), sum(available_books) FROM rows GROUP BY publisher;
+
+CREATE OR REPLACE VIEW public.books_stats_drift AS
+SELECT dimension, value,
+       coalesce(live.books, 0) AS live_books, coalesce(stored.books, 0) AS stored_books,
+       coalesce(live.copies, 0) AS live_copies, coalesce(stored.copies, 0) AS stored_copies,
+       coalesce(live.available_books, 0) AS live_available_books,
+       coalesce(stored.available_books, 0) AS stored_available_books
+FROM public.books_stats_live AS live
+FULL JOIN (
+    SELECT dimension, value, sum(books) AS books, sum(copies) AS copies, sum(available_books) AS available_books
+    FROM public.books_stats
+    GROUP BY dimension, value
+) AS stored USING (dimension, value)
+WHERE (coalesce(live.books, 0), coalesce(live.copies, 0), coalesce(live.available_books, 0))
+      IS DISTINCT FROM
+      (coalesce(stored.books, 0), coalesce(stored.copies, 0), coalesce(stored.available_books, 0));
+
+CREATE OR REPLACE FUNCTION public.books_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    changes text;
+BEGIN
+    -- +1 para cada linha nova e -1 para cada linha antiga; um UPDATE tem as duas
+    changes := CASE TG_OP
+        WHEN 'INSERT' THEN
+            'SELECT gender, author, publisher, 1 AS books, quantity_copies AS copies, available FROM new_rows'
+        WHEN 'DELETE' THEN
+            'SELECT gender, author, publisher, -1, -quantity_copies, available FROM old_rows'
+        ELSE
+            'SELECT gender, author, publisher, 1 AS books, quantity_copies AS copies, available FROM new_rows
+             UNION ALL
+             SELECT gender, author, publisher, -1, -quantity_copies, available FROM old_rows'
+    END;
+
+    EXECUTE format($sql$
+        WITH changes AS (
+            SELECT coalesce(gender, '') AS gender, coalesce(author, '') AS author,
+                   coalesce(publisher, '') AS publisher, books, coalesce(copies, 0) AS copies,
+                   CASE WHEN coalesce(available, false) THEN books ELSE 0 END AS available_books
+            FROM (%s) AS changed (gender, author, publisher, books, copies, available)
+        ),
+        deltas AS (
+            SELECT 'total' AS dimension, '' AS value, sum(books) AS books, sum(copies) AS copies,
+                   sum(available_books) AS available_books
+            FROM changes
+            UNION ALL
+            SELECT 'gender', gender, sum(books), sum(copies), sum(available_books) FROM changes GROUP BY gender
+            UNION ALL
+            SELECT 'author', author, sum(books), sum(copies), sum(available_books) FROM changes GROUP BY author
+            UNION ALL
+            SELECT 'publisher', publisher, sum(books), sum(copies), sum(available_books) FROM changes GROUP BY publisher
+        )
+        INSERT INTO public.books_stats_pending (dimension, value, shard, books, copies, available_books)
+        SELECT dimension, value, CASE WHEN dimension IN ('total', 'gender') THEN $1 ELSE 0 END,
+               books, copies, available_books
+        FROM deltas
+        -- Um UPDATE só de título (ou um comando sem linhas) não muda nada
+        WHERE books <> 0 OR copies <> 0 OR available_books <> 0
+    $sql$, changes) USING pg_backend_pid() % 16;
+
+    -- Um marcador por transação agenda a soma para o COMMIT; a configuração local volta
+    -- sozinha no fim da transação (e no rollback de um savepoint, junto com o marcador)
+    IF current_setting('books_stats.flush_queued', true) IS DISTINCT FROM 'on' THEN
+        PERFORM set_config('books_stats.flush_queued', 'on', true);
+        INSERT INTO public.books_stats_pending (dimension, value, shard, books, copies, available_books, flush)
+        VALUES ('', '', 0, 0, 0, 0, true);
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.books_stats_flush() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- Com SET CONSTRAINTS ... IMMEDIATE isto roda antes do COMMIT: os próximos comandos agendam outra vez
+    PERFORM set_config('books_stats.flush_queued', 'off', true);
+
+    WITH pending AS (
+        DELETE FROM public.books_stats_pending
+        RETURNING dimension, value, shard, books, copies, available_books, flush
+    )
+    INSERT INTO public.books_stats AS stats (dimension, value, shard, books, copies, available_books)
+    SELECT dimension, value, shard, sum(books), sum(copies), sum(available_books)
+    FROM pending
+    WHERE NOT flush
+    GROUP BY dimension, value, shard
+    HAVING sum(books) <> 0 OR sum(copies) <> 0 OR sum(available_books) <> 0
+    -- Ordem global: transações concorrentes travam as linhas na mesma sequência, sem deadlock
+    ORDER BY dimension, value, shard
+    ON CONFLICT (dimension, value, shard) DO UPDATE
+    SET books = stats.books + EXCLUDED.books,
+        copies = stats.copies + EXCLUDED.copies,
+        available_books = stats.available_books + EXCLUDED.available_books;
+
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.books_stats_truncate() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM public.books_stats;
+    -- O que esta transação registrou antes do TRUNCATE não vale mais
+    DELETE FROM public.books_stats_pending WHERE NOT flush;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.books_stats_rebuild() RETURNS bigint
+LANGUAGE plpgsql AS $$
+DECLARE
+    drifted bigint;
+BEGIN
+    -- SHARE bloqueia as escritas em public.books (não as leituras) até o fim da transação,
+    -- então nenhuma mudança escapa entre o recálculo e a troca
+    LOCK TABLE public.books IN SHARE MODE;
+    SELECT count(*) INTO drifted FROM public.books_stats_drift;
+
+    -- Compacta as fatias em uma só e descarta os valores que não existem mais
+    DELETE FROM public.books_stats;
+    INSERT INTO public.books_stats (dimension, value, shard, books, copies, available_books)
+    SELECT dimension, value, 0, books, copies, available_books
+    FROM public.books_stats_live
+    WHERE books > 0 OR dimension = 'total';
+
+    RETURN drifted;
+END
+$$;
+
+DROP TRIGGER IF EXISTS books_stats_insert ON public.books;
+CREATE TRIGGER books_stats_insert AFTER INSERT ON public.books
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.books_stats_apply();
+
+DROP TRIGGER IF EXISTS books_stats_update ON public.books;
+CREATE TRIGGER books_stats_update AFTER UPDATE ON public.books
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.books_stats_apply();
+
+DROP TRIGGER IF EXISTS books_stats_delete ON public.books;
+CREATE TRIGGER books_stats_delete AFTER DELETE ON public.books
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.books_stats_apply();
+
+DROP TRIGGER IF EXISTS books_stats_truncate ON public.books;
+CREATE TRIGGER books_stats_truncate AFTER TRUNCATE ON public.books
+    FOR EACH STATEMENT EXECUTE FUNCTION public.books_stats_truncate();
+
+DROP TRIGGER IF EXISTS books_stats_flush ON public.books_stats_pending;
+CREATE CONSTRAINT TRIGGER books_stats_flush AFTER INSERT ON public.books_stats_pending
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW WHEN (NEW.flush) EXECUTE FUNCTION public.books_stats_flush();
+
+-- Carga inicial com os livros que já existem
+SELECT public.books_stats_rebuild();
+
+COMMIT;
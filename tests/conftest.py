@@ -0,0 +1,37 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Os módulos da aplicação são importados a partir de app/ (ex.: ``from config import ...``)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from cache.book_cache import book_cache
+    from dataprovider.memory_book_storage import memory_book_storage
+    from main import app
+
+    memory_book_storage.clear()
+    book_cache.clear()
+    with TestClient(app) as test_client:
+        yield test_client
+    memory_book_storage.clear()
+    book_cache.clear()
+
+
+def make_book(index: int = 0) -> dict:
+    return {
+        "title": f"Book {index}",
+        "author": f"Author {index % 3}",
+        "publisher": "Publisher",
+        "publication_year": 2000 + index,
+        "gender": "fiction",
+        "quantity_copies": 2,
+        "available": True,
+    }
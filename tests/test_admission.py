@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from psycopg2 import errors
+
+from database.connection_pool import PoolTimeout
+from database.statement_timeout import remaining_seconds
+from middleware.admission import AdmissionControlMiddleware, ConcurrencyLimiter
+from observability.request_context import deadline_var
+from resource.error_handlers import register_error_handlers
+
+
+def test_limiter_rejects_when_the_queue_is_full():
+    limiter = ConcurrencyLimiter("read", limit=1, queue_size=0, queue_timeout=1)
+
+    async def acquire_twice():
+        return await limiter.acquire(), await limiter.acquire()
+
+    assert asyncio.run(acquire_twice()) == (None, "queue_full")
+    assert limiter.stats()["rejected_total"] == 1
+
+
+def test_limiter_gives_up_after_the_queue_timeout():
+    limiter = ConcurrencyLimiter("read", limit=1, queue_size=1, queue_timeout=0.01)
+
+    async def acquire_twice():
+        return await limiter.acquire(), await limiter.acquire()
+
+    assert asyncio.run(acquire_twice()) == (None, "queue_timeout")
+    assert limiter.stats()["waiting"] == 0
+
+
+def test_queue_timeout_racing_a_release_still_returns_queue_timeout():
+    limiter = ConcurrencyLimiter("read", limit=1, queue_size=1, queue_timeout=0)
+
+    async def race():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        # O wait_for do waiter já cancelou o future por timeout e ainda não retomou:
+        # o release() cai exatamente nesse intervalo e descarta o future da fila
+        await asyncio.sleep(0)
+        limiter.release()
+        return await waiter
+
+    assert asyncio.run(race()) == "queue_timeout"
+    assert limiter.stats()["queue_timeouts_total"] == 1
+    assert limiter.stats()["waiting"] == 0
+    assert limiter.stats()["active"] == 0
+
+
+def test_release_hands_the_slot_to_the_waiters_in_order():
+    limiter = ConcurrencyLimiter("write", limit=1, queue_size=2, queue_timeout=1)
+    admitted = []
+
+    async def request(name):
+        assert await limiter.acquire() is None
+        admitted.append(name)
+        await asyncio.sleep(0.01)
+        limiter.release()
+
+    async def requests():
+        await asyncio.gather(request("a"), request("b"), request("c"))
+
+    asyncio.run(requests())
+
+    assert admitted == ["a", "b", "c"]
+    assert limiter.stats()["active"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    limiter = ConcurrencyLimiter("write", limit=1, queue_size=1, queue_timeout=1)
+
+    async def cancel_waiter():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+
+    asyncio.run(cancel_waiter())
+
+    assert limiter.stats()["waiting"] == 0
+    assert limiter.stats()["active"] == 0
+
+
+def _client(limit: int = 1, queue_size: int = 0, request_timeout: float = 10) -> TestClient:
+    app = FastAPI()
+    register_error_handlers(app)
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.02)
+        # Como no empréstimo de uma conexão: sem tempo restante a requisição não chega ao banco
+        remaining_seconds(deadline_var.get())
+        return {"ok": True}
+
+    @app.get("/pool-timeout")
+    async def pool_timeout():
+        raise PoolTimeout("pool exhausted")
+
+    @app.get("/query-canceled")
+    async def query_canceled():
+        raise errors.QueryCanceled("canceling statement due to statement timeout")
+
+    limiters = {"read": ConcurrencyLimiter("read", limit, queue_size, 1)}
+    app.add_middleware(AdmissionControlMiddleware, limiters=limiters, request_timeout=request_timeout, retry_after=3)
+    return TestClient(app)
+
+
+def test_middleware_sheds_with_503_and_retry_after():
+    response = _client(limit=0).get("/ok")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_middleware_admits_within_the_limit():
+    assert _client(limit=1).get("/ok").status_code == 200
+
+
+def test_deadline_exceeded_is_a_504():
+    response = _client(request_timeout=0.01).get("/slow")
+
+    assert response.status_code == 504
+
+
+def test_statement_timeout_is_a_504():
+    assert _client().get("/query-canceled").status_code == 504
+
+
+def test_pool_timeout_is_a_503_with_retry_after():
+    response = _client().get("/pool-timeout")
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
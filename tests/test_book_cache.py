@@ -0,0 +1,43 @@
+import asyncio
+
+from cache.book_cache import BookCache
+from domain.book import Book
+
+
+def _book(book_id: int, title: str) -> Book:
+    return Book(id=book_id, title=title, author="Author", publisher="Publisher", publication_year=2000,
+                gender="fiction", quantity_copies=1, available=True, updated_in=None)
+
+
+def _load(cache: BookCache, book: Book) -> Book:
+    async def loader():
+        return book
+    return asyncio.run(cache.get_or_load(book.id, loader))
+
+
+def test_invalidated_book_is_not_cached_again_during_the_write_fence():
+    cache = BookCache(max_size=10, ttl=60, negative_ttl=1, write_fence=60)
+    _load(cache, _book(1, "old"))
+
+    cache.invalidate(1)
+    # Leitura de uma réplica atrasada: devolve a versão antiga, mas não volta ao cache
+    _load(cache, _book(1, "old"))
+
+    assert _load(cache, _book(1, "new")).title == "new"
+    assert cache.stats()["size"] == 0
+
+
+def test_without_write_fence_the_next_read_is_cached():
+    cache = BookCache(max_size=10, ttl=60, negative_ttl=1)
+    cache.invalidate(1)
+    _load(cache, _book(1, "current"))
+
+    assert _load(cache, _book(1, "other")).title == "current"
+
+
+def test_clear_fences_every_book():
+    cache = BookCache(max_size=10, ttl=60, negative_ttl=1, write_fence=60)
+    cache.clear()
+    _load(cache, _book(2, "old"))
+
+    assert cache.stats()["size"] == 0
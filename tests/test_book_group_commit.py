@@ -0,0 +1,189 @@
+import asyncio
+import contextlib
+import dataclasses
+import datetime
+import itertools
+
+import psycopg2
+
+from database.pooled_connection import PooledConnection
+from dataprovider.book_group_commit import BookGroupCommit
+from dataprovider.postgres_book_storage import PostgresBookStorage
+from domain.book import Book
+
+
+def _book(title: str) -> Book:
+    return Book(id=None, title=title, author="Author", publisher="Publisher", publication_year=2000,
+                gender="fiction", quantity_copies=1, available=True, updated_in=datetime.datetime(2024, 1, 1))
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.connection = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, template, args):
+        return repr(tuple(args)).encode()
+
+    def execute(self, query, params=None):
+        self.conn.statements += 1
+        self.rows = [
+            (next(self.conn.ids), f"Book {index}", "Author", "Publisher", 2000, "fiction", 1, True,
+             datetime.datetime(2024, 1, 1))
+            for index in range(query.count(b"'Author'") if isinstance(query, bytes) else 1)
+        ]
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+
+class _FakeConnection:
+    encoding = "UTF8"
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.statements = 0
+        self.commits = 0
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class _CountingPool(PooledConnection):
+    def __init__(self):
+        super().__init__()
+        self.conn = _FakeConnection()
+        self.borrowed = 0
+
+    @contextlib.contextmanager
+    def borrow(self):
+        self.borrowed += 1
+        yield self.conn
+
+
+def test_grouped_creates_share_one_connection_and_one_commit():
+    pool = _CountingPool()
+    group_commit = BookGroupCommit(window=0.01, max_batch=10)
+
+    async def creates():
+        return await asyncio.gather(*(
+            group_commit.create(_book(f"Book {index}"), PostgresBookStorage(pool)) for index in range(5)
+        ))
+
+    created = asyncio.run(creates())
+
+    assert sorted(book.id for book in created) == [1, 2, 3, 4, 5]
+    assert pool.borrowed == 1
+    assert pool.conn.commits == 1
+
+
+class _FakeStorage:
+    """Storage que registra as gravações; ``group_error`` faz o INSERT do grupo falhar"""
+
+    def __init__(self, group_error: Exception | None = None, delay: float = 0.0):
+        self.group_error = group_error
+        self.delay = delay
+        self.ids = itertools.count(1)
+        self.groups = []
+        self.singles = []
+
+    async def create_book_group(self, books):
+        self.groups.append([book.title for book in books])
+        await asyncio.sleep(self.delay)
+        if self.group_error is not None:
+            raise self.group_error
+        return [self._created(book) for book in books]
+
+    async def create_book(self, book):
+        self.singles.append(book.title)
+        if book.title == "bad":
+            raise psycopg2.IntegrityError("duplicate key value")
+        return self._created(book)
+
+    def _created(self, book):
+        return dataclasses.replace(book, id=next(self.ids))
+
+
+def test_row_error_retries_each_create_alone():
+    storage = _FakeStorage(group_error=psycopg2.IntegrityError("duplicate key value"))
+    group_commit = BookGroupCommit(window=0.01, max_batch=10)
+
+    async def creates():
+        return await asyncio.gather(*(group_commit.create(_book(title), storage) for title in ("a", "bad", "c")),
+                                    return_exceptions=True)
+
+    first, bad, last = asyncio.run(creates())
+
+    assert storage.groups == [["a", "bad", "c"]]
+    assert sorted(storage.singles) == ["a", "bad", "c"]
+    assert first.title == "a" and last.title == "c"
+    assert isinstance(bad, psycopg2.IntegrityError)
+    assert group_commit.stats()["fallbacks"] == 3
+
+
+def test_connection_error_reaches_every_create():
+    storage = _FakeStorage(group_error=psycopg2.OperationalError("server closed the connection"))
+    group_commit = BookGroupCommit(window=0.01, max_batch=10)
+
+    async def creates():
+        return await asyncio.gather(*(group_commit.create(_book(title), storage) for title in ("a", "b")),
+                                    return_exceptions=True)
+
+    results = asyncio.run(creates())
+
+    assert all(isinstance(result, psycopg2.OperationalError) for result in results)
+    assert storage.singles == []
+
+
+def test_followers_create_alone_when_the_opener_is_cancelled_in_the_window():
+    storage = _FakeStorage()
+    group_commit = BookGroupCommit(window=0.05, max_batch=10)
+
+    async def creates():
+        opener = asyncio.create_task(group_commit.create(_book("a"), storage))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group_commit.create(_book("b"), storage))
+        await asyncio.sleep(0)
+        opener.cancel()
+        return await follower
+
+    created = asyncio.run(creates())
+
+    assert created.title == "b"
+    assert storage.groups == []
+    assert storage.singles == ["b"]
+
+
+def test_cancelling_the_opener_during_the_flush_still_answers_the_others():
+    storage = _FakeStorage(delay=0.05)
+    group_commit = BookGroupCommit(window=0.01, max_batch=10)
+
+    async def creates():
+        opener = asyncio.create_task(group_commit.create(_book("a"), storage))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group_commit.create(_book("b"), storage))
+        # Depois da janela: o grupo já está sendo gravado
+        await asyncio.sleep(0.03)
+        opener.cancel()
+        return await follower
+
+    created = asyncio.run(creates())
+
+    assert created.title == "b"
+    assert storage.groups == [["a", "b"]]
+    assert storage.singles == []
@@ -0,0 +1,143 @@
+import asyncio
+import contextlib
+import datetime
+
+from cache.book_loader import BookLoader
+from database.pooled_connection import PooledConnection
+from dataprovider.postgres_book_storage import PostgresBookStorage
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.ids = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.queries += 1
+        self.ids = params[0]
+
+    def fetchall(self):
+        return [
+            (book_id, f"Book {book_id}", "Author", "Publisher", 2000, "fiction", 1, True,
+             datetime.datetime(2024, 1, 1))
+            for book_id in self.ids if book_id < 100
+        ]
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.queries = 0
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+
+class _CountingPool(PooledConnection):
+    """PooledConnection que conta os empréstimos no lugar de usar o pool de verdade"""
+
+    def __init__(self):
+        super().__init__(read_only=True)
+        self.conn = _FakeConnection()
+        self.borrowed = 0
+
+    @contextlib.contextmanager
+    def borrow(self):
+        self.borrowed += 1
+        yield self.conn
+
+
+def test_coalesced_lookups_borrow_a_single_connection():
+    pool = _CountingPool()
+    loader = BookLoader(window=0.01, max_batch=10)
+
+    async def lookups():
+        # Cada requisição tem a sua storage; só a que abriu o lote vai ao banco
+        return await asyncio.gather(*(loader.load(book_id, PostgresBookStorage(pool)) for book_id in (1, 2, 3)))
+
+    books = asyncio.run(lookups())
+
+    assert [book.id for book in books] == [1, 2, 3]
+    assert pool.borrowed == 1
+    assert pool.conn.queries == 1
+
+
+class _FakeStorage:
+    """Storage em memória que registra as chamadas; ids a partir de 100 não existem"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+        self.singles = []
+
+    @staticmethod
+    def _book(book_id: int):
+        from domain.book import Book
+
+        return Book(id=book_id, title=f"Book {book_id}", author="Author", publisher="Publisher",
+                    publication_year=2000, gender="fiction", quantity_copies=1, available=True,
+                    updated_in=datetime.datetime(2024, 1, 1))
+
+    async def get_books_by_ids(self, ids):
+        self.batches.append(list(ids))
+        await asyncio.sleep(self.delay)
+        return [self._book(book_id) for book_id in ids if book_id < 100]
+
+    async def get_book_by_id(self, book_id):
+        self.singles.append(book_id)
+        return self._book(book_id)
+
+
+def test_missing_id_fails_only_its_own_lookup():
+    from fastapi import HTTPException
+
+    storage = _FakeStorage()
+    loader = BookLoader(window=0.01, max_batch=10)
+
+    async def lookups():
+        return await asyncio.gather(loader.load(1, storage), loader.load(404, storage), loader.load(1, storage),
+                                    return_exceptions=True)
+
+    first, missing, repeated = asyncio.run(lookups())
+
+    assert storage.batches == [[1, 404]]
+    assert first.id == repeated.id == 1
+    assert isinstance(missing, HTTPException) and missing.status_code == 404
+
+
+def test_full_batch_opens_another_one():
+    storage = _FakeStorage()
+    loader = BookLoader(window=0.01, max_batch=2)
+
+    async def lookups():
+        return await asyncio.gather(*(loader.load(book_id, storage) for book_id in (1, 2, 3)))
+
+    books = asyncio.run(lookups())
+
+    assert [book.id for book in books] == [1, 2, 3]
+    assert sorted(storage.batches) == [[1, 2], [3]]
+    assert loader.stats()["batches"] == 2
+
+
+def test_followers_load_alone_when_the_opener_is_cancelled():
+    storage = _FakeStorage()
+    loader = BookLoader(window=0.05, max_batch=10)
+
+    async def lookups():
+        opener = asyncio.create_task(loader.load(1, storage))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(loader.load(2, storage))
+        await asyncio.sleep(0)
+        opener.cancel()
+        return await follower
+
+    book = asyncio.run(lookups())
+
+    assert book.id == 2
+    assert storage.batches == []
+    assert storage.singles == [2]
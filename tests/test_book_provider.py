@@ -0,0 +1,67 @@
+import asyncio
+import contextlib
+import datetime
+
+from database.pooled_connection import PooledConnection
+from dataprovider.book_provider import BookDataProvider
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = [
+            (book_id, f"Book {book_id}", "Author", "Publisher", 2000, "fiction", 1, True,
+             datetime.datetime(2024, 1, 1))
+            for book_id in range(1, 6)
+        ]
+
+    def execute(self, query, params=None):
+        self.conn.log.append("execute")
+
+    def fetchmany(self, size):
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+    def close(self):
+        self.conn.log.append("close")
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.log = []
+
+    def cursor(self, name=None):
+        return _FakeCursor(self)
+
+    def rollback(self):
+        self.log.append("rollback")
+
+
+class _FakePooledConnection(PooledConnection):
+    def __init__(self, conn):
+        super().__init__()
+        self.conn = conn
+
+    @contextlib.contextmanager
+    def borrow(self):
+        self.conn.log.append("borrow")
+        try:
+            yield self.conn
+        finally:
+            self.conn.log.append("release")
+
+
+def test_export_releases_its_own_connection_after_closing_the_cursor():
+    conn = _FakeConnection()
+
+    async def read_first_chunk():
+        books = BookDataProvider.iter_books(_FakePooledConnection(conn), 2)
+        first = await anext(books)
+        # Cliente desconectou: o gerador é fechado no meio da exportação
+        await books.aclose()
+        return first
+
+    first = asyncio.run(read_first_chunk())
+
+    assert [book.id for book in first] == [1, 2]
+    assert conn.log == ["borrow", "execute", "close", "rollback", "release"]
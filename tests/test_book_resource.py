@@ -0,0 +1,63 @@
+from conftest import make_book
+
+
+def test_list_books_rejects_limit_zero(client):
+    client.post("/books/", json=make_book())
+
+    response = client.get("/books/", params={"limit": 0})
+
+    assert response.status_code == 422
+
+
+def test_list_books_rejects_negative_offset(client):
+    response = client.get("/books/", params={"offset": -1})
+
+    assert response.status_code == 422
+
+
+def test_list_books_last_page_has_no_cursor(client):
+    for index in range(3):
+        client.post("/books/", json=make_book(index))
+
+    first = client.get("/books/", params={"limit": 2}).json()
+    second = client.get("/books/", params={"limit": 2, "cursor": first["nextCursor"]}).json()
+
+    assert [book["title"] for book in second["books"]] == ["Book 2"]
+    assert second["nextCursor"] is None
+
+
+def test_get_book_not_modified_does_not_build_the_body(client, monkeypatch):
+    from mapper.book_mapper import BookMapper
+
+    book_id = client.post("/books/", json=make_book()).json()["id"]
+    etag = client.get(f"/books/{book_id}").headers["ETag"]
+
+    built = []
+    to_response = BookMapper.to_response
+    monkeypatch.setattr(BookMapper, "to_response", staticmethod(lambda book: built.append(book.id) or to_response(book)))
+
+    not_modified = client.get(f"/books/{book_id}", headers={"If-None-Match": etag})
+    modified = client.get(f"/books/{book_id}", headers={"If-None-Match": '"other"'})
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert modified.status_code == 200
+    assert built == [book_id]
+
+
+def test_get_missing_book_logs_no_errors(client):
+    import logging
+
+    records = []
+    handler = logging.Handler(logging.ERROR)
+    handler.emit = records.append
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        # A segunda busca sai do cache negativo
+        responses = [client.get("/books/999") for _ in range(2)]
+    finally:
+        root.removeHandler(handler)
+
+    assert [response.status_code for response in responses] == [404, 404]
+    assert records == []
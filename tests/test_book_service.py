@@ -0,0 +1,49 @@
+import asyncio
+
+from dataprovider.memory_book_storage import InMemoryBookStorage
+from domain.book import Book
+from mapper.book_mapper import BookMapper
+from schema.book_schema import CreateBookRequest
+from service.book_service import BookService
+
+from conftest import make_book
+
+
+def test_get_books_with_limit_zero_returns_empty_page():
+    storage = InMemoryBookStorage()
+    asyncio.run(storage.create_book(BookMapper.to_request(CreateBookRequest(**make_book()))))
+    service = BookService(storage)
+
+    page = asyncio.run(service.get_books(limit=0, offset=0))
+
+    assert page["books"] == []
+    assert page["nextCursor"] is None
+
+
+
+class _TitleStorage:
+    """Storage mínima: devolve sempre o título atual, para comparar com o que ficou no cache"""
+
+    def __init__(self, title: str):
+        self.title = title
+
+    async def get_book_by_id(self, book_id: int) -> Book:
+        return Book(id=book_id, title=self.title, author="Author", publisher="Publisher", publication_year=2000,
+                    gender="fiction", quantity_copies=1, available=True, updated_in=None)
+
+
+def test_get_book_by_id_skips_the_cache_inside_the_read_your_writes_window():
+    from cache.book_cache import book_cache
+
+    book_cache.clear()
+    storage = _TitleStorage("Old")
+    asyncio.run(BookService(storage).get_book_by_id(42))
+    # O cliente acabou de gravar e o cache (de outra leitura) ainda tem a versão anterior
+    storage.title = "Updated"
+
+    cached = asyncio.run(BookService(storage).get_book_by_id(42))
+    fresh = asyncio.run(BookService(storage, use_cache=False).get_book_by_id(42))
+    book_cache.clear()
+
+    assert cached.title == "Old"
+    assert fresh.title == "Updated"
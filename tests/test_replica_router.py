@@ -0,0 +1,29 @@
+from database.connection_pool import PoolTimeout
+from database.replica_router import ReplicaRouter
+
+
+class _BusyPool:
+    def acquire(self, timeout=None):
+        raise PoolTimeout("No database connection available")
+
+
+class _DownPool:
+    def acquire(self, timeout=None):
+        raise ConnectionError("could not connect to server")
+
+
+def test_busy_replica_stays_in_rotation():
+    router = ReplicaRouter({"replica-0": _BusyPool()}, check_interval=0.01)
+
+    router.check()
+
+    assert router.healthy() == {"replica-0": True}
+
+
+def test_unreachable_replica_leaves_rotation():
+    router = ReplicaRouter({"replica-0": _DownPool()}, check_interval=0.01)
+
+    router.check()
+
+    assert router.healthy() == {"replica-0": False}
+    assert router.choose() is None